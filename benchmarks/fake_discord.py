@@ -0,0 +1,248 @@
+"""
+In-process fake of the discord.py objects the bot talks to
+
+Only the network side is faked (client, users, channels, messages and
+interactions); views, buttons and modals are the real discord.py classes, so
+discord.py must be installed. Every API call waits for an injectable latency
+and message sends can fail with 429s, to exercise the message scheduler.
+"""
+import asyncio
+import itertools
+import random
+from collections import Counter
+from typing import Dict, List, Optional
+
+import discord
+
+
+_ids = itertools.count(1_300_000_000_000_000_000)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+class FakeHTTP:
+    """Simulated Discord API: latency, jitter and rate limits, with call counters"""
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, rate_limit: float = 0.0,
+                 retry_after: float = 0.5, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.rate_limited = 0
+
+    async def call(self, kind: str, may_rate_limit: bool = False) -> None:
+        self.calls[kind] += 1
+        await asyncio.sleep(max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter)))
+        if may_rate_limit and self.rng.random() < self.rate_limit:
+            self.rate_limited += 1
+            raise discord.RateLimited(self.retry_after)
+
+
+class FakeMessage:
+    def __init__(self, http: FakeHTTP, channel, message_id: Optional[int] = None, content: Optional[str] = None,
+                 **kwargs):
+        self.http = http
+        self.channel = channel
+        self.id = message_id or next_id()
+        self.content = content
+        self.embeds = kwargs.get("embeds") or ([kwargs["embed"]] if kwargs.get("embed") else [])
+        self.view = kwargs.get("view")
+
+    async def edit(self, **kwargs):
+        await self.http.call("edit")
+        if "content" in kwargs:
+            self.content = kwargs["content"]
+        if "view" in kwargs:
+            self.view = kwargs["view"]
+        return self
+
+    async def pin(self, **kwargs):
+        await self.http.call("pin")
+
+
+class FakeMessageable:
+    """Anything the bot sends messages to: users (DMs), channels and threads"""
+
+    def __init__(self, http: FakeHTTP, object_id: Optional[int] = None):
+        self.http = http
+        self.id = object_id or next_id()
+        self.history: List[FakeMessage] = []
+
+    @property
+    def mention(self) -> str:
+        return f"<#{self.id}>"
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> FakeMessage:
+        await self.http.call("send", may_rate_limit=True)
+        message = FakeMessage(self.http, self, content=content, **kwargs)
+        self.history.append(message)
+        return message
+
+    def get_partial_message(self, message_id: int) -> FakeMessage:
+        return FakeMessage(self.http, self, message_id)
+
+
+class FakeUser(FakeMessageable):
+    def __init__(self, http: FakeHTTP, name: Optional[str] = None):
+        super().__init__(http)
+        self.name = name or f"joueur{self.id % 100000}"
+        self.display_name = self.name
+        self.bot = False
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+
+class FakeGuild:
+    def __init__(self, guild_id: Optional[int] = None):
+        self.id = guild_id or next_id()
+        self.shard_id = 0
+
+    def get_member(self, user_id: int):
+        return None
+
+
+class FakeThread(FakeMessageable):
+    def __init__(self, http: FakeHTTP, guild: FakeGuild, name: str):
+        super().__init__(http)
+        self.guild = guild
+        self.name = name
+        self.archived = False
+
+
+class FakeTextChannel(FakeMessageable):
+    def __init__(self, http: FakeHTTP, guild: FakeGuild, client: "FakeClient"):
+        super().__init__(http)
+        self.guild = guild
+        self.client = client
+
+    async def create_thread(self, *, name: str, **kwargs) -> FakeThread:
+        await self.http.call("create_thread")
+        thread = FakeThread(self.http, self.guild, name)
+        self.client.add_channel(thread)
+        return thread
+
+
+class FakeClient:
+    """
+    Stands in for the bot: gateway caches and REST lookups
+
+    `cache_users=False` leaves the user cache empty, like the lean profile,
+    so lookups go through `fetch_user`.
+    """
+
+    def __init__(self, http: FakeHTTP, cache_users: bool = False):
+        self.http = http
+        self.cache_users = cache_users
+        self.shard_count = None
+        self.shard_id = None
+        self.users: Dict[int, FakeUser] = {}
+        self.channels: Dict[int, FakeMessageable] = {}
+        self.game_manager = None
+        self.guild = FakeGuild()
+        self.channel = FakeTextChannel(http, self.guild, self)
+        self.add_channel(self.channel)
+
+    def add_user(self, user: FakeUser) -> None:
+        self.users[user.id] = user
+
+    def add_channel(self, channel: FakeMessageable) -> None:
+        self.channels[channel.id] = channel
+
+    def get_user(self, user_id: int) -> Optional[FakeUser]:
+        return self.users.get(user_id) if self.cache_users else None
+
+    async def fetch_user(self, user_id: int) -> FakeUser:
+        await self.http.call("fetch_user")
+        if user_id not in self.users:
+            raise discord.NotFound(_FakeResponse(404), "Unknown User")
+        return self.users[user_id]
+
+    def get_channel(self, channel_id: int):
+        return self.channels.get(channel_id)
+
+    async def fetch_channel(self, channel_id: int):
+        await self.http.call("fetch_channel")
+        if channel_id not in self.channels:
+            raise discord.NotFound(_FakeResponse(404), "Unknown Channel")
+        return self.channels[channel_id]
+
+    async def wait_until_ready(self) -> None:
+        return None
+
+
+class _FakeResponse:
+    """Minimal aiohttp response for building discord.HTTPException subclasses"""
+
+    def __init__(self, status: int):
+        self.status = status
+        self.reason = "Fake"
+
+
+class FakeInteractionResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction = interaction
+        self.responded = False
+        self.modal: Optional[discord.ui.Modal] = None
+
+    def is_done(self) -> bool:
+        return self.responded
+
+    async def _respond(self, kind: str) -> None:
+        # Discord only accepts one response per interaction
+        if self.responded:
+            raise RuntimeError(f"Interaction déjà répondue ({kind})")
+        self.responded = True
+        await self.interaction.client.http.call(f"interaction.{kind}")
+
+    async def send_message(self, content: Optional[str] = None, **kwargs) -> None:
+        await self._respond("send_message")
+
+    async def edit_message(self, **kwargs) -> None:
+        await self._respond("edit_message")
+        if self.interaction.message is not None:
+            if "content" in kwargs:
+                self.interaction.message.content = kwargs["content"]
+            if "view" in kwargs:
+                self.interaction.message.view = kwargs["view"]
+
+    async def send_modal(self, modal: discord.ui.Modal) -> None:
+        await self._respond("send_modal")
+        self.modal = modal
+
+    async def defer(self, **kwargs) -> None:
+        await self._respond("defer")
+
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction = interaction
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> FakeMessage:
+        await self.interaction.client.http.call("followup.send")
+        return FakeMessage(self.interaction.client.http, self.interaction.channel, content=content, **kwargs)
+
+
+class FakeInteraction:
+    """A component or modal interaction from `user`, optionally on `message`"""
+
+    def __init__(self, client: FakeClient, user: FakeUser, message: Optional[FakeMessage] = None,
+                 channel: Optional[FakeMessageable] = None):
+        self.id = next_id()
+        self.client = client
+        self.user = user
+        self.message = message
+        self.channel = channel or (message.channel if message is not None else user)
+        self.channel_id = self.channel.id
+        self.guild = getattr(self.channel, "guild", None)
+        self.guild_id = self.guild.id if self.guild is not None else None
+        self.command = None
+        self.extras: Dict = {}
+        self.response = FakeInteractionResponse(self)
+        self.followup = FakeFollowup(self)
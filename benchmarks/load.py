@@ -0,0 +1,253 @@
+"""
+End-to-end load generator: drives concurrent lobbies through the real views
+
+Each lobby goes through join → start → votes → bans → selection → results
+using the actual buttons, select menus and modals, against the fake Discord
+layer of `benchmarks/fake_discord.py` (discord.py must be installed).
+
+Usage (from the repository root):
+    python -m benchmarks.load --lobbies 50 --players 8
+    python -m benchmarks.load --lobbies 200 --latency 80 --rate-limit 0.05
+
+The game store is created in a temporary directory, never in data/.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_discord import FakeClient, FakeHTTP, FakeInteraction, FakeMessage, FakeUser
+from core.configs import CIV_EMOJI_CONFIG, GAME_OPTIONS
+from core.game_manager import GameManager
+from core.metrics import metrics
+from utils.civilization import emoji_to_civ, parse_emoji_from_text
+from views.ban_views import BanButton
+from views.game_views import GameJoinButton
+from views.selection_views import SelectionButton
+from views.voting_views import VOTE_CATEGORIES, VOTE_PAGES, VoteButton, VoteSelect, encode_ballot
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class LoadTest:
+    def __init__(self, client: FakeClient, players: int, max_bans: int, pool_size: int, timeout: float, seed: int):
+        self.client = client
+        self.manager = client.game_manager
+        self.players = players
+        self.max_bans = max_bans
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        # component -> interaction latencies (seconds)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.completed = 0
+        self.failed: List[str] = []
+        # Every civilization is typed by its emoji: the ones the parser doesn't read back fail the run
+        self.civs = sorted(CIV_EMOJI_CONFIG)
+        self.unreadable_civs = [
+            civ for civ, emoji in CIV_EMOJI_CONFIG.items()
+            if list(map(emoji_to_civ, parse_emoji_from_text(emoji))) != [[civ]]
+        ]
+
+    async def click(self, component: str, item, user: FakeUser, message=None) -> FakeInteraction:
+        """Run a component (or modal) callback as `user` would trigger it, timing it"""
+        interaction = FakeInteraction(self.client, user, message=message or FakeMessage(self.client.http, user))
+        started = time.perf_counter()
+        if hasattr(item, "on_submit"):
+            await item.on_submit(interaction)
+        else:
+            await item.callback(interaction)
+        self.latencies[component].append(time.perf_counter() - started)
+        return interaction
+
+    async def wait_for(self, game_id: str, marker: str) -> None:
+        deadline = time.monotonic() + self.timeout
+        while not self.manager.get_game(game_id).get(marker):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{marker} non atteint après {self.timeout:.0f}s")
+            await asyncio.sleep(0.05)
+
+    async def run_lobby(self, index: int) -> None:
+        users = [FakeUser(self.client.http) for _ in range(self.players)]
+        for user in users:
+            self.client.add_user(user)
+        creator = users[0]
+
+        # /create
+        game = self.manager.create_game(creator.id, self.max_bans, self.pool_size, None, self.client.guild.id)
+        game_id = game["id"]
+        lobby_message = await self.client.channel.send(f"Partie {game_id}")
+        thread = await self.client.channel.create_thread(name=f"Partie {game_id}")
+        self.manager.record(game, "thread_created", thread_id=thread.id)
+        await self.manager.progress.publish(self.client, game, thread)
+        self.manager.save(game)
+
+        # Join and start
+        for user in users:
+            await self.click("join", GameJoinButton("join", game_id), user, lobby_message)
+        await self.click("start", GameJoinButton("start", game_id), creator, lobby_message)
+
+        async def vote(user):
+            ballot = {}
+            for page, categories in enumerate(VOTE_PAGES):
+                for category in categories:
+                    select = VoteSelect(game_id, user.id, VOTE_CATEGORIES.index(category), encode_ballot(ballot))
+                    option = self.rng.choice(GAME_OPTIONS[category])
+                    select.item._values = [option]
+                    await self.click("vote_select", select, user)
+                    ballot[category] = option
+                action = "next" if page < len(VOTE_PAGES) - 1 else "submit"
+                target = page + 1 if action == "next" else page
+                await self.click(f"vote_{action}", VoteButton(action, game_id, user.id, target, encode_ballot(ballot)), user)
+
+        await asyncio.gather(*(vote(user) for user in users))
+        await self.wait_for(game_id, "ban_phase_announced")
+
+        async def ban(user):
+            interaction = await self.click("ban_enter", BanButton("enter", game_id, user.id), user)
+            modal = interaction.response.modal
+            civs = self.rng.sample(self.civs, self.max_bans)
+            modal.ban_input._value = " ".join(CIV_EMOJI_CONFIG[civ] for civ in civs)
+            await self.click("ban_modal", modal, user)
+            await self.click("ban_confirm", BanButton("confirm", game_id, user.id), user)
+
+        await asyncio.gather(*(ban(user) for user in users))
+        await self.wait_for(game_id, "selection_phase_announced")
+
+        async def select(user):
+            interaction = await self.click("selection_select", SelectionButton("select", game_id, user.id), user)
+            modal = interaction.response.modal
+            pool = self.manager.get_game(game_id)["civ_pools"][str(user.id)]
+            modal.civ_input._value = CIV_EMOJI_CONFIG[self.rng.choice(pool)]
+            await self.click("selection_modal", modal, user)
+            await self.click("selection_confirm", SelectionButton("confirm", game_id, user.id), user)
+
+        await asyncio.gather(*(select(user) for user in users))
+        await self.wait_for(game_id, "results_posted")
+
+    async def run(self, lobbies: int) -> float:
+        async def guarded(index):
+            try:
+                await self.run_lobby(index)
+                self.completed += 1
+            except Exception as e:
+                self.failed.append(f"lobby {index}: {type(e).__name__}: {e}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(guarded(i) for i in range(lobbies)))
+        return time.perf_counter() - started
+
+
+def storage_writes() -> Dict[str, float]:
+    """Storage writes so far, by file"""
+    return {
+        dict(labels).get("file", "?"): count
+        for labels, count in metrics.counters.get("storage_writes_total", {}).items()
+    }
+
+
+def write_budget(players: int) -> int:
+    """
+    Storage writes a lobby should need: one per player action that must
+    survive a restart (join, ballot, bans, pick), plus creation, thread and
+    progress board, start, the phase transitions, the analytics update and
+    the lease of the lobby
+    """
+    return 4 * players + 10
+
+
+async def main_async(args) -> int:
+    http = FakeHTTP(
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        rate_limit=args.rate_limit,
+        seed=args.seed
+    )
+    client = FakeClient(http, cache_users=args.cache_users)
+    client.game_manager = GameManager()
+    test = LoadTest(client, args.players, args.max_bans, args.pool_size, args.timeout, args.seed)
+
+    writes_before = storage_writes()
+    # The bot logs every DM it sends: keep the report readable
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output if not args.verbose else sys.stdout):
+        elapsed = await test.run(args.lobbies)
+    writes_after = storage_writes()
+    writes = {file: count - writes_before.get(file, 0) for file, count in writes_after.items()}
+    writes_per_lobby = sum(writes.values()) / max(args.lobbies, 1)
+    budget = write_budget(args.players)
+
+    interactions = [latency for latencies in test.latencies.values() for latency in latencies]
+    print(f"## Charge: {args.lobbies} parties de {args.players} joueurs "
+          f"(latence {args.latency:.0f}±{args.jitter:.0f} ms, 429: {args.rate_limit:.0%})")
+    print(f"Parties terminées: {test.completed}/{args.lobbies} en {elapsed:.1f}s "
+          f"→ {test.completed / elapsed * 60:.1f} parties/minute")
+    print(f"Interactions: {len(interactions)}, p50 {percentile(interactions, 0.5) * 1000:.1f} ms, "
+          f"p99 {percentile(interactions, 0.99) * 1000:.1f} ms")
+    for component, latencies in sorted(test.latencies.items()):
+        print(f"  • {component:<18} n={len(latencies):<6} p50 {percentile(latencies, 0.5) * 1000:7.1f} ms"
+              f"  p99 {percentile(latencies, 0.99) * 1000:7.1f} ms")
+    print(f"Écritures du stockage: {writes_per_lobby:.1f} par partie (budget {budget})"
+          + ("  ⚠️ au-delà du budget" if writes_per_lobby > budget else ""))
+    for file, count in sorted(writes.items(), key=lambda item: -item[1]):
+        if count:
+            print(f"  • {file:<26} {count / max(args.lobbies, 1):.1f}")
+    print(f"Appels API simulés: {sum(http.calls.values())} ({http.rate_limited} réponses 429)")
+    for kind, count in http.calls.most_common():
+        print(f"  • {kind:<26} {count}")
+    scheduler = client.game_manager.messages.stats()
+    print(f"Planificateur d'envoi: {scheduler['sent']} envois, {scheduler['coalesced']} fusionnés, "
+          f"attente p95 {scheduler['wait_p95'] * 1000:.0f} ms")
+
+    status = 0
+    if test.failed:
+        print(f"\n❌ {len(test.failed)} partie(s) en échec:")
+        for failure in test.failed[:10]:
+            print(f"  • {failure}")
+        status = 1
+    if test.unreadable_civs:
+        print(f"\n❌ Emojis mal lus par le parseur: {', '.join(test.unreadable_civs)}")
+        status = 1
+    if writes_per_lobby > budget:
+        print(f"\n❌ {writes_per_lobby:.1f} écritures du stockage par partie, budget {budget}")
+        status = 1
+    return status
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Drive concurrent lobbies against a fake Discord")
+    parser.add_argument("--lobbies", type=int, default=20, help="number of concurrent lobbies")
+    parser.add_argument("--players", type=int, default=8, help="players per lobby")
+    parser.add_argument("--max-bans", type=int, default=2)
+    parser.add_argument("--pool-size", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=50, help="simulated API latency (ms)")
+    parser.add_argument("--jitter", type=float, default=20, help="latency jitter (ms)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="probability of a 429 on sends")
+    parser.add_argument("--cache-users", action="store_true", help="users found in the gateway cache")
+    parser.add_argument("--timeout", type=float, default=120, help="max wait per phase transition (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="show the bot's logs")
+    args = parser.parse_args(argv)
+
+    # Game store, leases and caches of this run live in a temporary directory
+    with tempfile.TemporaryDirectory(prefix="civload-") as directory:
+        os.chdir(directory)
+        return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,387 @@
+"""
+Benchmark suite for storage, event log, voting, civilization utilities and rendering
+
+Usage (from the repository root):
+    python -m benchmarks.run                 # run everything and print timings
+    python -m benchmarks.run --quick         # smaller stores, fewer repeats
+    python -m benchmarks.run -k storage      # only benchmarks whose name contains "storage"
+    python -m benchmarks.run --save          # record timings as the new baseline
+    python -m benchmarks.run --compare       # compare with the baseline, exit 1 on regression
+
+Timings are the best per-operation time over several repeats, which is the
+least noisy estimate on a shared machine. Only compare baselines recorded on
+the same machine.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.configs import CIV_EMOJI_CONFIG, GAME_OPTIONS, LEADERS
+from core.events import EventLog, apply_event, recover
+from core.game_manager import GameManager
+from core.matchmaking import MatchQueue, find_group
+from core.player_index import PlayerIndex
+from core.storage import Storage
+from models.game import Game
+from utils.civ_search import civ_index
+from utils.civilization import assign_civ_pools, emojis_to_civs, get_available_civs, parse_emoji_from_text
+from utils.rendering import civ_list_embed_chunks, pack_embed_chunks, render_ban_intro, render_final_results
+from utils.voting import calculate_weighted_results
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# name -> (setup, number of calls per repeat, repeats); setup returns (operation, teardown)
+BENCHMARKS: Dict[str, Tuple[Callable, int, int]] = {}
+
+
+def benchmark(name: str, number: int = 100, repeat: int = 5):
+    """Register a benchmark: the decorated setup function returns the operation to time"""
+    def decorator(setup):
+        BENCHMARKS[name] = (setup, number, repeat)
+        return setup
+    return decorator
+
+
+# --- Synthetic data ---
+
+def random_ballot(rng: random.Random) -> Dict[str, str]:
+    return {category: rng.choice(options) for category, options in GAME_OPTIONS.items()}
+
+
+def synthetic_game(rng: random.Random, players: int = 8) -> Dict:
+    """A finished game with votes, bans, pools and selections"""
+    game = Game(rng.randrange(10 ** 17, 10 ** 18), max_bans=2, guild_id=rng.randrange(10 ** 17, 10 ** 18))
+    game.players = [rng.randrange(10 ** 17, 10 ** 18) for _ in range(players)]
+    civs = rng.sample(LEADERS, players * 5)
+    for i, player_id in enumerate(game.players):
+        game.votes[str(player_id)] = random_ballot(rng)
+        game.bans[str(player_id)] = civs[i * 5:i * 5 + 2]
+        game.civ_pools[str(player_id)] = civs[i * 5 + 2:i * 5 + 5]
+        game.civ_selections[str(player_id)] = civs[i * 5 + 2]
+    game.voting_started = game.banning_started = game.selection_started = True
+    return game.to_dict()
+
+
+def populated_storage(size: int) -> Tuple[Storage, Callable[[], None]]:
+    """A storage file holding `size` synthetic games, and its cleanup function"""
+    rng = random.Random(size)
+    directory = tempfile.mkdtemp(prefix="civbench-")
+    path = os.path.join(directory, "games.json")
+    storage = Storage(path)
+    for _ in range(size):
+        storage.add(synthetic_game(rng), save=False)
+    storage.save()
+    return storage, lambda: shutil.rmtree(directory, ignore_errors=True)
+
+
+# --- Storage ---
+
+def register_storage_benchmarks(sizes: List[int]) -> None:
+    for size in sizes:
+        label = f"{size // 1000}k"
+
+        @benchmark(f"storage.get_by_id[{label}]", number=200)
+        def get_by_id(size=size):
+            storage, cleanup = populated_storage(size)
+            ids = [game["id"] for game in storage.data]
+            rng = random.Random(0)
+            return lambda: storage.get_by_id(rng.choice(ids)), cleanup
+
+        @benchmark(f"storage.update[{label}]", number=1, repeat=3)
+        def update(size=size):
+            storage, cleanup = populated_storage(size)
+            game_id = storage.data[size // 2]["id"]
+            counter = iter(range(10 ** 9))
+            return lambda: storage.update(game_id, {"max_bans": next(counter) % 10}), cleanup
+
+        @benchmark(f"storage.add[{label}]", number=1, repeat=3)
+        def add(size=size):
+            storage, cleanup = populated_storage(size)
+            rng = random.Random(1)
+            return lambda: storage.add(synthetic_game(rng)), cleanup
+
+
+# --- Event log ---
+
+def event_log_with_games(games: int, events_per_game: int = 20) -> Tuple[EventLog, Storage, Callable[[], None]]:
+    """An event log of `games` lobbies with their up-to-date snapshot"""
+    rng = random.Random(games)
+    directory = tempfile.mkdtemp(prefix="civbench-")
+    log = EventLog(os.path.join(directory, "events.jsonl"), os.path.join(directory, "checkpoint.json"))
+    storage = Storage(os.path.join(directory, "games.json"))
+    for _ in range(games):
+        game = Game(rng.randrange(10 ** 17, 10 ** 18)).to_dict()
+        apply_event({game["id"]: game}, log.append(game["id"], "game_created", {"game": game}))
+        for _ in range(events_per_game - 1):
+            player_id = rng.randrange(10 ** 17, 10 ** 18)
+            event = log.append(game["id"], "vote_submitted", {"player_id": player_id, "votes": random_ballot(rng)})
+            apply_event({game["id"]: game}, event)
+        storage.add(game, save=False)
+    storage.save()
+    return log, storage, lambda: shutil.rmtree(directory, ignore_errors=True)
+
+
+@benchmark("events.append", number=200)
+def events_append():
+    log, _, cleanup = event_log_with_games(1, 1)
+    rng = random.Random(4)
+    return lambda: log.append("bench", "vote_submitted", {"player_id": 1, "votes": random_ballot(rng)}), cleanup
+
+
+@benchmark("events.recover[500 games, full log]", number=1, repeat=3)
+def events_recover_full():
+    log, storage, cleanup = event_log_with_games(500)
+    return lambda: recover(storage, log), cleanup
+
+
+@benchmark("events.recover[500 games, checkpoint]", number=20, repeat=3)
+def events_recover_checkpoint():
+    log, storage, cleanup = event_log_with_games(500)
+    log.save_checkpoint(log.size())
+    return lambda: recover(storage, log), cleanup
+
+
+# --- Game manager ---
+
+@benchmark("manager.create_game", number=200)
+def manager_create_game():
+    # Goes through GameManager.record like /create, not through the log directly
+    directory = tempfile.mkdtemp(prefix="civbench-")
+    cwd = os.getcwd()
+    os.chdir(directory)
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = GameManager()
+    rng = random.Random(8)
+
+    def cleanup():
+        os.chdir(cwd)
+        shutil.rmtree(directory, ignore_errors=True)
+    return lambda: manager.create_game(rng.randrange(10 ** 17, 10 ** 18), guild_id=0), cleanup
+
+
+# --- Player index ---
+
+@benchmark("players.complete[50k games]", number=2000)
+def players_complete():
+    rng = random.Random(5)
+    index = PlayerIndex(EventLog(os.devnull))
+    index.build(Game(rng.randrange(1000), guild_id=0).to_dict() for _ in range(50000))
+    prefixes = ["", "a", "3f", "c0d"]
+    counter = iter(range(10 ** 9))
+    return lambda: index.complete(rng.randrange(1000), prefixes[next(counter) % 4]), None
+
+
+# --- Matchmaking ---
+
+def queued_player(rng: random.Random, user_id: int, buckets: int, max_gap: Optional[int]) -> Dict:
+    return {
+        "user_id": user_id,
+        "guild_id": rng.randrange(buckets),
+        "channel_id": 1,
+        "max_bans": 2,
+        "civ_pool_size": 6,
+        "rating": rng.uniform(1000, 2000),
+        "max_gap": max_gap,
+        "queued_at": time.time(),
+    }
+
+
+@benchmark("matchmaking.find_group[500 players, no match]", number=200)
+def matchmaking_find_group():
+    rng = random.Random(6)
+    entries = {user_id: queued_player(rng, user_id, 1, 0) for user_id in range(500)}
+    ordered = sorted((entry["rating"], entry["queued_at"], user_id) for user_id, entry in entries.items())
+    return lambda: find_group(ordered, entries, 4), None
+
+
+@benchmark("matchmaking.queue_and_match[500 queued]", number=50)
+def matchmaking_pass():
+    # Nobody accepts any rating gap, so the queue grows instead of draining
+    rng = random.Random(7)
+    directory = tempfile.mkdtemp(prefix="civbench-")
+    queue = MatchQueue(os.path.join(directory, "queue.json"))
+    queue.add(queued_player(rng, user_id, 5, 0) for user_id in range(500))
+    counter = iter(range(500, 10 ** 9))
+
+    def queue_and_match():
+        queue.add([queued_player(rng, next(counter), 5, 0)])
+        queue.match(4)
+    return queue_and_match, lambda: shutil.rmtree(directory, ignore_errors=True)
+
+
+# --- Voting ---
+
+for voters in (10, 1000, 10000):
+    @benchmark(f"voting.calculate_weighted_results[{voters} voters]", number=max(1, 10000 // voters))
+    def weighted_results(voters=voters):
+        rng = random.Random(voters)
+        votes = {str(i): random_ballot(rng) for i in range(voters)}
+        return lambda: calculate_weighted_results(votes, GAME_OPTIONS), None
+
+
+# --- Civilization utilities ---
+
+@benchmark("civilization.assign_civ_pools[8x3]", number=2000)
+def pools_small():
+    available = get_available_civs(LEADERS[:10])
+    return lambda: assign_civ_pools(available, 8, 3), None
+
+
+@benchmark("civilization.assign_civ_pools[max players]", number=2000)
+def pools_large():
+    available = get_available_civs([])
+    return lambda: assign_civ_pools(available, len(available) // 2, 2), None
+
+
+@benchmark("civilization.parse_emoji_from_text[10 emojis]", number=2000)
+def parse_emojis():
+    text = " ".join(list(CIV_EMOJI_CONFIG.values())[:10])
+    return lambda: parse_emoji_from_text(text), None
+
+
+@benchmark("civilization.emojis_to_civs[10 emojis]", number=2000)
+def emojis_civs():
+    emojis = list(CIV_EMOJI_CONFIG.values())[:10]
+    return lambda: emojis_to_civs(emojis), None
+
+
+@benchmark("civ_search.search[2 words]", number=2000)
+def civ_search():
+    index = civ_index()
+    queries = ["cleo ptol", "perse nader", "lincon", "catherine noire"]
+    counter = iter(range(10 ** 9))
+    return lambda: index.search(queries[next(counter) % 4]), None
+
+
+# --- Rendering ---
+
+@benchmark("rendering.ban_intro", number=2000)
+def ban_intro():
+    game = synthetic_game(random.Random(2))
+    settings = calculate_weighted_results(game["votes"], GAME_OPTIONS)
+    return lambda: render_ban_intro(game["id"], game["max_bans"], settings), None
+
+
+@benchmark("rendering.civ_list_embeds (uncached)", number=200)
+def civ_list():
+    # Bypass the lru_cache to measure the actual rendering
+    return lambda: pack_embed_chunks(list(civ_list_embed_chunks.__wrapped__())), None
+
+
+@benchmark("rendering.final_results[8 players]", number=2000)
+def final_results():
+    game = synthetic_game(random.Random(3))
+    settings = calculate_weighted_results(game["votes"], GAME_OPTIONS)
+    names = {player_id: f"Joueur {player_id}" for player_id in game["civ_selections"]}
+    return lambda: render_final_results(game["id"], settings, game["civ_selections"], game["bans"], names), None
+
+
+# --- Runner ---
+
+def run_benchmark(name: str, quick: bool) -> float:
+    """Best time per operation, in seconds"""
+    setup, number, repeat = BENCHMARKS[name]
+    if quick:
+        number = max(1, number // 10)
+        repeat = min(repeat, 3)
+
+    operation, teardown = setup()
+    try:
+        operation()  # Warm-up
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(number):
+                operation()
+            best = min(best, (time.perf_counter() - started) / number)
+        return best
+    finally:
+        if teardown is not None:
+            teardown()
+
+
+def format_time(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} µs"
+
+
+def load_baseline() -> Optional[Dict]:
+    try:
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("-k", dest="filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="10k games only, fewer iterations")
+    parser.add_argument("--sizes", default="10000,100000", help="storage sizes (number of games)")
+    parser.add_argument("--save", action="store_true", help="save the results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="compare with the baseline")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio flagged as a regression (default: 1.25)")
+    args = parser.parse_args(argv)
+
+    sizes = [10000] if args.quick else [int(size) for size in args.sizes.split(",")]
+    register_storage_benchmarks(sizes)
+
+    baseline = load_baseline() if args.compare else None
+    if args.compare and baseline is None:
+        print(f"❌ Aucune baseline trouvée ({BASELINE_PATH}), lance d'abord --save")
+        return 2
+    reference = (baseline or {}).get("results", {})
+
+    results = {}
+    regressions = []
+    names = [name for name in BENCHMARKS if args.filter in name]
+    width = max(len(name) for name in names) if names else 0
+    for name in names:
+        seconds = run_benchmark(name, args.quick)
+        results[name] = seconds
+        line = f"{name:<{width}}  {format_time(seconds):>10}"
+        if name in reference:
+            ratio = seconds / reference[name]
+            line += f"  x{ratio:.2f}"
+            if ratio > args.threshold:
+                line += "  ⚠️ régression"
+                regressions.append(name)
+        print(line, flush=True)
+
+    if args.save:
+        baseline = load_baseline() or {}
+        baseline["machine"] = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+        }
+        baseline.setdefault("results", {}).update(results)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"💾 Baseline enregistrée dans {BASELINE_PATH}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} régression(s) au-delà de x{args.threshold}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
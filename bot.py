@@ -2,28 +2,90 @@ import discord
 from discord.ext import commands
 import os
 import asyncio
+from core.metrics import count_api_calls, dump_periodically, serve as serve_metrics
+from core.startup import StartupTimer, client_options, shard_options, sync_if_changed
+from core.watchdog import LoopWatchdog
+
+startup = StartupTimer()
 
 TOKEN = os.getenv("DISCORD_TOKEN")
+# Test server for instant command sync (unset DISCORD_GUILD_ID="" to sync globally)
+GUILD_ID = os.getenv("DISCORD_GUILD_ID", "1435336552237498530")
+# Set FORCE_SYNC=1 to sync commands even if the tree didn't change
+FORCE_SYNC = os.getenv("FORCE_SYNC") == "1"
+# Sharding: SHARD_COUNT=<n>|auto runs an AutoShardedBot, SHARD_IDS=0-3 (or 0,2)
+# restricts this process to a range of shards so ranges can run in separate processes
+# (it needs a numeric SHARD_COUNT); invalid combinations stop the bot at startup
+SHARD_OPTIONS = shard_options(os.getenv("SHARD_COUNT"), os.getenv("SHARD_IDS"))
+BotBase = commands.AutoShardedBot if SHARD_OPTIONS is not None else commands.Bot
+# Gateway intents and caches: "default" or "lean" (minimal intents, no member/message cache)
+BOT_PROFILE = os.getenv("BOT_PROFILE", "default")
+# Prometheus metrics: served on http://127.0.0.1:<METRICS_PORT>/metrics and/or written to METRICS_FILE
+METRICS_PORT = os.getenv("METRICS_PORT")
+METRICS_FILE = os.getenv("METRICS_FILE")
+# Event loop blocked for longer than this (seconds) logs the blocking call's stack
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.5"))
+
+
+class LobbyBot(BotBase):
+    watchdog = LoopWatchdog(threshold=LOOP_LAG_THRESHOLD)
+
+    async def setup_hook(self):
+        self.watchdog.start()
+        count_api_calls(self)
+        await load_cogs()
+        startup.mark("chargement des cogs")
+        if METRICS_PORT:
+            await serve_metrics(int(METRICS_PORT))
+        if METRICS_FILE:
+            self.loop.create_task(dump_periodically(METRICS_FILE))
 
-intents = discord.Intents.default()
-bot = commands.Bot(command_prefix="!", intents=intents)
+    async def close(self):
+        # Hand our lobbies over to the other processes right away (rolling restarts)
+        manager = getattr(self, "game_manager", None)
+        if manager is not None:
+            manager.leases.release()
+            manager.events.sync()
+        self.watchdog.stop()
+        await super().close()
+
+
+options = client_options(BOT_PROFILE)
+bot = LobbyBot(command_prefix="!", **(SHARD_OPTIONS or {}), **options)
+bot.startup_ready = False
 
 async def load_cogs():
-    for filename in os.listdir("./cogs"):
+    for filename in sorted(os.listdir("./cogs")):
         if filename.endswith(".py"):
             await bot.load_extension(f"cogs.{filename[:-3]}")
 
 @bot.event
 async def on_ready():
-    # For testing - instant sync to your server
-    guild = discord.Object(id=1435336552237498530)  # Replace with your server ID
-    bot.tree.copy_global_to(guild=guild)
-    await bot.tree.sync(guild=guild)
-    
-    print(f"✅ Connecté comme {bot.user} et commandes synchronisées sur le serveur de test.")
+    # on_ready fires again after every reconnect: only do the startup work once
+    if bot.startup_ready:
+        print(f"🔄 Reconnecté comme {bot.user}")
+        return
+    bot.startup_ready = True
+    startup.mark("connexion à Discord")
+
+    guild = discord.Object(id=int(GUILD_ID)) if GUILD_ID else None
+    if guild is not None:
+        bot.tree.copy_global_to(guild=guild)
+    try:
+        synced = await sync_if_changed(bot.tree, guild, force=FORCE_SYNC)
+    except discord.HTTPException as e:
+        synced = False
+        print(f"❌ Erreur lors de la synchronisation des commandes: {e}")
+    startup.mark("synchronisation des commandes" if synced else "commandes inchangées (pas de synchronisation)")
+
+    print(f"✅ Connecté comme {bot.user} (profil {BOT_PROFILE})")
+    if SHARD_OPTIONS is not None:
+        print(f"🧩 Shards {', '.join(map(str, sorted(bot.shards)))} sur {bot.shard_count}")
+    print(startup.report())
 
 async def main():
-    await load_cogs()
-    await bot.start(TOKEN)
+    startup.mark("imports")
+    async with bot:
+        await bot.start(TOKEN)
 
-asyncio.run(main())
\ No newline at end of file
+asyncio.run(main())
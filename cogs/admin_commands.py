@@ -0,0 +1,88 @@
+"""
+Discord slash commands for bot operations
+"""
+import io
+from collections import Counter
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from core.diagnostics import Diagnostics
+
+
+class AdminCommands(commands.Cog):
+    """Bot operations commands"""
+
+    debug = app_commands.Group(
+        name="debug",
+        description="Diagnostics du bot (administrateurs)",
+        guild_only=True,
+        default_permissions=discord.Permissions(administrator=True)
+    )
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.diagnostics = Diagnostics()
+
+    async def _check_admin(self, interaction: discord.Interaction) -> bool:
+        # default_permissions can be overridden per server: check again
+        permissions = getattr(interaction.user, "guild_permissions", None)
+        if (permissions and permissions.administrator) or await self.bot.is_owner(interaction.user):
+            return True
+        await interaction.response.send_message("❌ Commande réservée aux administrateurs.", ephemeral=True)
+        return False
+
+    @debug.command(name="profile", description="Profiler la boucle d'événements pendant quelques secondes")
+    @app_commands.describe(seconds="Durée du profil (1-60 secondes)")
+    async def debug_profile(self, interaction: discord.Interaction, seconds: app_commands.Range[int, 1, 60] = 10):
+        """Profile the running event loop and send the report as a file"""
+        if not await self._check_admin(interaction):
+            return
+        if self.diagnostics.profiling:
+            await interaction.response.send_message("❌ Un profil est déjà en cours.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        report = await self.diagnostics.profile(seconds)
+        await interaction.followup.send(
+            f"📈 Profil de {seconds}s terminé.",
+            file=discord.File(io.BytesIO(report.encode("utf-8")), filename="profile.txt"),
+            ephemeral=True
+        )
+
+    @debug.command(name="memory", description="Voir l'utilisation mémoire du bot et des parties")
+    async def debug_memory(self, interaction: discord.Interaction):
+        """Send a tracemalloc snapshot and per-game memory report as a file"""
+        if not await self._check_admin(interaction):
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        report = await self.diagnostics.memory(self.bot.game_manager)
+        await interaction.followup.send(
+            "🧠 Rapport mémoire :",
+            file=discord.File(io.BytesIO(report.encode("utf-8")), filename="memory.txt"),
+            ephemeral=True
+        )
+
+    @app_commands.command(name="latency", description="Voir la latence de chaque shard du bot")
+    async def latency(self, interaction: discord.Interaction):
+        """Show the gateway latency of every shard served by this process"""
+        guilds = Counter(guild.shard_id for guild in self.bot.guilds)
+
+        shards = getattr(self.bot, "shards", None)
+        if shards:
+            latencies = sorted((shard_id, shard.latency) for shard_id, shard in shards.items())
+        else:
+            latencies = [(self.bot.shard_id or 0, self.bot.latency)]
+
+        msg = f"## 📡 Latence ({self.bot.shard_count or 1} shard(s) au total)\n"
+        for shard_id, latency in latencies:
+            current = " ← ce serveur" if interaction.guild and interaction.guild.shard_id == shard_id else ""
+            msg += f"• Shard {shard_id}: **{latency * 1000:.0f} ms**, {guilds.get(shard_id, 0)} serveur(s){current}\n"
+
+        await interaction.response.send_message(msg, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(AdminCommands(bot))
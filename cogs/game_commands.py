@@ -1,12 +1,27 @@
 """
 Discord slash commands for game management
 """
+import time
+from typing import Optional
 import discord
 from discord import app_commands
 from discord.ext import commands
 from core.game_manager import GameManager
-from core.configs import CIV_EMOJI_CONFIG, GAME_OPTIONS
+from core.messaging import PRIORITY_INTERACTION
+from core.metrics import metrics
+from core.analytics import ALL, setting_winners, top_bans, top_picks
+from core.ratings import parse_placements
+from core.configs import CIV_EMOJI_CONFIG, GAME_OPTIONS, LEADERS_TO_LINK, MATCH_LOBBY_SIZE
 from utils.voting import format_vote_details
+from utils.civ_search import civ_index
+from utils.rendering import (
+    civ_page_count, render_civ_page, render_leaderboard, render_player_games, render_player_stats, render_progress,
+    render_rating_changes, render_stats
+)
+from views.game_views import GameJoinButton
+from views.voting_views import VoteButton, VoteSelect
+from views.ban_views import BanButton
+from views.selection_views import SelectionButton
 
 
 class GameCommands(commands.Cog):
@@ -15,6 +30,61 @@ class GameCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.manager = GameManager()
+        # Persistent components reach the manager through the client
+        bot.game_manager = self.manager
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # Runs before every app command of the cog: start its latency timer
+        interaction.extras["started"] = time.perf_counter()
+        return True
+
+    def _observe_command(self, interaction: discord.Interaction, status: str):
+        started = interaction.extras.get("started")
+        if started is not None and interaction.command is not None:
+            metrics.observe(
+                "command_seconds", time.perf_counter() - started,
+                command=interaction.command.name, status=status
+            )
+
+    @commands.Cog.listener()
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        self._observe_command(interaction, "ok")
+
+    async def cog_app_command_error(self, interaction: discord.Interaction, error):
+        self._observe_command(interaction, "error")
+
+    async def game_id_autocomplete(self, interaction: discord.Interaction, current: str):
+        """Lobbies in progress of the user whose id starts with what was typed"""
+        players = self.manager.players
+        return [
+            app_commands.Choice(
+                name=f"{game_id} — {players.games[game_id]['phase']}, {len(players.games[game_id]['players'])} joueur(s)",
+                value=game_id
+            )
+            for game_id in players.complete(interaction.user.id, current.strip().lower())
+        ]
+
+    async def civ_autocomplete(self, interaction: discord.Interaction, current: str):
+        """Civilizations whose leader or civilization name matches what was typed"""
+        return [
+            app_commands.Choice(name=f"{CIV_EMOJI_CONFIG.get(civ, '')} {civ}".strip(), value=civ)
+            for civ, _ in civ_index().search(current)
+        ]
+
+    async def period_autocomplete(self, interaction: discord.Interaction, current: str):
+        """Months that have statistics, most recent first"""
+        periods = [period for period in self.manager.analytics.periods() if period != ALL]
+        return [
+            app_commands.Choice(name=period, value=period)
+            for period in reversed(periods)
+            if period.startswith(current.strip())
+        ][:25]
+
+    async def cog_load(self):
+        # Phase deadlines persisted with the games are rescheduled on startup
+        self.manager.start_deadlines(self.bot)
+        self.manager.start_leases(self.bot)
+        self.manager.start_matchmaking(self.bot)
 
     @app_commands.command(name="create", description="Créer une partie Civilization VI")
     @app_commands.describe(
@@ -36,7 +106,7 @@ class GameCommands(commands.Cog):
             return
         
         # Create game first
-        game = self.manager.create_game(interaction.user.id, max_bans, civ_pool_size, None)
+        game = self.manager.create_game(interaction.user.id, max_bans, civ_pool_size, None, interaction.guild_id)
         
         # Create initial message with view
         view = self.manager.create_join_view(game["id"])
@@ -61,9 +131,8 @@ class GameCommands(commands.Cog):
                 auto_archive_duration=1440
             )
             
-            # Update game with thread_id
-            game["thread_id"] = thread.id
-            self.manager.save()
+            # Update game with thread_id (saved with the progress board below)
+            self.manager.record(game, "thread_created", thread_id=thread.id)
             
             # Edit message to include thread
             await initial_msg.edit(
@@ -79,7 +148,8 @@ class GameCommands(commands.Cog):
             )
             
             # Welcome message in thread
-            await thread.send(
+            await self.manager.messages.send(
+                thread,
                 f"🎉 Bienvenue dans la partie {game['id']} !\n\n"
                 f"Créateur: {interaction.user.mention}\n"
                 f"**Bans par joueur**: {max_bans}\n"
@@ -87,10 +157,63 @@ class GameCommands(commands.Cog):
                 f"Les joueurs peuvent rejoindre en cliquant sur le bouton dans le message ci-dessus."
             )
             
+            # Live progress board, edited in place as the lobby advances
+            await self.manager.progress.publish(self.bot, game, thread)
+            
         except Exception as e:
             print(f"⚠️ Erreur lors de la création du thread: {e}")
+        if game.get("thread_id"):
+            self.manager.save(game)
+
+    @app_commands.command(name="queue", description="Rejoindre la file de matchmaking")
+    @app_commands.describe(
+        max_bans="Nombre maximum de civilisations à bannir (0 à 10)",
+        civ_pool_size="Taille du pool de civilisations disponibles",
+        max_gap="Écart d'Elo maximum avec les autres joueurs (aucune limite par défaut)"
+    )
+    async def queue(
+        self,
+        interaction: discord.Interaction,
+        max_bans: app_commands.Range[int, 0, 10] = 2,
+        civ_pool_size: app_commands.Range[int, 1, 10] = 6,
+        max_gap: Optional[app_commands.Range[int, 0]] = None
+    ):
+        """Queue for a lobby formed automatically with compatible players"""
+        if interaction.guild_id is None:
+            await interaction.response.send_message("❌ Le matchmaking se fait sur un serveur.", ephemeral=True)
+            return
+        
+        entry = {
+            "user_id": interaction.user.id,
+            "guild_id": interaction.guild_id,
+            "channel_id": interaction.channel_id,
+            "max_bans": max_bans,
+            "civ_pool_size": civ_pool_size,
+            "rating": self.manager.ratings.rating(interaction.user.id),
+            "max_gap": max_gap,
+            "queued_at": time.time(),
+        }
+        self.manager.enqueue(entry)
+        self.manager.users.remember(interaction.user)
+        
+        gap = f"±{max_gap} Elo" if max_gap is not None else "aucune limite d'Elo"
+        await interaction.response.send_message(
+            f"⏳ Tu es dans la file ({max_bans} ban(s), {civ_pool_size} civilisations proposées, {gap}).\n"
+            f"{self.manager.queue.waiting(entry)} joueur(s) attendent avec ces réglages ; "
+            f"la partie se lance ici à {MATCH_LOBBY_SIZE} joueurs compatibles. `/leave_queue` pour quitter la file.",
+            ephemeral=True
+        )
+
+    @app_commands.command(name="leave_queue", description="Quitter la file de matchmaking")
+    async def leave_queue(self, interaction: discord.Interaction):
+        """Leave the matchmaking queue"""
+        if self.manager.queue.leave(interaction.user.id) is None:
+            await interaction.response.send_message("❌ Tu n'es pas dans la file.", ephemeral=True)
+            return
+        await interaction.response.send_message("👋 Tu as quitté la file de matchmaking.", ephemeral=True)
 
     @app_commands.command(name="progress", description="Voir la progression des votes, bans et sélections")
+    @app_commands.autocomplete(game_id=game_id_autocomplete)
     async def progress(self, interaction: discord.Interaction, game_id: str):
         """Show game progress"""
         game = self.manager.get_game(game_id)
@@ -99,56 +222,145 @@ class GameCommands(commands.Cog):
             await interaction.response.send_message("❌ Partie introuvable !", ephemeral=True)
             return
         
-        msg = f"## 📊 Progression - Partie {game_id}\n\n"
-        
-        # Voting progress
-        if game.get("voting_started"):
-            msg += "### 🗳️ Votes\n"
-            completed = 0
-            for player_id in game["players"]:
-                user = await self.bot.fetch_user(player_id)
-                votes = game.get("votes", {}).get(str(player_id), {})
-                status = "✅" if len(votes) == len(GAME_OPTIONS) else "⏳"
-                msg += f"{status} **{user.name}**: {len(votes)}/{len(GAME_OPTIONS)} catégories\n"
-                if len(votes) == len(GAME_OPTIONS):
-                    completed += 1
-            msg += f"\n**Total**: {completed}/{len(game['players'])} joueurs\n\n"
-        
-        # Ban progress
-        if game.get("banning_started"):
-            msg += "### 🚫 Bans\n"
-            completed = 0
-            for player_id in game["players"]:
-                user = await self.bot.fetch_user(player_id)
-                bans = game.get("bans", {}).get(str(player_id), [])
-                status = "✅" if str(player_id) in game.get("bans", {}) else "⏳"
-                msg += f"{status} **{user.name}**: {len(bans)}/{game.get('max_bans', 2)} ban(s)\n"
-                if str(player_id) in game.get("bans", {}):
-                    completed += 1
-            msg += f"\n**Total**: {completed}/{len(game['players'])} joueurs\n\n"
-        
-        # Selection progress
-        if game.get("selection_started"):
-            msg += "### 🎯 Sélection des civilisations\n"
-            completed = 0
-            for player_id in game["players"]:
-                user = await self.bot.fetch_user(player_id)
-                civ = game.get("civ_selections", {}).get(str(player_id))
-                status = "✅" if civ else "⏳"
-                if civ:
-                    emoji = CIV_EMOJI_CONFIG.get(civ, "")
-                    msg += f"{status} **{user.name}**: {emoji} {civ}\n"
-                    completed += 1
-                else:
-                    msg += f"{status} **{user.name}**: En attente...\n"
-            msg += f"\n**Total**: {completed}/{len(game['players'])} joueurs\n"
+        # One cached lookup per player, shared by all sections
+        names = await self.manager.users.get_names(self.bot, game["players"])
+        msg = render_progress(game, names)
         
-        if not game.get("voting_started"):
-            msg += "Les votes n'ont pas encore commencé."
+        # Background phase transitions of this game
+        jobs = self.manager.jobs.jobs_for(game_id)
+        if jobs:
+            msg += "\n\n### ⚙️ Transitions\n" + "\n".join(job.describe() for job in jobs)
+        
+        board_id = game.get("progress_message_id")
+        if board_id and game.get("thread_id") and interaction.guild_id:
+            msg += f"\n\n📌 Suivi en direct: https://discord.com/channels/{interaction.guild_id}/{game['thread_id']}/{board_id}"
         
         await interaction.response.send_message(msg, ephemeral=True)
 
+    @app_commands.command(name="mygames", description="Voir mes parties en cours et terminées")
+    async def mygames(self, interaction: discord.Interaction):
+        """List the lobbies of the user from the player index"""
+        games = self.manager.players.games_of(interaction.user.id)
+        if not games["active"] and not games["finished"]:
+            await interaction.response.send_message("❌ Tu n'as rejoint aucune partie.", ephemeral=True)
+            return
+        
+        await interaction.response.send_message(
+            render_player_games(games, self.manager.players.games), ephemeral=True
+        )
+
+    @app_commands.command(name="mystats", description="Voir mes statistiques de parties")
+    async def mystats(self, interaction: discord.Interaction):
+        """Show the user's counters from the player index"""
+        stats = self.manager.players.player_stats(interaction.user.id)
+        if stats is None:
+            await interaction.response.send_message("❌ Tu n'as encore participé à aucune partie.", ephemeral=True)
+            return
+        
+        active = len(self.manager.players.active.get(interaction.user.id, {}))
+        await interaction.response.send_message(render_player_stats(stats, active), ephemeral=True)
+
+    @app_commands.command(name="stats", description="Voir les civilisations les plus bannies et choisies")
+    @app_commands.describe(
+        scope="Ce serveur ou tous les serveurs",
+        period="Mois (AAAA-MM), tout l'historique par défaut",
+        top="Nombre de civilisations par classement"
+    )
+    @app_commands.choices(scope=[
+        app_commands.Choice(name="Ce serveur", value="server"),
+        app_commands.Choice(name="Tous les serveurs", value="global"),
+    ])
+    @app_commands.autocomplete(period=period_autocomplete)
+    async def stats(
+        self,
+        interaction: discord.Interaction,
+        scope: str = "server",
+        period: str = ALL,
+        top: app_commands.Range[int, 3, 25] = 10
+    ):
+        """Show ban, pick and setting statistics from the precomputed counters"""
+        server = scope == "server" and interaction.guild_id is not None
+        counters = self.manager.analytics.counters(str(interaction.guild_id) if server else ALL, period)
+        if not counters:
+            await interaction.response.send_message("❌ Aucune partie terminée sur cette période.", ephemeral=True)
+            return
+        
+        title = ("ce serveur" if server else "tous les serveurs") + ("" if period == ALL else f", {period}")
+        await interaction.response.defer(ephemeral=True)
+        messages = render_stats(
+            title, counters["games"], top_bans(counters, top), top_picks(counters, top), setting_winners(counters)
+        )
+        await self.manager.messages.send_many(interaction.followup, messages, ephemeral=True, priority=PRIORITY_INTERACTION)
+
+    @app_commands.command(name="report", description="Déclarer le classement d'une partie terminée (Elo)")
+    @app_commands.describe(
+        game_id="Partie terminée",
+        placements="Joueurs du premier au dernier, « = » entre deux ex æquo : @a @b = @c @d"
+    )
+    async def report(self, interaction: discord.Interaction, game_id: str, placements: str):
+        """Record the placements of a finished game and update ratings"""
+        game = self.manager.get_game(game_id)
+        
+        if not game:
+            await interaction.response.send_message("❌ Partie introuvable !", ephemeral=True)
+            return
+        
+        if interaction.user.id != game["creator"]:
+            await interaction.response.send_message("❌ Seul le créateur peut déclarer le classement !", ephemeral=True)
+            return
+        
+        if not game.get("results_posted"):
+            await interaction.response.send_message("❌ La partie n'est pas encore terminée !", ephemeral=True)
+            return
+        
+        if game.get("placements"):
+            await interaction.response.send_message("❌ Le classement de cette partie a déjà été déclaré !", ephemeral=True)
+            return
+        
+        ranking, error = parse_placements(placements, game["players"])
+        if error:
+            await interaction.response.send_message(f"❌ {error}", ephemeral=True)
+            return
+        
+        changes = self.manager.report_placements(game, ranking)
+        names = await self.manager.users.get_names(self.bot, game["players"])
+        await interaction.response.send_message(render_rating_changes(game_id, ranking, changes, names))
+
+    @app_commands.command(name="leaderboard", description="Voir le classement Elo des joueurs")
+    async def leaderboard(self, interaction: discord.Interaction, page: app_commands.Range[int, 1] = 1):
+        """Show a page of the rating leaderboard"""
+        per_page = 10
+        pages = max(1, -(-len(self.manager.ratings) // per_page))
+        if page > pages:
+            await interaction.response.send_message(f"❌ Page invalide. Utilise 1-{pages}.", ephemeral=True)
+            return
+        
+        entries = self.manager.ratings.page((page - 1) * per_page, per_page)
+        if not entries:
+            await interaction.response.send_message("❌ Aucun joueur classé pour l'instant.", ephemeral=True)
+            return
+        
+        names = await self.manager.users.get_names(self.bot, [player_id for _, player_id, _ in entries])
+        await interaction.response.send_message(render_leaderboard(entries, names, page, pages), ephemeral=True)
+
+    @app_commands.command(name="rank", description="Voir le classement Elo d'un joueur")
+    async def rank(self, interaction: discord.Interaction, member: discord.User = None):
+        """Show the rating and rank of a player (the user by default)"""
+        member = member or interaction.user
+        rank = self.manager.ratings.rank(member.id)
+        if rank is None:
+            await interaction.response.send_message(f"❌ {member.name} n'a encore aucune partie classée.", ephemeral=True)
+            return
+        
+        position, total = rank
+        entry = self.manager.ratings.players[member.id]
+        await interaction.response.send_message(
+            f"🏆 **{member.name}**: {entry['rating']:.0f} Elo, **{position}e** sur {total} ({entry['games']} partie(s))",
+            ephemeral=True
+        )
+
     @app_commands.command(name="votes_details", description="Voir les détails complets des votes")
+    @app_commands.autocomplete(game_id=game_id_autocomplete)
     async def votes_details(self, interaction: discord.Interaction, game_id: str):
         """Show detailed voting results"""
         game = self.manager.get_game(game_id)
@@ -165,15 +377,18 @@ class GameCommands(commands.Cog):
         
         weighted_results = game.get("final_settings", {})
         
-        # Send details for each category
-        for category in GAME_OPTIONS.keys():
-            if category not in weighted_results:
-                continue
-            
-            msg = format_vote_details(category, weighted_results[category], len(game["votes"]))
-            await interaction.followup.send(msg, ephemeral=True)
+        # Send details for each category (merged into as few followups as possible)
+        messages = [
+            format_vote_details(category, weighted_results[category], len(game["votes"]))
+            for category in GAME_OPTIONS.keys()
+            if category in weighted_results
+        ]
+        await self.manager.messages.send_many(
+            interaction.followup, messages, ephemeral=True, priority=PRIORITY_INTERACTION
+        )
 
     @app_commands.command(name="results", description="Afficher les résultats des votes et bans")
+    @app_commands.autocomplete(game_id=game_id_autocomplete)
     async def results(self, interaction: discord.Interaction, game_id: str):
         """Display final results"""
         game = self.manager.get_game(game_id)
@@ -194,13 +409,14 @@ class GameCommands(commands.Cog):
         
         channel_id = game.get("thread_id") or interaction.channel_id
         try:
-            channel = await self.bot.fetch_channel(channel_id)
-            await self.manager._send_final_results(channel, game_id)
+            channel = await self.manager.get_channel(self.bot, channel_id)
+            await self.manager._send_final_results(self.bot, channel, game_id)
             await interaction.followup.send("✅ Les résultats ont été publiés dans le thread.")
         except Exception as e:
             await interaction.followup.send(f"❌ Erreur: {e}")
 
     @app_commands.command(name="delete", description="Supprimer une partie existante")
+    @app_commands.autocomplete(game_id=game_id_autocomplete)
     async def delete(self, interaction: discord.Interaction, game_id: str):
         """Delete a game"""
         game = self.manager.get_game(game_id)
@@ -219,43 +435,85 @@ class GameCommands(commands.Cog):
         thread_id = game.get("thread_id")
         if thread_id:
             try:
-                thread = await self.bot.fetch_channel(thread_id)
+                thread = await self.manager.get_channel(self.bot, thread_id)
                 
                 player_mentions = [f"<@{pid}>" for pid in game.get("players", [])]
                 
                 if player_mentions:
-                    await thread.send(
+                    await self.manager.messages.send(
+                        thread,
                         f"🗑️ **Cette partie a été supprimée par le créateur.**\n\n"
                         f"Joueurs concernés: {', '.join(player_mentions)}\n\n"
                         f"Ce thread va être archivé."
                     )
                 else:
-                    await thread.send(
-                        f"🗑️ **Cette partie a été supprimée par le créateur.**\n\n"
-                        f"Ce thread va être archivé."
+                    await self.manager.messages.send(
+                        thread,
+                        "🗑️ **Cette partie a été supprimée par le créateur.**\n\n"
+                        "Ce thread va être archivé."
                     )
                 
                 # Archive thread
                 await thread.edit(archived=True, locked=True)
+                self.manager.invalidate_channel(thread_id)
                 
             except Exception as e:
                 print(f"⚠️ Erreur lors de la fermeture du thread: {e}")
         
         # Delete game
+        if self.manager.deadlines is not None:
+            self.manager.deadlines.cancel(game_id)
+        self.manager.progress.forget(game_id)
+        self.manager.drafts.forget(game_id)
+        self.manager.record(game, "game_deleted")
         self.manager.storage.delete(game_id)
-        self.manager.save()
         
         await interaction.followup.send(
             f"🗑️ Partie {game_id} supprimée avec succès.",
             ephemeral=True
         )
 
+    @commands.Cog.listener()
+    async def on_thread_update(self, before: discord.Thread, after: discord.Thread):
+        """Drop cached thread handles once a thread gets archived"""
+        if after.archived or after.locked:
+            self.manager.invalidate_channel(after.id)
+
+    @commands.Cog.listener()
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent):
+        """Drop cached thread handles of deleted threads"""
+        self.manager.invalidate_channel(payload.thread_id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        """Drop cached handles of deleted channels"""
+        self.manager.invalidate_channel(channel.id)
+
+    @app_commands.command(name="civ", description="Trouver une civilisation par son nom ou celui de son dirigeant")
+    @app_commands.describe(name="Nom (même partiel, sans accents): « cleo ptol », « perse nader »...")
+    @app_commands.autocomplete(name=civ_autocomplete)
+    async def civ(self, interaction: discord.Interaction, name: str):
+        """Show the emoji and leader page of a civilization"""
+        civ, candidates = civ_index().resolve(name)
+        if civ is None:
+            if candidates:
+                msg = f"⚠️ « {name} » pourrait être:\n" + "".join(
+                    f"• {CIV_EMOJI_CONFIG.get(candidate, '')} {candidate}\n" for candidate in candidates
+                )
+            else:
+                msg = f"❌ Aucune civilisation ne correspond à « {name} »."
+            await interaction.response.send_message(msg, ephemeral=True)
+            return
+        
+        await interaction.response.send_message(
+            f"{CIV_EMOJI_CONFIG.get(civ, '')} **{civ}**\n{LEADERS_TO_LINK.get(civ, '')}",
+            ephemeral=True
+        )
+
     @app_commands.command(name="show_civs", description="Afficher toutes les civilisations avec leurs emojis")
     async def show_civs(self, interaction: discord.Interaction, page: int = 1):
         """Show civilizations list"""
-        civs_per_page = 25
-        total_civs = len(CIV_EMOJI_CONFIG)
-        total_pages = (total_civs + civs_per_page - 1) // civs_per_page
+        total_pages = civ_page_count()
         
         if page < 1 or page > total_pages:
             await interaction.response.send_message(
@@ -264,21 +522,10 @@ class GameCommands(commands.Cog):
             )
             return
         
-        start_idx = (page - 1) * civs_per_page
-        end_idx = min(start_idx + civs_per_page, total_civs)
-        
-        civs_list = list(CIV_EMOJI_CONFIG.items())
-        page_civs = civs_list[start_idx:end_idx]
-        
-        msg = f"## 🗺️ Civilisations (Page {page}/{total_pages})\n\n"
-        for civ, emoji in page_civs:
-            msg += f"{emoji} **{civ}**\n"
-        
-        if page < total_pages:
-            msg += f"\n*Utilise `/show_civs page:{page+1}` pour la suite*"
-        
-        await interaction.response.send_message(msg, ephemeral=True)
+        await interaction.response.send_message(render_civ_page(page), ephemeral=True)
 
 
 async def setup(bot):
+    # One handler per component type routes every lobby's interactions, even after a restart
+    bot.add_dynamic_items(GameJoinButton, VoteSelect, VoteButton, BanButton, SelectionButton)
     await bot.add_cog(GameCommands(bot))
@@ -0,0 +1,202 @@
+"""
+Ban, pick and setting statistics, aggregated as games finish
+"""
+import heapq
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from core.configs import GAME_OPTIONS, LEADERS
+from core.storage import file_lock, write_json_atomic
+
+
+ALL = "all"
+
+_CIV_INDEX = {civ: i for i, civ in enumerate(LEADERS)}
+_OPTION_INDEX = {
+    category: {option: i for i, option in enumerate(options)}
+    for category, options in GAME_OPTIONS.items()
+}
+
+
+def period_of(timestamp: float) -> str:
+    """Month of a timestamp: "2026-10" """
+    return time.strftime("%Y-%m", time.localtime(timestamp))
+
+
+def _empty_counters() -> Dict:
+    return {
+        "games": 0,
+        "bans": [0] * len(LEADERS),
+        "picks": [0] * len(LEADERS),
+        # Times a civilization was in a player's pool
+        "offered": [0] * len(LEADERS),
+        # Per category: games where the option was drawn, and where it had votes
+        "selected": {category: [0] * len(options) for category, options in GAME_OPTIONS.items()},
+        "voted": {category: [0] * len(options) for category, options in GAME_OPTIONS.items()},
+    }
+
+
+class AnalyticsStore:
+    """
+    Counters per civilization and per setting option, for each server and month
+
+    Counters are columns indexed like `LEADERS` and `GAME_OPTIONS`, stored for
+    every (scope, period) pair: a server id or "all", a month or "all". A
+    finished game adds to four of them; queries read one and never load games.
+    The ids of the counted games are kept so that a game is counted once.
+    """
+
+    def __init__(self, path: str = "data/analytics.json"):
+        self.path = path
+        self.scopes: Dict[str, Dict[str, Dict]] = {}
+        self.games: Set[str] = set()
+        self._signature: Optional[Tuple[int, int]] = None
+
+    def _disk_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def refresh(self) -> None:
+        """Reload the counters if another process updated them"""
+        signature = self._disk_signature()
+        if signature == self._signature:
+            return
+        self._signature = signature
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError, IOError):
+            self.scopes = {}
+            self.games = set()
+            return
+        self.scopes = self._remap(data["catalog"], data["scopes"])
+        self.games = set(data.get("games", ()))
+
+    @staticmethod
+    def _remap(catalog: Dict, scopes: Dict) -> Dict:
+        """Align stored columns with the current civilization and option lists"""
+        current = {"civs": LEADERS, "settings": GAME_OPTIONS}
+        if catalog == current:
+            return scopes
+
+        def column(values: List[int], old: List[str], new: List[str]) -> List[int]:
+            by_name = dict(zip(old, values))
+            return [by_name.get(name, 0) for name in new]
+
+        for periods in scopes.values():
+            for counters in periods.values():
+                for field in ("bans", "picks", "offered"):
+                    counters[field] = column(counters[field], catalog["civs"], LEADERS)
+                for field in ("selected", "voted"):
+                    counters[field] = {
+                        category: column(counters[field].get(category, []), catalog["settings"].get(category, []), options)
+                        for category, options in GAME_OPTIONS.items()
+                    }
+        return scopes
+
+    def _write(self) -> None:
+        write_json_atomic(self.path, {
+            "catalog": {"civs": LEADERS, "settings": GAME_OPTIONS},
+            "scopes": self.scopes,
+            "games": sorted(self.games)
+        })
+        self._signature = self._disk_signature()
+
+    def _add(self, game: Dict, finished_at: float) -> None:
+        scope = str(game["guild_id"]) if game.get("guild_id") else ALL
+        keys = {(ALL, ALL), (ALL, period_of(finished_at)), (scope, ALL), (scope, period_of(finished_at))}
+        for scope_key, period in keys:
+            counters = self.scopes.setdefault(scope_key, {}).setdefault(period, _empty_counters())
+            counters["games"] += 1
+            for bans in game.get("bans", {}).values():
+                for civ in set(bans):
+                    if civ in _CIV_INDEX:
+                        counters["bans"][_CIV_INDEX[civ]] += 1
+            for civ in game.get("civ_selections", {}).values():
+                if civ in _CIV_INDEX:
+                    counters["picks"][_CIV_INDEX[civ]] += 1
+            for pool in game.get("civ_pools", {}).values():
+                for civ in pool:
+                    if civ in _CIV_INDEX:
+                        counters["offered"][_CIV_INDEX[civ]] += 1
+            for category, result in game.get("final_settings", {}).items():
+                options = _OPTION_INDEX.get(category, {})
+                if result.get("selected") in options:
+                    counters["selected"][category][options[result["selected"]]] += 1
+                for option in result.get("votes", {}):
+                    if option in options:
+                        counters["voted"][category][options[option]] += 1
+
+    def record_game(self, game: Dict, finished_at: Optional[float] = None) -> bool:
+        """Add a finished game to the counters, False if it was already counted"""
+        with file_lock(self.path):
+            self._signature = None
+            self.refresh()
+            if game["id"] in self.games:
+                return False
+            self._add(game, finished_at or time.time())
+            self.games.add(game["id"])
+            self._write()
+        return True
+
+    def rebuild(self, games: Iterable[Dict]) -> int:
+        """Recompute every counter from the finished games (first start)"""
+        with file_lock(self.path):
+            self.scopes = {}
+            self.games = set()
+            count = 0
+            for game in games:
+                if game.get("results_posted"):
+                    self._add(game, game.get("finished_at") or time.time())
+                    self.games.add(game["id"])
+                    count += 1
+            self._write()
+        return count
+
+    def counters(self, scope: str = ALL, period: str = ALL) -> Optional[Dict]:
+        self.refresh()
+        return self.scopes.get(scope, {}).get(period)
+
+    def periods(self, scope: str = ALL) -> List[str]:
+        self.refresh()
+        return sorted(self.scopes.get(scope, {}))
+
+
+def top_bans(counters: Dict, n: int = 10) -> List[Tuple[str, int, float]]:
+    """Most banned civilizations: (civ, bans, share of games where it was banned)"""
+    games = max(counters["games"], 1)
+    best = heapq.nlargest(n, range(len(LEADERS)), key=lambda i: counters["bans"][i])
+    return [(LEADERS[i], counters["bans"][i], counters["bans"][i] / games) for i in best if counters["bans"][i]]
+
+
+def top_picks(counters: Dict, n: int = 10, min_offered: int = 3) -> List[Tuple[str, int, float]]:
+    """Civilizations most often picked when offered: (civ, picks, pick rate)"""
+    rated = [i for i in range(len(LEADERS)) if counters["offered"][i] >= min_offered]
+    best = heapq.nlargest(
+        n, rated, key=lambda i: (counters["picks"][i] / counters["offered"][i], counters["picks"][i])
+    )
+    return [(LEADERS[i], counters["picks"][i], counters["picks"][i] / counters["offered"][i]) for i in best]
+
+
+def setting_winners(counters: Dict) -> List[Tuple[str, str, int, float]]:
+    """
+    Most drawn option of each category: (category, option, games, win rate)
+
+    The win rate is how often the option was drawn when it had votes.
+    """
+    winners = []
+    for category, options in GAME_OPTIONS.items():
+        selected = counters["selected"][category]
+        if not any(selected):
+            continue
+        i = max(range(len(options)), key=lambda i: selected[i])
+        winners.append((category, options[i], selected[i], selected[i] / max(counters["voted"][category][i], 1)))
+    return winners
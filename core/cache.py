@@ -0,0 +1,120 @@
+"""
+Async lookup caches shared by the cog, the game manager and the views
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+
+class TTLCache:
+    """Async cache with per-entry TTL and in-flight request deduplication"""
+
+    def __init__(self, ttl: float, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a cached value if it has not expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value"""
+        self._entries.pop(key, None)
+        if len(self._entries) >= self.max_size:
+            # Dicts keep insertion order: drop the oldest entry
+            del self._entries[next(iter(self._entries))]
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Forget a cached value"""
+        self._entries.pop(key, None)
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Get a cached value, or fetch it once even if several callers ask concurrently"""
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The caller running the fetch was cancelled: fetch it ourselves
+                return await self.get_or_fetch(key, fetch)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            value = await fetch()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        except BaseException:
+            # Cancelled mid-fetch: release the callers waiting for this fetch
+            future.cancel()
+            raise
+        else:
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Cache size and hit/miss counters"""
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class UserCache:
+    """Cached user lookups: gateway cache first, then a TTL cache over REST"""
+
+    def __init__(self, ttl: float = 600):
+        self.users = TTLCache(ttl)
+
+    def remember(self, user) -> None:
+        """Cache a user received with an interaction, saving a later fetch"""
+        self.users.set(user.id, user)
+
+    async def get_user(self, bot, user_id: int):
+        """Get a user, hitting the REST API at most once per TTL"""
+        user_id = int(user_id)
+        user = bot.get_user(user_id)
+        if user is not None:
+            return user
+        return await self.users.get_or_fetch(user_id, lambda: bot.fetch_user(user_id))
+
+    async def get_names(self, bot, user_ids: Iterable[int]) -> Dict[int, str]:
+        """Get display names for several users concurrently"""
+        user_ids = [int(user_id) for user_id in user_ids]
+        users = await asyncio.gather(
+            *(self.get_user(bot, user_id) for user_id in user_ids),
+            return_exceptions=True
+        )
+        return {
+            user_id: user.name if not isinstance(user, Exception) else f"Joueur {user_id}"
+            for user_id, user in zip(user_ids, users)
+        }
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss counters of the user cache"""
+        return {"users": self.users.stats()}
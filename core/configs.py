@@ -228,4 +228,42 @@ LEADERS_TO_LINK = {
     "Chaka (Zoulous)": "https://civ6bbg.github.io/en_US/leaders_7.2.html#Zulu%20Shaka",
 }
 
-LEADERS = list(LEADERS_TO_LINK.keys())
\ No newline at end of file
+LEADERS = list(LEADERS_TO_LINK.keys())
+
+# Phase deadlines in seconds (None = no deadline). When a deadline passes,
+# players who haven't answered get a default: their draft bans (or no ban),
+# their draft pick (or a random civilization from their pool).
+PHASE_DEADLINES = {
+    "banning": 600,
+    "selection": 600,
+}
+
+# The event log (data/events.jsonl) is archived as data/events.<offset>.jsonl
+# once it reaches EVENT_LOG_MAX_BYTES. Archives already reflected in the game
+# snapshot are deleted, except the EVENT_LOG_ARCHIVES most recent ones (kept to
+# replay recent games with `python -m core.events`).
+EVENT_LOG_MAX_BYTES = 64 * 1024 * 1024
+EVENT_LOG_ARCHIVES = 4
+
+# A lobby without a deadline and without any action for this long (seconds) is
+# left without an owner process: its lease is released and sweeps stop
+# claiming it. The next action in the lobby claims it again.
+IDLE_LOBBY_AFTER = 6 * 3600
+
+# Player ratings (Elo) are updated when a lobby creator reports the placements
+# of a finished game with /report. With RATING_WEIGHTED_VOTES, each player's
+# votes weigh rating / 1500 (clamped to RATING_WEIGHT_RANGE) in the settings draw.
+RATING_WEIGHTED_VOTES = False
+RATING_WEIGHT_RANGE = (0.5, 2.0)
+
+# Matchmaking: /queue players are grouped by server, bans and pool size, and a
+# lobby forms as soon as MATCH_LOBBY_SIZE of them accept each other's ratings.
+# The queue is searched every MATCH_INTERVAL seconds (and whenever someone
+# queues); players still waiting after MATCH_MAX_WAIT seconds are dropped.
+MATCH_LOBBY_SIZE = 4
+MATCH_INTERVAL = 5
+MATCH_MAX_WAIT = 3600
+# A matched group whose lobby can't be created waits MATCH_INTERVAL * 2^attempt
+# seconds before being formed again; after MATCH_MAX_ATTEMPTS failures, or when
+# the channel is gone or not writable, the players are dropped and told by DM.
+MATCH_MAX_ATTEMPTS = 4
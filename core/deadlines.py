@@ -0,0 +1,108 @@
+"""
+Phase deadline scheduler: a single timer task for all lobbies
+"""
+import asyncio
+import heapq
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+
+class DeadlineScheduler:
+    """
+    Min-heap of (due, game_id, phase) served by one task
+
+    Scheduling and popping are O(log n). Cancelled or rescheduled deadlines are
+    left in the heap and skipped when they surface (lazy deletion), so
+    cancelling is O(1), per phase or for a whole game.
+    """
+
+    def __init__(self, on_expire: Callable[[str, str], Awaitable[None]]):
+        self.on_expire = on_expire
+        self._heap: List[Tuple[float, str, str]] = []
+        # game id -> phase -> due time of the live deadlines
+        self._due: Dict[str, Dict[str, float]] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # Expiry callbacks in progress, referenced until they finish
+        self._expiring: Set[asyncio.Task] = set()
+        self.expired = 0
+        self._count = 0
+
+    def _get(self, game_id: str, phase: str) -> Optional[float]:
+        return self._due.get(game_id, {}).get(phase)
+
+    def _pop(self, game_id: str, phase: str) -> None:
+        phases = self._due.get(game_id)
+        if phases is None or phase not in phases:
+            return
+        del phases[phase]
+        self._count -= 1
+        if not phases:
+            del self._due[game_id]
+
+    def schedule(self, game_id: str, phase: str, due: float) -> None:
+        """Set (or move) the deadline of a game phase, as a UNIX timestamp"""
+        phases = self._due.setdefault(game_id, {})
+        if phases.get(phase) == due:
+            return
+        if phase not in phases:
+            self._count += 1
+        phases[phase] = due
+        heapq.heappush(self._heap, (due, game_id, phase))
+        if self._heap[0][0] == due:
+            self._wakeup.set()
+
+    def cancel(self, game_id: str, phase: Optional[str] = None) -> None:
+        """Forget the deadline of a phase, or all deadlines of a game"""
+        if phase is not None:
+            self._pop(game_id, phase)
+            return
+        self._count -= len(self._due.pop(game_id, {}))
+
+    def start(self, ready: Optional[Callable[[], Awaitable]] = None) -> None:
+        """Start the timer task (optionally waiting for `ready` before firing anything)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(ready))
+
+    def __len__(self) -> int:
+        return self._count
+
+    async def _run(self, ready) -> None:
+        if ready is not None:
+            await ready()
+
+        while True:
+            self._wakeup.clear()
+
+            # Drop cancelled/rescheduled entries
+            while self._heap and self._get(self._heap[0][1], self._heap[0][2]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            due, game_id, phase = self._heap[0]
+            delay = due - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            self._pop(game_id, phase)
+            self.expired += 1
+            task = asyncio.get_running_loop().create_task(self._expire(game_id, phase))
+            self._expiring.add(task)
+            task.add_done_callback(self._expiring.discard)
+
+    async def _expire(self, game_id: str, phase: str) -> None:
+        try:
+            await self.on_expire(game_id, phase)
+        except asyncio.CancelledError:
+            print(f"⚠️ Expiration de la phase {phase} ({game_id}) annulée")
+            raise
+        except Exception as e:
+            print(f"❌ Erreur lors de l'expiration de la phase {phase} ({game_id}): {e}")
@@ -0,0 +1,148 @@
+"""
+On-demand diagnostics of the running bot: event loop profile and memory report
+"""
+import asyncio
+import cProfile
+import io
+import pstats
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, Optional, Set, Tuple
+
+
+# Games measured by the memory report: walking a large store would block the loop
+MEMORY_SAMPLE_GAMES = 500
+
+
+class Diagnostics:
+    """Profiles the event loop and reports memory usage without restarting the bot"""
+
+    def __init__(self):
+        self._profile_lock = asyncio.Lock()
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def profiling(self) -> bool:
+        return self._profile_lock.locked()
+
+    async def profile(self, seconds: float, top: int = 30) -> str:
+        """
+        Profile everything the event loop runs for `seconds`
+
+        Coroutines, callbacks and the discord.py internals all run on the main
+        thread, so a deterministic profiler enabled for the duration of a sleep
+        sees the whole loop. Only one profile can run at a time.
+        """
+        async with self._profile_lock:
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                profiler.disable()
+            elapsed = time.perf_counter() - started
+
+        out = io.StringIO()
+        out.write(f"Profil de la boucle d'événements sur {elapsed:.1f}s\n\n")
+        stats = pstats.Stats(profiler, stream=out).strip_dirs()
+        out.write("=== Temps cumulé ===\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+        out.write("\n=== Temps propre ===\n")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(top)
+        return out.getvalue()
+
+    async def memory(self, game_manager, top: int = 25) -> str:
+        """
+        tracemalloc top allocations (and growth since the previous report),
+        plus the size of a sample of the games of the store and of the caches
+
+        The snapshot is taken and compared in a thread; the games, which the
+        loop keeps changing, are measured on the loop but at most
+        MEMORY_SAMPLE_GAMES of them.
+        """
+        out = io.StringIO()
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            out.write(
+                "ℹ️ tracemalloc vient d'être démarré : seules les allocations faites à partir de maintenant "
+                "sont suivies. Relance la commande plus tard (ou démarre le bot avec PYTHONTRACEMALLOC=1).\n\n"
+            )
+
+        report, self._last_snapshot = await asyncio.to_thread(tracemalloc_report, self._last_snapshot, top)
+        out.write(report)
+
+        games = game_manager.storage.get_all()
+        sample = games if len(games) <= MEMORY_SAMPLE_GAMES else random.sample(games, MEMORY_SAMPLE_GAMES)
+        sizes = sorted(((deep_sizeof(game), game) for game in sample), key=lambda entry: entry[0], reverse=True)
+        total = sum(size for size, _ in sizes) * len(games) / max(len(sample), 1)
+        if len(sample) < len(games):
+            out.write(
+                f"\n=== Parties: {len(games)} en mémoire, environ {total / 1e6:.2f} MB "
+                f"(estimé sur {len(sample)} parties au hasard) ===\n"
+            )
+        else:
+            out.write(f"\n=== Parties: {len(games)} en mémoire, {total / 1e6:.2f} MB ===\n")
+        for size, game in sizes[:top]:
+            out.write(
+                f"{game['id']}: {size / 1e3:.1f} KB, {len(game.get('players', []))} joueur(s), "
+                f"phase {phase_label(game)}\n"
+            )
+
+        out.write("\n=== Caches ===\n")
+        out.write(f"Rendus: {game_manager.renders.stats()}\n")
+        out.write(f"Utilisateurs: {game_manager.users.stats()}\n")
+        out.write(f"Salons: {game_manager.channels.stats()}\n")
+        out.write(f"Envois: {game_manager.messages.stats()}\n")
+        out.write(f"Transitions: {game_manager.jobs.stats()}\n")
+        return out.getvalue()
+
+
+def tracemalloc_report(previous: Optional[tracemalloc.Snapshot], top: int) -> Tuple[str, tracemalloc.Snapshot]:
+    """Top allocations, and growth since `previous`, with the new snapshot"""
+    out = io.StringIO()
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    current, peak = tracemalloc.get_traced_memory()
+    out.write(f"=== tracemalloc: {current / 1e6:.1f} MB suivis (pic {peak / 1e6:.1f} MB) ===\n")
+    for stat in snapshot.statistics("lineno")[:top]:
+        out.write(f"{stat}\n")
+
+    if previous is not None:
+        out.write("\n=== Croissance depuis le rapport précédent ===\n")
+        for stat in snapshot.compare_to(previous, "lineno")[:top]:
+            out.write(f"{stat}\n")
+    return out.getvalue(), snapshot
+
+
+def phase_label(game: Dict) -> str:
+    if game.get("results_posted"):
+        return "terminée"
+    if game.get("selection_started"):
+        return "sélection"
+    if game.get("banning_started"):
+        return "bans"
+    if game.get("voting_started"):
+        return "votes"
+    return "inscriptions"
+
+
+def deep_sizeof(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """Memory used by a JSON-like object and everything it contains (shared objects counted once)"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
@@ -0,0 +1,49 @@
+"""
+Ban and pick drafts of players who haven't confirmed yet
+"""
+from typing import Any, Dict, Tuple
+
+
+PHASES = ("banning", "selection")
+
+
+class DraftStore:
+    """
+    In-progress answers of the ban and selection phases, kept in memory
+
+    Entering or clearing a draft doesn't touch the game store: only the
+    confirmed answer is recorded and saved. Drafts live in the process that
+    handled the player's interactions and are lost on restart; a deadline
+    reached without a draft applies the no-draft default.
+    """
+
+    def __init__(self):
+        # (phase, game id) -> player id -> draft
+        self._drafts: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def get(self, phase: str, game_id: str, player_id: int, default: Any = None) -> Any:
+        return self._drafts.get((phase, game_id), {}).get(str(player_id), default)
+
+    def set(self, phase: str, game_id: str, player_id: int, draft: Any) -> None:
+        self._drafts.setdefault((phase, game_id), {})[str(player_id)] = draft
+
+    def discard(self, phase: str, game_id: str, player_id: int) -> None:
+        """Drop a player's draft once their answer is recorded"""
+        drafts = self._drafts.get((phase, game_id))
+        if drafts is None:
+            return
+        drafts.pop(str(player_id), None)
+        if not drafts:
+            del self._drafts[(phase, game_id)]
+
+    def take(self, phase: str, game_id: str) -> Dict[str, Any]:
+        """Remove and return every draft of a phase (player id -> draft)"""
+        return self._drafts.pop((phase, game_id), {})
+
+    def forget(self, game_id: str) -> None:
+        """Drop the drafts of a deleted lobby"""
+        for phase in PHASES:
+            self._drafts.pop((phase, game_id), None)
+
+    def __len__(self) -> int:
+        return sum(len(drafts) for drafts in self._drafts.values())
@@ -0,0 +1,364 @@
+"""
+Append-only log of lobby events and the projector that replays it
+
+Every lobby action (join, vote, ban, selection, phase transition, draw) is
+appended to `data/events.jsonl` before the game is saved, with the outcome of
+random draws, so replaying the events of a game rebuilds it exactly.
+
+Replay a game from the command line (from the repository root):
+    python -m core.events <game_id>           # events and the final state
+    python -m core.events <game_id> --steps   # state after every event
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from core.storage import file_lock, write_json_atomic
+
+
+class EventLog:
+    """
+    Append-only JSON lines file of events, shared by every process
+
+    Events get a global sequence number under the file lock, so the order of
+    the log is the order in which actions happened across processes. A
+    checkpoint records the offset up to which every event is reflected in the
+    game snapshot, so recovery only reads the end of the log.
+
+    Appends reach the OS before `append` returns, so they survive a crash of
+    the process; inside the event loop, the fsync that makes them survive a
+    power loss is batched: one per `sync_interval`, in a thread. Outside an
+    event loop (scripts, benchmarks) every append is synced at once.
+
+    Past `rotate`'s size limit the file is renamed to an archive named after
+    its first offset (`events.<offset>.jsonl`) and a new file starts. Offsets
+    count from the start of the first archive, so checkpoints and readers of
+    other processes stay valid across rotations.
+    """
+
+    def __init__(self, path: str = "data/events.jsonl", checkpoint_path: str = "data/events.checkpoint.json",
+                 sync_interval: float = 0.05):
+        self.path = path
+        self.checkpoint_path = checkpoint_path
+        self.sync_interval = sync_interval
+        self._last_seq: Optional[int] = None
+        self._size: Optional[int] = None
+        # Offset of the current file's first byte, cached per inode of the file
+        self._base: Optional[int] = None
+        self._inode: Optional[int] = None
+        self._unsynced = False
+        self._sync_task: Optional[asyncio.Task] = None
+        root, ext = os.path.splitext(path)
+        self._archive = re.compile(re.escape(os.path.basename(root)) + r"\.(\d+)" + re.escape(ext) + "$")
+
+    def _archive_path(self, start: int) -> str:
+        root, ext = os.path.splitext(self.path)
+        return f"{root}.{start}{ext}"
+
+    def _archives(self) -> List[Tuple[int, str]]:
+        """(first offset, path) of the archived files, oldest first"""
+        directory = os.path.dirname(self.path) or "."
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        archives = []
+        for name in names:
+            match = self._archive.match(name)
+            if match:
+                archives.append((int(match.group(1)), os.path.join(directory, name)))
+        return sorted(archives)
+
+    def _current(self) -> Tuple[int, int]:
+        """Offset of the current file's first byte and the file's size"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            stat = None
+        inode = stat.st_ino if stat else None
+        if self._base is None or inode != self._inode:
+            # Rotated (by any process) since the last call: the new file starts where the last archive ends
+            archives = self._archives()
+            self._base = archives[-1][0] + os.path.getsize(archives[-1][1]) if archives else 0
+            self._inode = inode
+        return self._base, stat.st_size if stat else 0
+
+    def _segments(self) -> List[Tuple[int, str]]:
+        """(first offset, path) of every file of the log, oldest first"""
+        base, _ = self._current()
+        return [archive for archive in self._archives() if archive[0] < base] + [(base, self.path)]
+
+    def _read_last_seq(self) -> int:
+        """Sequence number of the last complete event (0 for an empty log)"""
+        for _, path in reversed(self._segments()):
+            try:
+                with open(path, 'rb') as f:
+                    f.seek(0, os.SEEK_END)
+                    end = f.tell()
+                    f.seek(max(0, end - 65536))
+                    lines = f.read().splitlines()
+            except FileNotFoundError:
+                continue
+            for line in reversed(lines):
+                try:
+                    return json.loads(line)["seq"]
+                except (ValueError, KeyError):
+                    continue  # Torn write of a crashed process
+        return 0
+
+    def append(self, game_id: str, kind: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Write an event and return it (synced to disk shortly after, see the class docstring)"""
+        with file_lock(self.path):
+            size = self.size()
+            if self._last_seq is None or size != self._size:
+                # Another process appended since our last event
+                self._last_seq = self._read_last_seq()
+            event = {"seq": self._last_seq + 1, "ts": time.time(), "game": game_id, "type": kind, "data": data}
+            line = json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n"
+            with open(self.path, 'ab') as f:
+                f.write(line)
+            self._last_seq = event["seq"]
+            self._size = size + len(line)
+        self._request_sync()
+        return event
+
+    def _request_sync(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.sync()
+            return
+        self._unsynced = True
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = loop.create_task(self._sync_batches())
+
+    async def _sync_batches(self) -> None:
+        # Appends made while a sync runs are covered by the next one
+        while self._unsynced:
+            await asyncio.sleep(self.sync_interval)
+            self._unsynced = False
+            try:
+                await asyncio.to_thread(self.sync)
+            except OSError as e:
+                print(f"❌ Erreur lors de la synchronisation du journal d'événements: {e}")
+
+    def sync(self) -> None:
+        """Flush the events appended so far to disk"""
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def read(self, offset: int = 0, game_id: Optional[str] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Events from an offset, with the offset following each one"""
+        segments = self._segments()
+        for i, (start, path) in enumerate(segments):
+            end = segments[i + 1][0] if i + 1 < len(segments) else None
+            if end is not None and end <= offset:
+                continue
+            try:
+                f = open(path, 'rb')
+                if end is None and os.fstat(f.fileno()).st_ino != self._inode:
+                    # Rotated since `_segments`: the file read so far is now an archive
+                    f.close()
+                    f = open(self._archive_path(start), 'rb')
+            except FileNotFoundError:
+                continue  # Archive deleted meanwhile
+            with f:
+                # Offsets before the oldest archive kept start from it
+                position = max(offset, start)
+                f.seek(position - start)
+                for line in f:
+                    position += len(line)
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    if game_id is None or event["game"] == game_id:
+                        yield position, event
+            offset = position
+
+    def size(self) -> int:
+        """Offset of the end of the log"""
+        base, size = self._current()
+        return base + size
+
+    def rotate(self, max_bytes: int, keep: int) -> None:
+        """
+        Archive the current file once it reaches `max_bytes`, then delete the
+        archives beyond the `keep` most recent that are entirely before the
+        checkpoint (their events are in the snapshot)
+        """
+        with file_lock(self.path):
+            base, size = self._current()
+            if size >= max_bytes:
+                self.sync()
+                os.replace(self.path, self._archive_path(base))
+                base, _ = self._current()
+            checkpoint = self.load_checkpoint()
+            archives = self._archives()
+            ends = [start for start, _ in archives[1:]] + [base]
+            for (_, path), end in list(zip(archives, ends))[:max(len(archives) - keep, 0)]:
+                if end <= checkpoint:
+                    os.remove(path)
+
+    def load_checkpoint(self) -> int:
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get("offset", 0)
+        except (FileNotFoundError, json.JSONDecodeError, IOError):
+            return 0
+
+    def save_checkpoint(self, offset: int) -> None:
+        write_json_atomic(self.checkpoint_path, {"offset": offset})
+
+
+def apply_event(games: Dict[str, Dict], event: Dict[str, Any]) -> Optional[Dict]:
+    """Apply an event to the game it belongs to, returning the game (None once deleted)"""
+    game_id = event["game"]
+    data = event["data"]
+    kind = event["type"]
+
+    if kind == "game_created":
+        games.setdefault(game_id, json.loads(json.dumps(data["game"])))
+    game = games.get(game_id)
+    if game is None:
+        return None
+
+    if kind == "player_joined":
+        if data["player_id"] not in game["players"]:
+            game["players"].append(data["player_id"])
+    elif kind == "voting_started":
+        game["voting_started"] = True
+        game["results_channel_id"] = data.get("results_channel_id")
+    elif kind == "vote_submitted":
+        game.setdefault("votes", {})[str(data["player_id"])] = data["votes"]
+    elif kind == "banning_started":
+        game["banning_started"] = True
+        game["final_settings"] = data["final_settings"]
+        _set_deadline(game, "banning", data.get("deadline"))
+    elif kind == "ban_submitted":
+        game.setdefault("bans", {})[str(data["player_id"])] = data["bans"]
+    elif kind == "selection_started":
+        game["selection_started"] = True
+    elif kind == "civ_pools_drawn":
+        game["civ_pools"] = data["civ_pools"]
+        game.get("deadlines", {}).pop("banning", None)
+        _set_deadline(game, "selection", data.get("deadline"))
+    elif kind == "selection_submitted":
+        game.setdefault("civ_selections", {})[str(data["player_id"])] = data["civ"]
+    elif kind == "phase_expired":
+        field = "bans" if data["phase"] == "banning" else "civ_selections"
+        game.get("deadlines", {}).pop(data["phase"], None)
+        for player_id, default in data["defaults"].items():
+            game.setdefault(field, {})[player_id] = default
+    elif kind == "phase_announced":
+        game[f"{data['phase']}_phase_announced"] = True
+    elif kind == "results_posted":
+        game["results_posted"] = True
+        game["finished_at"] = event["ts"]
+        game.get("deadlines", {}).pop("selection", None)
+    elif kind == "placements_reported":
+        game["placements"] = data["placements"]
+    elif kind == "thread_created":
+        game["thread_id"] = data["thread_id"]
+    elif kind == "game_deleted":
+        del games[game_id]
+        return None
+
+    game["last_event_seq"] = event["seq"]
+    game["last_event_at"] = event["ts"]
+    return game
+
+
+def _set_deadline(game: Dict, phase: str, due: Optional[float]) -> None:
+    if due:
+        game.setdefault("deadlines", {})[phase] = due
+
+
+def recover(storage, log: EventLog) -> List[str]:
+    """
+    Catch the game snapshot up with the event log after a crash
+
+    A process that died between appending an event and saving the game left
+    the event in the log only: events after the checkpoint that a game hasn't
+    applied yet (seq above its `last_event_seq`) are replayed onto it, and
+    games whose creation never reached the snapshot are rebuilt. Returns the
+    ids of the games that changed.
+
+    The checkpoint is left to the caller: events of other running processes
+    may not be saved yet.
+    """
+    games = {game["id"]: game for game in storage.get_all()}
+    changed = []
+    deleted = []
+    offset = log.load_checkpoint()
+    if offset > log.size():
+        offset = 0  # Log replaced: replay it all
+    for offset, event in log.read(offset):
+        game = games.get(event["game"])
+        if game is not None and event["seq"] <= game.get("last_event_seq", 0):
+            continue
+        if game is None and event["type"] != "game_created":
+            continue  # Deleted, or created before the checkpoint
+        if apply_event(games, event) is None:
+            deleted.append(event["game"])
+        changed.append(event["game"])
+
+    if changed:
+        for game_id in dict.fromkeys(changed):
+            if game_id in games and storage.get_by_id(game_id) is None:
+                storage.add(games[game_id], save=False)
+        for game_id in deleted:
+            storage.delete(game_id)
+        storage.save()
+    return list(dict.fromkeys(changed))
+
+
+def replay(log: EventLog, game_id: str) -> Iterator[Tuple[Dict[str, Any], Optional[Dict]]]:
+    """Every event of a game with the state of the game right after it"""
+    games: Dict[str, Dict] = {}
+    for _, event in log.read(game_id=game_id):
+        game = apply_event(games, event)
+        yield event, (json.loads(json.dumps(game)) if game is not None else None)
+
+
+def _format_time(ts: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay the event log of a game")
+    parser.add_argument("game_id")
+    parser.add_argument("--log", default="data/events.jsonl")
+    parser.add_argument("--steps", action="store_true", help="print the game state after every event")
+    args = parser.parse_args(argv)
+
+    state = None
+    count = 0
+    for event, state in replay(EventLog(args.log), args.game_id):
+        count += 1
+        data = json.dumps(event["data"], ensure_ascii=False)
+        print(f"#{event['seq']:<6} {_format_time(event['ts'])}  {event['type']:<20} {data}")
+        if args.steps:
+            print(json.dumps(state, indent=2, ensure_ascii=False))
+
+    if not count:
+        print(f"❌ Aucun événement pour la partie {args.game_id}")
+        return 1
+    print(f"\n=== État après {count} événement(s) ===")
+    print(json.dumps(state, indent=2, ensure_ascii=False) if state is not None else "Partie supprimée")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,36 @@
 """
 Main game manager - orchestrates game flow and phase transitions
 """
+import asyncio
+import random
+import time
 import discord
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, List
 from models.game import Game
 from core.storage import Storage
-from core.configs import CIV_EMOJI_CONFIG, GAME_OPTIONS, LEADERS_TO_LINK
+from core.messaging import MessageScheduler, PRIORITY_DM
+from core.cache import TTLCache, UserCache
+from core.render_cache import RenderCache
+from core.progress import ProgressBoard
+from core.jobs import JobQueue
+from core.deadlines import DeadlineScheduler
+from core.drafts import DraftStore
+from core.leases import LeaseManager
+from core.events import EventLog, apply_event, recover
+from core.player_index import PlayerIndex
+from core.analytics import AnalyticsStore
+from core.ratings import DEFAULT_RATING, RatingStore
+from core.matchmaking import MatchQueue
+from core.metrics import timed
+from core.configs import (
+    EVENT_LOG_ARCHIVES, EVENT_LOG_MAX_BYTES, GAME_OPTIONS, IDLE_LOBBY_AFTER, MATCH_INTERVAL, MATCH_LOBBY_SIZE,
+    MATCH_MAX_ATTEMPTS, MATCH_MAX_WAIT, PHASE_DEADLINES, RATING_WEIGHT_RANGE, RATING_WEIGHTED_VOTES
+)
 from utils.civilization import get_available_civs, assign_civ_pools
 from utils.voting import calculate_weighted_results, format_vote_results
+from utils.rendering import SELECTION_INSTRUCTIONS, render_selection_pool
 from views.game_views import GameJoinView
+from views.voting_views import VoteView, vote_page_content
 from views.ban_views import BanCollectorView
 from views.selection_views import CivSelectionView
 
@@ -18,32 +40,501 @@ class GameManager:
     
     def __init__(self):
         self.storage = Storage("data/games.json")
+        self.messages = MessageScheduler()
+        self.users = UserCache()
+        # Thread/channel handles by channel id, invalidated on archive/delete events
+        self.channels = TTLCache(ttl=3600)
+        # Static civilization embeds are built on first use, not at startup
+        self.renders = RenderCache()
+        self.progress = ProgressBoard(self)
+        self.jobs = JobQueue()
+        self.deadlines: Optional[DeadlineScheduler] = None
+        # Unconfirmed bans and picks, saved with the game only on confirm
+        self.drafts = DraftStore()
+        # Lobbies whose background work this process runs (several processes can share the storage)
+        self.leases = LeaseManager()
+        self._lease_task: Optional[asyncio.Task] = None
+        self._seen_versions: Dict[str, int] = {}
+        # Storage generation of the last sweep: unchanged storage skips the scan
+        self._swept_generation: Optional[int] = None
+        # Every lobby action is logged before the game is saved: replay what a crash left unsaved
+        self.events = EventLog()
+        self.recovered = recover(self.storage, self.events)
+        if self.recovered:
+            print(f"♻️ {len(self.recovered)} partie(s) rattrapée(s) depuis le journal d'événements")
+        # Log offset fully reflected in the snapshot, committed one lease period later
+        self._checkpoint_candidate = self.events.size()
+        # Lobbies and statistics of each player, then kept current from the event log
+        self.players = PlayerIndex(self.events)
+        self.players.build(self.storage.get_all())
+        # Ban/pick/setting counters, added to as games finish
+        self.analytics = AnalyticsStore()
+        if not self.analytics.exists():
+            count = self.analytics.rebuild(self.storage.get_all())
+            print(f"📊 Statistiques calculées à partir de {count} partie(s) terminée(s)")
+        self.ratings = RatingStore()
+        # Players waiting for a lobby; the matchmaker forms lobbies from it
+        self.queue = MatchQueue()
+        self._match_task: Optional[asyncio.Task] = None
+        self._match_wakeup = asyncio.Event()
     
-    def create_game(self, creator_id: int, max_bans: int = 2, civ_pool_size: int = 3, thread_id: Optional[int] = None) -> Dict:
+    def create_game(
+        self,
+        creator_id: int,
+        max_bans: int = 2,
+        civ_pool_size: int = 3,
+        thread_id: Optional[int] = None,
+        guild_id: Optional[int] = None
+    ) -> Dict:
         """Create a new game"""
-        game = Game(creator_id, max_bans, civ_pool_size, thread_id)
+        game = Game(creator_id, max_bans, civ_pool_size, thread_id, guild_id)
         game_dict = game.to_dict()
+        self.record(game_dict, "game_created", game=game_dict)
         self.storage.add(game_dict)
         return game_dict
     
-    def get_game(self, game_id: str) -> Optional[Dict]:
-        """Get game by ID"""
+    def get_game(self, game_id: str, fresh: bool = False) -> Optional[Dict]:
+        """
+        Get game by ID
+        
+        Games are read from memory; `fresh` first merges what other processes
+        saved, for phase transitions deciding on every player's answers.
+        """
+        if fresh:
+            self.storage.refresh()
         return self.storage.get_by_id(game_id)
     
-    def save(self):
-        """Save games to storage"""
+    def record(self, target: Dict, kind: str, **data) -> Dict:
+        """
+        Append a lobby event to the log and apply it to the `target` game
+        
+        The event is on disk before the caller saves the game: if the process
+        dies in between, it is replayed onto the game on the next startup.
+        """
+        event = self.events.append(target["id"], kind, data)
+        apply_event({target["id"]: target}, event)
+        return event
+    
+    def checkpoint_events(self):
+        """Let recovery skip the events already reflected in the snapshot"""
+        if self._checkpoint_candidate != self.events.load_checkpoint():
+            self.events.save_checkpoint(self._checkpoint_candidate)
+        self._checkpoint_candidate = self.events.size()
+    
+    def report_placements(self, game: Dict, placements: List[List[int]]) -> Dict[int, tuple]:
+        """Record the placements of a finished game and update its players' ratings"""
+        self.record(game, "placements_reported", placements=placements)
+        self.save(game)
+        return self.ratings.apply(placements)
+    
+    def vote_weights(self, game: Dict) -> Optional[Dict[str, float]]:
+        """Weight of each player's votes in the settings draw, None when votes aren't rated"""
+        if not RATING_WEIGHTED_VOTES:
+            return None
+        low, high = RATING_WEIGHT_RANGE
+        ratings = self.ratings.ratings(game["players"])
+        return {
+            str(player_id): min(high, max(low, rating / DEFAULT_RATING))
+            for player_id, rating in ratings.items()
+        }
+    
+    def save(self, game: Optional[Dict] = None):
+        """Save games to storage, bumping the version of `game` when it was modified"""
+        if game is not None:
+            game["version"] = game.get("version", 0) + 1
         self.storage.save()
     
+    def serves(self, bot, game: Dict) -> bool:
+        """
+        Whether the game belongs to a shard of this process
+
+        A guild belongs to shard (guild_id >> 22) % shard_count. Games without
+        a guild (created before sharding) and unsharded bots serve everything.
+        """
+        guild_id = game.get("guild_id")
+        shard_count = getattr(bot, "shard_count", None)
+        if guild_id is not None and shard_count:
+            shard_ids = getattr(bot, "shard_ids", None)
+            if shard_ids is None:
+                shard_id = getattr(bot, "shard_id", None)
+                shard_ids = None if shard_id is None else [shard_id]
+            if shard_ids is not None and (guild_id >> 22) % shard_count not in shard_ids:
+                return False
+        return True
+    
+    async def claim(self, bot, game: Dict) -> bool:
+        """
+        Whether this process runs the game's background work
+        
+        Among the processes serving the game's shard, the one holding its
+        lease owns it (claimed here if free). The lease file is only touched
+        when the lease needs claiming or renewing, off the event loop.
+        """
+        if not self.serves(bot, game):
+            return False
+        if self.leases.holds(game["id"]):
+            return True
+        return await asyncio.to_thread(self.leases.claim, game["id"])
+    
+    def _needs_owner(self, game: Dict) -> bool:
+        """Whether an unfinished lobby has deadlines to run or had recent activity"""
+        if game.get("results_posted"):
+            return False
+        if game.get("deadlines"):
+            return True
+        if not self._pending_check(game):
+            return False
+        last_event_at = game.get("last_event_at")
+        return last_event_at is None or time.time() - last_event_at < IDLE_LOBBY_AFTER
+    
+    async def get_channel(self, bot, channel_id: int):
+        """Get a messageable channel from the cache, the gateway cache or REST as last resort"""
+        channel = self.channels.get(channel_id)
+        if channel is not None:
+            return channel
+        channel = bot.get_channel(channel_id)
+        if channel is not None:
+            self.channels.set(channel_id, channel)
+            return channel
+        return await self.channels.get_or_fetch(channel_id, lambda: bot.fetch_channel(channel_id))
+    
+    async def get_game_channel(self, bot, game: Dict):
+        """Get the thread (or results channel) of a game, None if it has none"""
+        channel_id = game.get("thread_id") or game.get("results_channel_id")
+        if not channel_id:
+            return None
+        return await self.get_channel(bot, channel_id)
+    
+    def invalidate_channel(self, channel_id: int) -> None:
+        """Drop a cached channel handle (thread archived or deleted)"""
+        self.channels.invalidate(channel_id)
+    
     def create_join_view(self, game_id: str) -> GameJoinView:
         """Create the join/start view for a game"""
-        return GameJoinView(self, game_id)
+        return GameJoinView(game_id)
     
-    async def check_voting_complete(self, bot, game_id: str):
-        """Check if all players finished voting and start ban phase"""
+    def start_deadlines(self, bot):
+        """
+        Start the deadline timer
+        
+        The deadlines persisted with the games are rescheduled by the first
+        lease sweep, for the lobbies this process claims.
+        """
+        if self.deadlines is not None:
+            return
+        self.deadlines = DeadlineScheduler(lambda game_id, phase: self.expire_phase(bot, game_id, phase))
+        self.deadlines.start(bot.wait_until_ready)
+    
+    def start_leases(self, bot):
+        """Start renewing lobby leases and taking over lobbies of stopped processes"""
+        if self._lease_task is None or self._lease_task.done():
+            self._lease_task = asyncio.get_running_loop().create_task(self._maintain_leases(bot))
+    
+    def start_matchmaking(self, bot):
+        """Start forming lobbies from the matchmaking queue"""
+        if self._match_task is None or self._match_task.done():
+            self._match_task = asyncio.get_running_loop().create_task(self._run_matchmaker(bot))
+    
+    def enqueue(self, entry: Dict):
+        """Queue a player for matchmaking and search for a lobby right away"""
+        self.queue.add([entry])
+        self._match_wakeup.set()
+    
+    async def _run_matchmaker(self, bot):
+        await bot.wait_until_ready()
+        while True:
+            try:
+                groups = self.queue.match(
+                    MATCH_LOBBY_SIZE, MATCH_MAX_WAIT,
+                    # Lobbies are posted in the server's channels: only ours are searched
+                    serves=lambda guild_id: guild_id is not None and bot.get_guild(guild_id) is not None
+                )
+            except Exception as e:
+                print(f"❌ Erreur du matchmaking: {e}")
+                groups = []
+            # The groups are out of the queue: one that fails goes back without losing the others
+            for group in groups:
+                try:
+                    await self.form_lobby(bot, group)
+                except (discord.NotFound, discord.Forbidden) as e:
+                    # The channel is gone or closed to the bot: retrying can't help
+                    print(f"❌ Partie de matchmaking non créée, salon inaccessible: {e}")
+                    await self._drop_group(bot, group, "le salon où tu t'es inscrit est supprimé ou inaccessible au bot")
+                except Exception as e:
+                    if not self._requeue_group(group, e):
+                        await self._drop_group(bot, group, "plusieurs tentatives ont échoué")
+            try:
+                await asyncio.wait_for(self._match_wakeup.wait(), MATCH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._match_wakeup.clear()
+    
+    def _requeue_group(self, group: List[Dict], error: Exception) -> bool:
+        """
+        Put a group whose lobby failed back in the queue, out of the search
+        for MATCH_INTERVAL * 2^attempt seconds. False once it failed
+        MATCH_MAX_ATTEMPTS times: the caller drops it.
+        """
+        attempts = max(entry.get("attempts", 0) for entry in group) + 1
+        if attempts >= MATCH_MAX_ATTEMPTS:
+            print(f"❌ Partie de matchmaking non créée après {attempts} tentatives: {error}")
+            return False
+        delay = MATCH_INTERVAL * 2 ** attempts
+        print(f"⚠️ Partie de matchmaking non créée, nouvel essai dans {delay}s: {error}")
+        retry_at = time.time() + delay
+        for entry in group:
+            entry["attempts"] = attempts
+            entry["retry_at"] = retry_at
+        try:
+            self.queue.add(group)
+        except Exception as e:
+            print(f"❌ Impossible de remettre les joueurs dans la file: {e}")
+        return True
+    
+    async def _drop_group(self, bot, group: List[Dict], reason: str):
+        """Tell the players of a group that won't be formed that they left the queue"""
+        async def notify(entry):
+            user = await self.users.get_user(bot, entry["user_id"])
+            await self.messages.send(
+                user,
+                f"❌ La partie trouvée par le matchmaking n'a pas pu être créée ({reason}). "
+                f"Tu as été retiré de la file : utilise `/queue` pour y revenir.",
+                priority=PRIORITY_DM
+            )
+        
+        results = await asyncio.gather(*(notify(entry) for entry in group), return_exceptions=True)
+        for entry, result in zip(group, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ Impossible de prévenir {entry['user_id']} du retrait de la file: {result}")
+    
+    async def form_lobby(self, bot, group: List[Dict]):
+        """
+        Create the lobby of a matched group in the channel where its
+        longest-waiting player queued, with every player already joined
+        
+        Raises when the lobby couldn't be announced (channel gone or
+        unreachable); the lobby is then deleted and the caller requeues
+        the group or drops it.
+        """
+        host = min(group, key=lambda entry: entry["queued_at"])
+        channel = await self.get_channel(bot, host["channel_id"])
+        
+        game = self.create_game(host["user_id"], host["max_bans"], host["civ_pool_size"], None, host["guild_id"])
+        mentions = " ".join(f"<@{entry['user_id']}>" for entry in group)
+        try:
+            for entry in sorted(group, key=lambda entry: entry["queued_at"]):
+                self.record(game, "player_joined", player_id=entry["user_id"])
+            self.save(game)
+            
+            content = (
+                f"🎮 **Partie {game['id']} formée par le matchmaking !**\n\n"
+                f"**Joueurs**: {mentions}\n"
+                f"**Bans par joueur**: {game['max_bans']}\n"
+                f"**Civilisations proposées par joueur**: {game['civ_pool_size']}\n\n"
+                f"<@{host['user_id']}> peut commencer les votes quand tout le monde est prêt."
+            )
+            message = await self.messages.send(channel, content, view=self.create_join_view(game["id"]))
+        except Exception:
+            # Nobody saw the lobby: drop it so the players can be matched again
+            self.record(game, "game_deleted")
+            self.storage.delete(game["id"])
+            raise
+        
+        try:
+            thread = await message.create_thread(name=f"Partie {game['id']} - matchmaking", auto_archive_duration=1440)
+            self.record(game, "thread_created", thread_id=thread.id)
+            await self.messages.send(
+                thread,
+                f"🎉 Bienvenue dans la partie {game['id']} ! {mentions}\n\n"
+                f"Toutes les discussions se feront ici."
+            )
+            await self.progress.publish(bot, game, thread)
+        except Exception as e:
+            print(f"⚠️ Erreur lors de la création du thread: {e}")
+        # One save for the thread and the progress board (the thread is in the event log meanwhile)
+        if game.get("thread_id"):
+            self.save(game)
+    
+    async def _maintain_leases(self, bot):
+        await bot.wait_until_ready()
+        while True:
+            try:
+                for game_id in await asyncio.to_thread(self.leases.renew):
+                    # Another process took the lobby over: stop running its timers
+                    if self.deadlines is not None:
+                        self.deadlines.cancel(game_id)
+                # First sweep right after startup: resumes transitions a crash interrupted
+                await self.sweep(bot)
+                self.checkpoint_events()
+                await asyncio.to_thread(self.events.rotate, EVENT_LOG_MAX_BYTES, EVENT_LOG_ARCHIVES)
+            except Exception as e:
+                print(f"❌ Erreur lors du renouvellement des leases: {e}")
+            await asyncio.sleep(self.leases.ttl / 3)
+    
+    async def sweep(self, bot):
+        """
+        Pick up lobbies changed by other processes (or left by a stopped one)
+        
+        Only lobbies whose version changed since the last sweep (scanned when
+        the storage changed at all) and lobbies whose owner released them or
+        let the lease expire are looked at. Those still needing an owner are
+        claimed in a single lease write; for the ones we get, deadlines are
+        rescheduled and the completion check of their phase is queued. Leases
+        of finished, deleted or idle lobbies are released.
+        """
+        self.storage.refresh()
+        generation = self.storage.generation
+        candidates = {}
+        for game_id in await asyncio.to_thread(self.leases.orphans):
+            game = self.storage.get_by_id(game_id)
+            if game:
+                candidates[game_id] = game
+        games = self.storage.get_all() if generation != self._swept_generation else []
+        for game in games:
+            if self._seen_versions.get(game["id"]) != game.get("version", 0):
+                candidates[game["id"]] = game
+        
+        wanted = [game for game in candidates.values() if self.serves(bot, game) and self._needs_owner(game)]
+        held = await asyncio.to_thread(self.leases.claim_many, [game["id"] for game in wanted]) if wanted else set()
+        if games:
+            # Lobbies claimed by another process are left to it until it lets them go
+            self._seen_versions = {game["id"]: game.get("version", 0) for game in games}
+            self._swept_generation = generation
+        
+        for game in wanted:
+            if game["id"] not in held:
+                continue
+            if self.deadlines is not None:
+                for phase, due in game.get("deadlines", {}).items():
+                    self.deadlines.schedule(game["id"], phase, due)
+            check = self._pending_check(game)
+            if check:
+                self.queue_check(bot, game["id"], check)
+        
+        stale = []
+        for game_id in self.leases.held():
+            game = self.storage.get_by_id(game_id)
+            if (game is None or not self._needs_owner(game)) and not self.jobs.busy(game_id):
+                stale.append(game_id)
+        if stale:
+            await asyncio.to_thread(self.leases.release_many, stale)
+            for game_id in stale:
+                if self.deadlines is not None:
+                    self.deadlines.cancel(game_id)
+    
+    @staticmethod
+    def _pending_check(game: Dict) -> Optional[str]:
+        """Completion check of the phase a game is in"""
+        if game.get("selection_started"):
+            return "sélections"
+        if game.get("banning_started"):
+            return "bans"
+        if game.get("voting_started"):
+            return "votes"
+        return None
+    
+    @staticmethod
+    def _new_deadline(phase: str) -> Optional[float]:
+        """Due time of the configured deadline of a phase starting now"""
+        duration = PHASE_DEADLINES.get(phase)
+        return time.time() + duration if duration else None
+    
+    def _schedule_deadline(self, game: Dict, phase: str):
+        """Start the timer of a deadline persisted with the game"""
+        due = game.get("deadlines", {}).get(phase)
+        if due and self.deadlines is not None:
+            self.deadlines.schedule(game["id"], phase, due)
+    
+    def _clear_deadline(self, game: Dict, phase: str):
+        """Forget the deadline of a phase that completed in time"""
+        game.get("deadlines", {}).pop(phase, None)
+        if self.deadlines is not None:
+            self.deadlines.cancel(game["id"], phase)
+    
+    @timed("transition_seconds", phase="deadline")
+    async def expire_phase(self, bot, game_id: str, phase: str):
+        """Apply default answers for players who missed a phase deadline"""
+        game = self.get_game(game_id, fresh=True)
+        if not game or not await self.claim(bot, game):
+            return
+        
+        # player id -> default answer (random picks are logged with the event)
+        defaults = {}
+        if phase == "banning" and not game.get("selection_started"):
+            drafts = self.drafts.take("banning", game_id)
+            for player_id in game["players"]:
+                if str(player_id) not in game.get("bans", {}):
+                    defaults[str(player_id)] = drafts.get(str(player_id), [])
+            check = "bans"
+        elif phase == "selection" and not game.get("results_posted"):
+            drafts = self.drafts.take("selection", game_id)
+            for player_id in game["players"]:
+                pool = game.get("civ_pools", {}).get(str(player_id))
+                if pool and str(player_id) not in game.get("civ_selections", {}):
+                    defaults[str(player_id)] = drafts.get(str(player_id)) or random.choice(pool)
+            check = "sélections"
+        else:
+            game.get("deadlines", {}).pop(phase, None)
+            self.save()
+            return
+        
+        self.record(game, "phase_expired", phase=phase, defaults=defaults)
+        self.save(game)
+        missing = [int(player_id) for player_id in defaults]
+        if missing:
+            channel = await self.get_game_channel(bot, game)
+            if channel:
+                await self.messages.send(
+                    channel,
+                    f"⏰ Temps écoulé ! Choix par défaut appliqués pour : {', '.join(f'<@{pid}>' for pid in missing)}"
+                )
+        self.queue_check(bot, game_id, check)
+    
+    @staticmethod
+    def _deadline_notice(game: Dict, phase: str) -> str:
+        """Thread notice line announcing a phase deadline"""
+        due = game.get("deadlines", {}).get(phase)
+        if not due:
+            return ""
+        return f"\n⏰ Fin de la phase <t:{int(due)}:R>, les retardataires recevront un choix par défaut."
+    
+    def queue_check(self, bot, game_id: str, phase: str):
+        """
+        Run a phase completion check in the background job queue
+        
+        The job claims the lobby first: lobbies owned by another process are
+        left to that process, which picks the change up on its next sweep.
+        """
         game = self.get_game(game_id)
-        if not game or game.get("banning_started"):
+        if not game or not self.serves(bot, game):
+            return None
+        return self.jobs.submit(phase, game_id, self._run_check, bot, game_id, phase)
+    
+    async def _run_check(self, bot, game_id: str, phase: str):
+        game = self.get_game(game_id)
+        if not game or not await self.claim(bot, game):
+            return
+        checks = {
+            "votes": self.check_voting_complete,
+            "bans": self.check_bans_complete,
+            "sélections": self.check_selections_complete,
+        }
+        await checks[phase](bot, game_id)
+    
+    @timed("transition_seconds", phase="votes")
+    async def check_voting_complete(self, bot, game_id: str):
+        """
+        Check if all players finished voting and start ban phase
+        
+        Runs as a background job: errors propagate so the job gets retried,
+        and steps already done on a previous attempt are skipped.
+        """
+        game = self.get_game(game_id, fresh=True)
+        if not game or game.get("ban_phase_announced"):
             return
         
+        self.progress.notify(bot, game_id)
+        
         # Check if all voted
         all_complete = True
         for player_id in game["players"]:
@@ -55,42 +546,46 @@ class GameManager:
         if not all_complete:
             return
         
-        # Start ban phase
-        game["banning_started"] = True
-        self.save()
+        # Start ban phase and draw the settings
+        if not game.get("banning_started"):
+            self.record(
+                game, "banning_started",
+                final_settings=calculate_weighted_results(game.get("votes", {}), GAME_OPTIONS, self.vote_weights(game)),
+                deadline=self._new_deadline("banning")
+            )
+            self._schedule_deadline(game, "banning")
+            self.save(game)
+            self.progress.notify(bot, game_id)
         
         # Post results to thread
-        channel_id = game.get("thread_id") or game.get("results_channel_id")
-        if not channel_id:
+        if not (game.get("thread_id") or game.get("results_channel_id")):
             return
         
-        try:
-            channel = await bot.fetch_channel(channel_id)
-            
-            # Calculate and show results
-            weighted_results = calculate_weighted_results(game.get("votes", {}), GAME_OPTIONS)
-            game["final_settings"] = weighted_results
-            self.save()
-            
-            results_msg = format_vote_results(weighted_results)
-            await channel.send(results_msg)
-            await channel.send(
-                f"✅ Tous les joueurs ont voté ! Les paramètres ont été tirés.\n"
-                f"🚫 La phase de ban commence maintenant ! Chaque joueur peut bannir jusqu'à **{game.get('max_bans', 2)}** civilisations."
-            )
-            
-            # Send ban interface to players
-            await self._send_ban_interfaces(bot, game_id, weighted_results, channel)
-            
-        except Exception as e:
-            print(f"Erreur lors du démarrage de la phase de ban: {e}")
+        channel = await self.get_game_channel(bot, game)
+        weighted_results = game["final_settings"]
+        
+        results_msg = format_vote_results(weighted_results)
+        await self.messages.send_many(channel, [
+            results_msg,
+            f"✅ Tous les joueurs ont voté ! Les paramètres ont été tirés.\n"
+            f"🚫 La phase de ban commence maintenant ! Chaque joueur peut bannir jusqu'à **{game.get('max_bans', 2)}** civilisations."
+            + self._deadline_notice(game, "banning")
+        ])
+        self.record(game, "phase_announced", phase="ban")
+        self.save()
+        
+        # Send ban interface to players
+        await self._send_ban_interfaces(bot, game_id, weighted_results, channel)
     
+    @timed("transition_seconds", phase="bans")
     async def check_bans_complete(self, bot, game_id: str):
-        """Check if all players finished banning and start selection phase"""
-        game = self.get_game(game_id)
-        if not game or game.get("selection_started"):
+        """Check if all players finished banning and start selection phase (background job)"""
+        game = self.get_game(game_id, fresh=True)
+        if not game or game.get("selection_phase_announced"):
             return
         
+        self.progress.notify(bot, game_id)
+        
         # Check if all banned
         all_complete = all(
             str(player_id) in game.get("bans", {})
@@ -100,57 +595,67 @@ class GameManager:
         if not all_complete:
             return
         
-        # Start selection phase
-        game["selection_started"] = True
-        self.save()
-        
-        # Assign civ pools
-        banned_civs = []
-        for bans in game.get("bans", {}).values():
-            banned_civs.extend(bans)
-        banned_civs = list(set(banned_civs))
-        
-        available = get_available_civs(banned_civs)
-        pools = assign_civ_pools(available, len(game["players"]), game.get("civ_pool_size", 3))
-        
-        if not pools:
-            channel_id = game.get("thread_id") or game.get("results_channel_id")
-            if channel_id:
+        if not game.get("selection_started"):
+            # Start selection phase, saved with the pools below
+            self.record(game, "selection_started")
+            self.progress.notify(bot, game_id)
+            
+            # Assign civ pools
+            banned_civs = []
+            for bans in game.get("bans", {}).values():
+                banned_civs.extend(bans)
+            banned_civs = list(set(banned_civs))
+            
+            available = get_available_civs(banned_civs)
+            pools = assign_civ_pools(available, len(game["players"]), game.get("civ_pool_size", 3))
+            
+            if not pools:
+                self.save(game)
                 try:
-                    channel = await bot.fetch_channel(channel_id)
-                    await channel.send("❌ Erreur: Pas assez de civilisations disponibles!")
+                    channel = await self.get_game_channel(bot, game)
+                    if channel:
+                        await self.messages.send(channel, "❌ Erreur: Pas assez de civilisations disponibles!")
                 except:
                     pass
-            return
+                return
+            
+            # Store pools
+            self.record(
+                game, "civ_pools_drawn",
+                civ_pools={str(game["players"][i]): pools[i] for i in range(len(game["players"]))},
+                deadline=self._new_deadline("selection")
+            )
+            self._clear_deadline(game, "banning")
+            self._schedule_deadline(game, "selection")
+            self.save(game)
         
-        # Store pools
-        game["civ_pools"] = {
-            str(game["players"][i]): pools[i]
-            for i in range(len(game["players"]))
-        }
-        self.save()
+        if not game.get("civ_pools"):
+            return
         
         # Notify in thread
-        channel_id = game.get("thread_id") or game.get("results_channel_id")
-        if channel_id:
-            try:
-                channel = await bot.fetch_channel(channel_id)
-                await channel.send(
-                    f"✅ Tous les joueurs ont terminé leurs bans!\n"
-                    f"🎯 La phase de sélection commence ! Chaque joueur va recevoir {game.get('civ_pool_size', 3)} civilisations et doit en choisir une."
-                )
-            except Exception as e:
-                print(f"Erreur lors de la notification: {e}")
+        channel = await self.get_game_channel(bot, game)
+        if channel:
+            await self.messages.send(
+                channel,
+                f"✅ Tous les joueurs ont terminé leurs bans!\n"
+                f"🎯 La phase de sélection commence ! Chaque joueur va recevoir {game.get('civ_pool_size', 3)} civilisations et doit en choisir une."
+                + self._deadline_notice(game, "selection")
+            )
+        self.record(game, "phase_announced", phase="selection")
+        self.save()
         
         # Send selection interfaces
-        await self._send_selection_interfaces(bot, game_id, channel if channel_id else None)
+        await self._send_selection_interfaces(bot, game_id, channel)
     
+    @timed("transition_seconds", phase="selections")
     async def check_selections_complete(self, bot, game_id: str):
-        """Check if all players selected civilizations and show final results"""
-        game = self.get_game(game_id)
-        if not game:
+        """Check if all players selected civilizations and show final results (background job)"""
+        game = self.get_game(game_id, fresh=True)
+        if not game or game.get("results_posted"):
             return
         
+        self.progress.notify(bot, game_id)
+        
         # Check if all selected
         all_complete = all(
             str(player_id) in game.get("civ_selections", {})
@@ -161,16 +666,72 @@ class GameManager:
             return
         
         # Post final results
-        channel_id = game.get("thread_id") or game.get("results_channel_id")
-        if channel_id:
-            try:
-                channel = await bot.fetch_channel(channel_id)
-                await self._send_final_results(channel, game_id)
-                await channel.send(
-                    f"🎊 Tous les joueurs ont choisi leur civilisation ! Les résultats finaux sont ci-dessus."
-                )
-            except Exception as e:
-                print(f"Erreur lors de la création des résultats finaux: {e}")
+        channel = await self.get_game_channel(bot, game)
+        if channel:
+            await self._send_final_results(
+                bot, channel, game_id,
+                footer="🎊 Tous les joueurs ont choisi leur civilisation ! Les résultats finaux sont ci-dessus."
+            )
+        self.record(game, "results_posted")
+        self._clear_deadline(game, "selection")
+        self.save()
+        # In its own job: this one returns early once the results are posted, so it would never retry a failed update
+        self.jobs.submit("analytics", game_id, self.record_analytics, game_id)
+        # Last edit of the board: shows the lobby finished, then forgets its rate limit
+        self.progress.notify(bot, game_id)
+    
+    async def record_analytics(self, game_id: str):
+        """Add a finished game to the statistics (background job, counted once per game)"""
+        game = self.get_game(game_id)
+        if game and game.get("results_posted"):
+            self.analytics.record_game(game, game["finished_at"])
+    
+    async def send_vote_interfaces(self, bot, game_id: str, fallback_channel_id: int):
+        """Announce the votes in the lobby thread (or the channel of /create) and DM every player their ballot"""
+        game = self.get_game(game_id)
+        if not game:
+            return
+        
+        channel = None
+        try:
+            channel = await self.get_game_channel(bot, game) or await self.get_channel(bot, fallback_channel_id)
+            await self.messages.send(
+                channel,
+                "🗳️ Les votes ont commencé ! Chaque joueur va recevoir un message privé."
+            )
+        except Exception as e:
+            print(f"⚠️ Impossible d'annoncer les votes de la partie {game_id}: {e}")
+        
+        async def send_to(player_id):
+            user = await self.users.get_user(bot, player_id)
+            await self.messages.send(
+                user,
+                vote_page_content(game_id, 0),
+                view=VoteView(game_id, player_id),
+                priority=PRIORITY_DM
+            )
+            print(f"✅ Message envoyé à {user.name} ({player_id})")
+        
+        results = await asyncio.gather(
+            *(send_to(player_id) for player_id in game["players"]),
+            return_exceptions=True
+        )
+        
+        failed_users = []
+        for player_id, result in zip(game["players"], results):
+            if isinstance(result, discord.Forbidden):
+                failed_users.append(f"<@{player_id}>")
+                print(f"❌ {player_id} a bloqué les MPs du bot")
+            elif isinstance(result, Exception):
+                failed_users.append(f"<@{player_id}>")
+                print(f"❌ Erreur lors de l'envoi du message à {player_id}: {result}")
+        
+        if failed_users and channel is not None:
+            await self.messages.send(
+                channel,
+                f"⚠️ Impossible d'envoyer les MPs à : {', '.join(failed_users)}\n"
+                "Ils doivent activer les MPs depuis les membres du serveur dans leurs paramètres de confidentialité."
+            )
     
     async def _send_ban_interfaces(self, bot, game_id: str, weighted_results: Dict, channel):
         """Send ban interface to all players"""
@@ -178,74 +739,42 @@ class GameManager:
         if not game:
             return
         
+        async def send_to(player_id):
+            user = await self.users.get_user(bot, player_id)
+            await self._send_ban_interface_to_user(
+                user, game_id, player_id, 
+                game.get("max_bans", 2), 
+                weighted_results
+            )
+        
+        # DMs go through the scheduler, so all players can be served concurrently
+        results = await asyncio.gather(
+            *(send_to(player_id) for player_id in game["players"]),
+            return_exceptions=True
+        )
+        
         failed_users = []
-        for player_id in game["players"]:
-            try:
-                user = await bot.fetch_user(player_id)
-                await self._send_ban_interface_to_user(
-                    user, game_id, player_id, 
-                    game.get("max_bans", 2), 
-                    weighted_results
-                )
-            except Exception as e:
+        for player_id, result in zip(game["players"], results):
+            if isinstance(result, Exception):
                 failed_users.append(f"<@{player_id}>")
-                print(f"❌ Erreur lors de l'envoi du ban à {player_id}: {e}")
+                print(f"❌ Erreur lors de l'envoi du ban à {player_id}: {result}")
         
         if failed_users and channel:
-            await channel.send(
+            await self.messages.send(
+                channel,
                 f"⚠️ Impossible d'envoyer la phase de ban à : {', '.join(failed_users)}"
             )
     
     async def _send_ban_interface_to_user(self, user, game_id: str, user_id: int, max_bans: int, weighted_results: Dict):
         """Send ban interface to a single user"""
-        # Settings summary
-        settings_summary = "\n".join([
-            f"• **{cat}**: {res['selected']}" 
-            for cat, res in weighted_results.items()
-        ])
+        game = self.get_game(game_id)
         
-        # Split civs into chunks
-        civ_chunks = []
-        current_chunk = []
-        current_length = 0
-        
-        for civ, emoji in CIV_EMOJI_CONFIG.items():
-            line = f"{emoji} {civ}\n"
-            if current_length + len(line) > 1800:
-                civ_chunks.append(current_chunk)
-                current_chunk = [line]
-                current_length = len(line)
-            else:
-                current_chunk.append(line)
-                current_length += len(line)
-        
-        if current_chunk:
-            civ_chunks.append(current_chunk)
-        
-        # Send intro
-        await user.send(
-            f"🚫 **Phase de Ban - Partie {game_id}**\n\n"
-            f"📋 **Paramètres de la partie:**\n{settings_summary}\n\n"
-            f"Tu peux bannir jusqu'à **{max_bans}** civilisations."
-        )
+        # Intro, civ list embeds and controls packed into as few messages as possible
+        payloads = self.renders.ban_dm(game)
+        payloads[-1]["view"] = BanCollectorView(game_id, user_id)
         
-        # Send civ lists
-        for i, chunk in enumerate(civ_chunks, 1):
-            msg = f"**📜 Liste des Civilisations ({i}/{len(civ_chunks)}):**\n"
-            msg += "".join(chunk)
-            await user.send(msg)
-        
-        # Send control interface
-        ban_view = BanCollectorView(self, game_id, user_id, max_bans)
-        await user.send(
-            f"**🎯 Comment bannir des civilisations:**\n\n"
-            f"1️⃣ **Copie les emojis** des civilisations que tu veux bannir\n"
-            f"2️⃣ Clique sur **📝 Entrer mes bans**\n"
-            f"3️⃣ **Colle les emojis** dans la fenêtre\n"
-            f"4️⃣ Clique sur **✅ Confirmer mes bans** quand tu as fini\n\n"
-            f"💡 **Astuce:** Tu peux entrer plusieurs emojis à la fois!",
-            view=ban_view
-        )
+        for payload in payloads:
+            await self.messages.send(user, priority=PRIORITY_DM, **payload)
     
     async def _send_selection_interfaces(self, bot, game_id: str, channel):
         """Send selection interface to all players"""
@@ -253,112 +782,75 @@ class GameManager:
         if not game:
             return
         
-        failed_users = []
-        for player_id in game["players"]:
-            try:
-                user = await bot.fetch_user(player_id)
-                player_civs = game["civ_pools"].get(str(player_id), [])
-                
-                if not player_civs:
-                    print(f"⚠️ Aucune civilisation disponible pour {player_id}")
-                    continue
-                
-                civ_list = "\n".join([
-                    f"{CIV_EMOJI_CONFIG[civ]} [{civ}]({LEADERS_TO_LINK[civ]})" 
-                    for civ in player_civs
-                ])
-
-                embed = discord.Embed(
-                    title=f"🎯 Phase de Sélection - Partie {game_id}",
-                    description=(
-                        f"**Tes civilisations disponibles ({len(player_civs)}):**\n{civ_list}\n\n"
-                        f"Choisis UNE civilisation parmi cette liste."
-                    ),
-                    color=0x3498db
-                )
-
-                await user.send(embed=embed)
-
-                selection_view = CivSelectionView(self, game_id, player_id, player_civs)
+        async def send_to(player_id):
+            user = await self.users.get_user(bot, player_id)
+            player_civs = game["civ_pools"].get(str(player_id), [])
+            
+            if not player_civs:
+                print(f"⚠️ Aucune civilisation disponible pour {player_id}")
+                return
+            
+            embed = discord.Embed(
+                title=f"🎯 Phase de Sélection - Partie {game_id}",
+                description=render_selection_pool(player_civs),
+                color=0x3498db
+            )
 
-                instructions = (
-                    "**🎯 Comment choisir ta civilisation:**\n\n"
-                    "1️⃣ **Copie l'emoji** de la civilisation\n"
-                    "2️⃣ Clique sur **📝 Choisir ma civilisation**\n"
-                    "3️⃣ **Colle l'emoji** dans la fenêtre\n"
-                    "4️⃣ Clique sur **✅ Confirmer**\n\n"
-                    "💡 **Astuce:** Choisis parmi ta liste!"
-                )
+            selection_view = CivSelectionView(game_id, player_id)
 
-                await user.send(instructions, view=selection_view)
-                
-            except Exception as e:
+            # Pool and controls in a single message
+            await self.messages.send(
+                user, SELECTION_INSTRUCTIONS, embed=embed, view=selection_view, priority=PRIORITY_DM
+            )
+        
+        results = await asyncio.gather(
+            *(send_to(player_id) for player_id in game["players"]),
+            return_exceptions=True
+        )
+        
+        failed_users = []
+        for player_id, result in zip(game["players"], results):
+            if isinstance(result, Exception):
                 failed_users.append(f"<@{player_id}>")
-                print(f"❌ Erreur lors de l'envoi de la sélection à {player_id}: {e}")
+                print(f"❌ Erreur lors de l'envoi de la sélection à {player_id}: {result}")
         
         if failed_users and channel:
-            await channel.send(
+            await self.messages.send(
+                channel,
                 f"⚠️ Impossible d'envoyer la phase de sélection à : {', '.join(failed_users)}"
             )
     
-    async def _send_final_results(self, channel, game_id: str):
+    async def _send_final_results(self, bot, channel, game_id: str, footer: Optional[str] = None):
         """Send final results to thread"""
         game = self.get_game(game_id)
         if not game:
             return
         
-        weighted_results = game.get("final_settings", {})
-        
-        # Settings
-        settings_msg = f"# 🎮 Résultats Finaux - Partie {game_id}\n\n"
-        settings_msg += "## 🎲 Configuration sélectionnée\n\n"
-        
-        for category, result_data in weighted_results.items():
-            selected = result_data["selected"]
-            votes_count = result_data["votes"]
-            total_votes = sum(votes_count.values())
-            winning_votes = votes_count.get(selected, 0)
-            settings_msg += f"**{category}**: {selected} ({winning_votes}/{total_votes} votes)\n"
-        
-        await channel.send(settings_msg)
-        
-        # Player selections
-        selections_msg = "## 👑 Civilisations choisies par les joueurs\n\n"
-        
-        civ_selections = game.get("civ_selections", {})
-        if civ_selections:
-            for player_id, civ in civ_selections.items():
-                try:
-                    user = await channel.guild.get_member(int(player_id)) or await channel.guild.fetch_member(int(player_id))
-                    emoji = CIV_EMOJI_CONFIG.get(civ, "")
-                    selections_msg += f"{emoji} **{user.name}**: {civ}\n"
-                except:
-                    emoji = CIV_EMOJI_CONFIG.get(civ, "")
-                    selections_msg += f"{emoji} **Joueur {player_id}**: {civ}\n"
-        else:
-            selections_msg += "*Aucune sélection effectuée*\n"
-        
-        await channel.send(selections_msg)
+        names = await self._member_names(bot, channel, game.get("civ_selections", {}).keys())
+        messages = list(self.renders.final_results(game, names))
+        if footer:
+            messages.append(footer)
         
-        # Banned civs
-        bans_msg = "## 🚫 Civilisations bannies\n\n"
-        
-        all_bans = {}
-        for player_id, bans in game.get("bans", {}).items():
-            for ban in bans:
-                if ban not in all_bans:
-                    all_bans[ban] = []
-                all_bans[ban].append(player_id)
-        
-        if all_bans:
-            sorted_bans = sorted(all_bans.items(), key=lambda x: len(x[1]), reverse=True)
-            for civ, banners in sorted_bans[:30]:
-                emoji = CIV_EMOJI_CONFIG.get(civ, "")
-                bans_msg += f"{emoji} **{civ}** - {len(banners)} ban(s)\n"
-            
-            if len(sorted_bans) > 30:
-                bans_msg += f"\n*Et {len(sorted_bans) - 30} autres civilisations bannies...*\n"
-        else:
-            bans_msg += "*Aucune civilisation bannie*\n"
-        
-        await channel.send(bans_msg)
+        # Queued together so the scheduler can merge them into as few messages as possible
+        await self.messages.send_many(channel, messages)
+    
+    async def _member_names(self, bot, channel, player_ids) -> Dict[str, str]:
+        """
+        Resolve names of players, skipping the ones that can't be found
+        
+        Goes through the user cache rather than guild members: usernames are the
+        same, and it works when the member cache is disabled (lean profile).
+        """
+        player_ids = list(player_ids)
+        if getattr(channel, "guild", None) is None:
+            return {}
+        
+        members = await asyncio.gather(
+            *(self.users.get_user(bot, player_id) for player_id in player_ids),
+            return_exceptions=True
+        )
+        return {
+            player_id: member.name
+            for player_id, member in zip(player_ids, members)
+            if not isinstance(member, Exception)
+        }
@@ -0,0 +1,166 @@
+"""
+In-process background job queue for phase transitions
+"""
+import asyncio
+import itertools
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from core.metrics import metrics
+
+
+PENDING = "pending"
+RUNNING = "running"
+RETRYING = "retrying"
+DONE = "done"
+FAILED = "failed"
+
+STATUS_LABELS = {
+    PENDING: "⏳ en attente",
+    RUNNING: "⚙️ en cours",
+    RETRYING: "🔁 nouvel essai prévu",
+    DONE: "✅ terminé",
+    FAILED: "❌ échec",
+}
+
+
+class Job:
+    """A unit of background work (usually a phase transition for one game)"""
+
+    def __init__(self, job_id: int, kind: str, game_id: str, func: Callable[..., Awaitable[Any]], args: Tuple):
+        self.id = job_id
+        self.kind = kind
+        self.game_id = game_id
+        self.func = func
+        self.args = args
+        self.status = PENDING
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.rerun = False
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.kind, self.game_id)
+
+    def describe(self) -> str:
+        """One-line status for users"""
+        line = f"{STATUS_LABELS[self.status]} — {self.kind} (essai {max(self.attempts, 1)})"
+        if self.error and self.status in (RETRYING, FAILED):
+            line += f": {self.error}"
+        return line
+
+
+class JobQueue:
+    """
+    Async job queue served by a pool of workers
+
+    Jobs are deduplicated per (kind, game_id): submitting a job that is already
+    pending is a no-op, and submitting one that is running schedules a single
+    re-run once it finishes. Failed jobs are retried with exponential backoff.
+    """
+
+    def __init__(self, workers: int = 4, max_attempts: int = 3, backoff: float = 2.0, history: int = 200):
+        self.worker_count = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._ids = itertools.count(1)
+        self._active: Dict[Tuple[str, str], Job] = {}
+        self.history: Deque[Job] = deque(maxlen=history)
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        metrics.collect(self._collect_metrics)
+
+    def submit(self, kind: str, game_id: str, func: Callable[..., Awaitable[Any]], *args) -> Job:
+        """Queue a job without waiting for it"""
+        self._ensure_workers()
+
+        active = self._active.get((kind, game_id))
+        if active is not None:
+            if active.status == RUNNING:
+                active.rerun = True
+            return active
+
+        job = Job(next(self._ids), kind, game_id, func, args)
+        self._active[job.key] = job
+        self.history.append(job)
+        self._queue.put_nowait(job)
+        return job
+
+    def _ensure_workers(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        loop = asyncio.get_running_loop()
+        while len(self._workers) < self.worker_count:
+            self._workers.append(loop.create_task(self._work()))
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status = RUNNING
+        job.attempts += 1
+        job.rerun = False
+        try:
+            await job.func(*job.args)
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            if job.attempts < self.max_attempts:
+                job.status = RETRYING
+                self.retries += 1
+                metrics.inc("job_retries_total", kind=job.kind)
+                delay = self.backoff ** job.attempts
+                print(f"🔁 Job {job.kind} ({job.game_id}) échoué, nouvel essai dans {delay:.0f}s: {e}")
+                asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, job)
+                return
+            job.status = FAILED
+            self.failed += 1
+            print(f"❌ Job {job.kind} ({job.game_id}) abandonné après {job.attempts} essais: {e}")
+        else:
+            job.status = DONE
+            job.error = None
+            self.completed += 1
+
+        job.finished_at = time.time()
+        self._active.pop(job.key, None)
+
+        if job.rerun:
+            # New events arrived while running: check again with fresh state
+            self.submit(job.kind, job.game_id, job.func, *job.args)
+
+    def busy(self, game_id: str) -> bool:
+        """Whether a job of the game is pending, running or waiting for a retry"""
+        return any(key[1] == game_id for key in self._active)
+
+    def jobs_for(self, game_id: str, limit: int = 5) -> List[Job]:
+        """Most recent jobs of a game"""
+        jobs = [job for job in reversed(self.history) if job.game_id == game_id]
+        return jobs[:limit]
+
+    def _collect_metrics(self) -> None:
+        stats = self.stats()
+        for status in (PENDING, RUNNING, RETRYING):
+            metrics.set("job_queue_depth", stats[status], status=status)
+
+    def stats(self) -> Dict[str, int]:
+        """Queue depth and job counters"""
+        statuses = [job.status for job in self._active.values()]
+        return {
+            "pending": statuses.count(PENDING),
+            "running": statuses.count(RUNNING),
+            "retrying": statuses.count(RETRYING),
+            "completed": self.completed,
+            "failed": self.failed,
+            "retries": self.retries,
+        }
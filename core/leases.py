@@ -0,0 +1,141 @@
+"""
+Lobby ownership leases shared by several bot processes
+"""
+import json
+import os
+import socket
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+from core.storage import file_lock, write_json_atomic
+
+
+class LeaseManager:
+    """
+    Time-limited ownership of lobbies, recorded in a shared JSON file
+
+    The owner of a lobby runs its background work (transitions, deadlines,
+    progress board). Leases are renewed every `ttl / 3` seconds; when a process
+    dies its leases expire after `ttl` and another process claims the lobbies.
+    A process shutting down releases its leases so peers take over at once.
+    """
+
+    def __init__(self, path: str = "data/leases.json", owner: Optional[str] = None, ttl: float = 30.0):
+        self.path = path
+        self.owner = owner or os.getenv("WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+        self.ttl = ttl
+        # lobby id -> expiry of the leases we hold
+        self._held: Dict[str, float] = {}
+        # Lobbies other processes held at the last `orphans` call
+        self._foreign: Set[str] = set()
+
+    def _read(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError, IOError):
+            return {}
+
+    def _write(self, leases: Dict[str, Dict], now: float) -> None:
+        # Drop expired leases so the file doesn't grow with finished lobbies
+        write_json_atomic(self.path, {key: lease for key, lease in leases.items() if lease["expires"] > now}, indent=2)
+
+    def claim(self, key: str) -> bool:
+        """Hold the lease of a lobby: True if we already own it or it was free or expired"""
+        now = time.time()
+        if self._held.get(key, 0) > now + self.ttl / 3:
+            return True
+
+        with file_lock(self.path):
+            leases = self._read()
+            lease = leases.get(key)
+            if lease and lease["owner"] != self.owner and lease["expires"] > now:
+                self._held.pop(key, None)
+                return False
+            leases[key] = {"owner": self.owner, "expires": now + self.ttl}
+            self._write(leases, now)
+        self._held[key] = now + self.ttl
+        return True
+
+    def claim_many(self, keys: Iterable[str]) -> Set[str]:
+        """Claim several lobbies with a single write, returning those we hold"""
+        now = time.time()
+        keys = [key for key in keys if self._held.get(key, 0) <= now + self.ttl / 3]
+        held = {key for key, expires in self._held.items() if expires > now}
+        if not keys:
+            return held
+
+        with file_lock(self.path):
+            leases = self._read()
+            claimed = False
+            for key in keys:
+                lease = leases.get(key)
+                if lease and lease["owner"] != self.owner and lease["expires"] > now:
+                    self._held.pop(key, None)
+                    held.discard(key)
+                    continue
+                leases[key] = {"owner": self.owner, "expires": now + self.ttl}
+                self._held[key] = now + self.ttl
+                held.add(key)
+                claimed = True
+            if claimed:
+                self._write(leases, now)
+        return held
+
+    def holds(self, key: str) -> bool:
+        """Whether we hold a lease that doesn't need renewing yet (no I/O)"""
+        return self._held.get(key, 0) > time.time() + self.ttl / 3
+
+    def orphans(self) -> List[str]:
+        """
+        Lobbies another process held at the previous call and no longer does:
+        released on shutdown, or expired because the process stopped
+        """
+        now = time.time()
+        live = {key for key, lease in self._read().items() if lease["owner"] != self.owner and lease["expires"] > now}
+        orphans = [key for key in self._foreign if key not in live]
+        self._foreign = live
+        return orphans
+
+    def renew(self) -> List[str]:
+        """Extend every lease we hold, returning the lobbies lost to another process"""
+        if not self._held:
+            return []
+
+        now = time.time()
+        lost = []
+        with file_lock(self.path):
+            leases = self._read()
+            for key in list(self._held):
+                lease = leases.get(key)
+                if lease and lease["owner"] != self.owner and lease["expires"] > now:
+                    lost.append(key)
+                    del self._held[key]
+                    continue
+                leases[key] = {"owner": self.owner, "expires": now + self.ttl}
+                self._held[key] = now + self.ttl
+            self._write(leases, now)
+        return lost
+
+    def release(self, key: Optional[str] = None) -> None:
+        """Give up the lease of a lobby, or all our leases"""
+        self.release_many([key] if key is not None else list(self._held))
+
+    def release_many(self, keys: Iterable[str]) -> None:
+        """Give up the leases of several lobbies with a single write"""
+        keys = list(keys)
+        if not keys:
+            return
+
+        now = time.time()
+        with file_lock(self.path):
+            leases = self._read()
+            for k in keys:
+                if leases.get(k, {}).get("owner") == self.owner:
+                    del leases[k]
+                self._held.pop(k, None)
+            self._write(leases, now)
+
+    def held(self) -> List[str]:
+        """Lobbies this process currently owns"""
+        return list(self._held)
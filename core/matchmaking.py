@@ -0,0 +1,232 @@
+"""
+Matchmaking queue: players wait with their preferences until a lobby forms
+"""
+import bisect
+import json
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.storage import file_lock, write_json_atomic
+
+
+# (guild id, max bans, civ pool size): players of a bucket can share a lobby
+BucketKey = Tuple[Optional[int], int, int]
+
+
+def bucket_of(entry: Dict) -> BucketKey:
+    return (entry["guild_id"], entry["max_bans"], entry["civ_pool_size"])
+
+
+def _fits(window: List[Tuple[float, float, int]], entries: Dict[int, Dict]) -> bool:
+    """Whether every player of a rating-sorted window accepts the others' ratings"""
+    low, high = window[0][0], window[-1][0]
+    for rating, _, user_id in window:
+        gap = entries[user_id]["max_gap"]
+        if gap is not None and max(rating - low, high - rating) > gap:
+            return False
+    return True
+
+
+def find_group(ordered: List[Tuple[float, float, int]], entries: Dict[int, Dict], size: int) -> Optional[List[int]]:
+    """
+    Players of a bucket forming a lobby, None when no group is compatible
+
+    A group whose ratings are the closest is a run of `size` consecutive
+    players of the rating-sorted bucket, so only those runs are checked. Among
+    the compatible ones, the run holding the longest-waiting player wins.
+    """
+    best: Optional[Tuple[float, int]] = None
+    for i in range(len(ordered) - size + 1):
+        window = ordered[i:i + size]
+        if not _fits(window, entries):
+            continue
+        oldest = min(queued_at for _, queued_at, _ in window)
+        if best is None or oldest < best[0]:
+            best = (oldest, i)
+    if best is None:
+        return None
+    return [user_id for _, _, user_id in ordered[best[1]:best[1] + size]]
+
+
+class MatchQueue:
+    """
+    Queued players, indexed by bucket and sorted by rating inside a bucket
+
+    Players only match within their bucket (same server and lobby settings);
+    a bucket keeps (rating, queue time, user id) sorted, so a compatible
+    rating range is a run of neighbours. Only buckets that changed since the
+    last pass, or whose players backing off (`retry_at`) are ready again, are
+    searched. The queue lives in a file shared by every process and is
+    updated under its lock, so a player ends up in a single lobby.
+    """
+
+    def __init__(self, path: str = "data/queue.json"):
+        self.path = path
+        # user id -> entry, in queueing order
+        self.entries: Dict[int, Dict] = {}
+        self.buckets: Dict[BucketKey, List[Tuple[float, float, int]]] = {}
+        self._dirty: set = set()
+        # bucket -> earliest `retry_at` of its players backing off
+        self._deferred: Dict[BucketKey, float] = {}
+        self._signature: Optional[Tuple[int, int]] = None
+
+    def _disk_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def refresh(self) -> None:
+        """Reload the queue if another process changed it"""
+        signature = self._disk_signature()
+        if signature == self._signature:
+            return
+        self._signature = signature
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError, IOError):
+            data = []
+        self.entries = {}
+        self.buckets = {}
+        self._deferred = {}
+        for entry in sorted(data, key=lambda entry: entry["queued_at"]):
+            self.entries[entry["user_id"]] = entry
+            self.buckets.setdefault(bucket_of(entry), []).append(self._key(entry))
+            self._defer(entry)
+        for ordered in self.buckets.values():
+            ordered.sort()
+        self._dirty = set(self.buckets)
+
+    def _write(self) -> None:
+        write_json_atomic(self.path, list(self.entries.values()))
+        self._signature = self._disk_signature()
+
+    @staticmethod
+    def _key(entry: Dict) -> Tuple[float, float, int]:
+        return (entry["rating"], entry["queued_at"], entry["user_id"])
+
+    def _defer(self, entry: Dict) -> None:
+        retry_at = entry.get("retry_at")
+        if retry_at:
+            bucket = bucket_of(entry)
+            self._deferred[bucket] = min(self._deferred.get(bucket, retry_at), retry_at)
+
+    def _add(self, entry: Dict) -> None:
+        self._remove(entry["user_id"])
+        self.entries[entry["user_id"]] = entry
+        bucket = bucket_of(entry)
+        bisect.insort(self.buckets.setdefault(bucket, []), self._key(entry))
+        self._dirty.add(bucket)
+        self._defer(entry)
+
+    def _wake_deferred(self, now: float) -> None:
+        """Mark changed the buckets where a player's backoff ended"""
+        for bucket, due in list(self._deferred.items()):
+            if due > now:
+                continue
+            del self._deferred[bucket]
+            self._dirty.add(bucket)
+            for _, _, user_id in self.buckets.get(bucket, ()):
+                if self.entries[user_id].get("retry_at", 0) > now:
+                    self._defer(self.entries[user_id])
+
+    def _remove(self, user_id: int) -> Optional[Dict]:
+        entry = self.entries.pop(user_id, None)
+        if entry is None:
+            return None
+        bucket = bucket_of(entry)
+        ordered = self.buckets[bucket]
+        del ordered[bisect.bisect_left(ordered, self._key(entry))]
+        if not ordered:
+            del self.buckets[bucket]
+            self._dirty.discard(bucket)
+        return entry
+
+    def add(self, entries: Iterable[Dict]) -> None:
+        """Queue players, replacing their previous preferences"""
+        with file_lock(self.path):
+            self._signature = None
+            self.refresh()
+            for entry in entries:
+                self._add(entry)
+            # Players put back in the queue keep their place among the longest waiting
+            queued_at = [entry["queued_at"] for entry in self.entries.values()]
+            if queued_at != sorted(queued_at):
+                self.entries = dict(sorted(self.entries.items(), key=lambda item: item[1]["queued_at"]))
+            self._write()
+
+    def leave(self, user_id: int) -> Optional[Dict]:
+        """Take a player out of the queue, returning their entry"""
+        with file_lock(self.path):
+            self._signature = None
+            self.refresh()
+            entry = self._remove(user_id)
+            if entry is not None:
+                self._write()
+        return entry
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        self.refresh()
+        return self.entries.get(user_id)
+
+    def waiting(self, entry: Dict) -> int:
+        """Number of players queued in the same bucket as `entry`"""
+        self.refresh()
+        return len(self.buckets.get(bucket_of(entry), ()))
+
+    def match(self, size: int, max_wait: Optional[float] = None,
+              serves: Callable[[Optional[int]], bool] = lambda guild_id: True) -> List[List[Dict]]:
+        """
+        Take the groups of `size` compatible players out of the queue
+
+        Entries older than `max_wait` seconds are dropped first; only buckets
+        of servers this process `serves` are searched.
+        """
+        self.refresh()
+        now = time.time()
+        self._wake_deferred(now)
+        if not self._expired(now, max_wait) and not any(
+            serves(bucket[0]) and len(self.buckets[bucket]) >= size for bucket in self._dirty
+        ):
+            return []
+
+        groups = []
+        with file_lock(self.path):
+            # Reloaded only if another process wrote meanwhile, which marks every bucket changed
+            self.refresh()
+            self._wake_deferred(now)
+            expired = self._expired(now, max_wait)
+            for entry in expired:
+                self._remove(entry["user_id"])
+            for bucket in list(self._dirty):
+                if not serves(bucket[0]):
+                    continue
+                self._dirty.discard(bucket)
+                while len(self.buckets.get(bucket, ())) >= size:
+                    # Players backing off after a failed lobby wait out of the search
+                    ready = [key for key in self.buckets[bucket] if self.entries[key[2]].get("retry_at", 0) <= now]
+                    group = find_group(ready, self.entries, size) if len(ready) >= size else None
+                    if group is None:
+                        break
+                    groups.append([self._remove(user_id) for user_id in group])
+            if expired or groups:
+                self._write()
+        return groups
+
+    def _expired(self, now: float, max_wait: Optional[float]) -> List[Dict]:
+        """Entries queued more than `max_wait` seconds ago (the dict keeps queueing order)"""
+        expired = []
+        if max_wait is None:
+            return expired
+        for entry in self.entries.values():
+            if now - entry["queued_at"] <= max_wait:
+                break
+            expired.append(entry)
+        return expired
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self.entries)
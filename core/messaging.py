@@ -0,0 +1,317 @@
+"""
+Rate-limit-aware outbound message scheduler
+"""
+import asyncio
+import itertools
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+import discord
+
+from core.metrics import metrics
+
+
+# Lower value = sent first
+PRIORITY_INTERACTION = 0
+PRIORITY_DM = 1
+PRIORITY_INFO = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTION: "interaction",
+    PRIORITY_DM: "dm",
+    PRIORITY_INFO: "info",
+}
+
+MAX_MESSAGE_LENGTH = 2000
+
+# Keyword arguments that make a message impossible to merge with another one
+COALESCE_BLOCKERS = {"view", "embed", "embeds", "file", "files", "reference"}
+
+# Seconds between two sweeps of the route buckets that are idle and full
+BUCKET_EVICT_INTERVAL = 60.0
+
+
+class TokenBucket:
+    """Token bucket limiting the send rate of a single route"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds to wait before a token is available"""
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now: float) -> None:
+        """Take one token"""
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, seconds: float, now: float) -> None:
+        """Stop sending on this route for a while (after a 429)"""
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0.0
+
+    def full(self, now: float) -> bool:
+        """Whether a fresh bucket would behave the same (refilled, not blocked)"""
+        self._refill(now)
+        return self.tokens >= self.capacity and now >= self.blocked_until
+
+
+class OutgoingMessage:
+    """A queued message waiting for its route to be free"""
+
+    def __init__(self, destination, route: str, priority: int, seq: int,
+                 content: Optional[str], kwargs: Dict[str, Any], future: asyncio.Future, coalesce: bool = True):
+        self.destination = destination
+        self.route = route
+        self.priority = priority
+        self.seq = seq
+        self.content = content
+        self.kwargs = kwargs
+        self.future = future
+        self.coalesce = coalesce
+        self.enqueued_at = time.monotonic()
+
+    @property
+    def coalescible(self) -> bool:
+        """Plain text messages can be merged with their neighbours"""
+        return self.coalesce and bool(self.content) and not (COALESCE_BLOCKERS & self.kwargs.keys())
+
+    def can_merge(self, other: "OutgoingMessage") -> bool:
+        """Check if this message can be appended to another one"""
+        return self.coalescible and other.coalescible and self.kwargs == other.kwargs
+
+
+class MessageScheduler:
+    """
+    Central async send queue shared by every outbound message of the bot
+
+    Each destination (channel, DM, interaction webhook) is a route with its own
+    token bucket, on top of a global bucket. Routes are served by priority and
+    messages of a route are always delivered in order. Consecutive plain text
+    messages queued on the same route are merged into a single message, which
+    every merged sender receives: callers that keep the returned message (to
+    edit or pin it) must send with ``coalesce=False``.
+
+    Initial interaction responses (``interaction.response.*``) must still be
+    sent directly: Discord gives them a 3 second deadline and they do not
+    count against the channel rate limits.
+    """
+
+    def __init__(
+        self,
+        route_rate: float = 1.0,
+        route_capacity: int = 5,
+        global_rate: float = 40.0,
+        global_capacity: int = 40
+    ):
+        self.route_rate = route_rate
+        self.route_capacity = route_capacity
+        self.global_bucket = TokenBucket(global_rate, global_capacity)
+        # Route -> bucket, dropped once idle and full (a DM route is often used for a single lobby)
+        self.buckets: Dict[str, TokenBucket] = {}
+        self._evicted_at = time.monotonic()
+        self.routes: Dict[str, Deque[OutgoingMessage]] = {}
+        self.in_flight: Set[str] = set()
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        # Deliveries in progress, referenced until they finish
+        self._deliveries: Set[asyncio.Task] = set()
+
+        # Metrics
+        self.sent = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self.failed = 0
+        self.waits: Deque[float] = deque(maxlen=1000)
+        metrics.collect(self._collect_metrics)
+
+    async def send(self, destination, content: Optional[str] = None, *, priority: int = PRIORITY_INFO,
+                   coalesce: bool = True, **kwargs):
+        """
+        Queue a message and wait until it has been delivered
+
+        Returns the sent message, shared with the messages merged into it
+        unless `coalesce` is False.
+        """
+        return await self._enqueue(destination, content, priority, kwargs, coalesce)
+
+    async def send_many(self, destination, contents: List[str], *, priority: int = PRIORITY_INFO, **kwargs) -> List:
+        """Queue several messages at once so they can be coalesced"""
+        futures = [self._enqueue(destination, content, priority, dict(kwargs)) for content in contents]
+        return list(await asyncio.gather(*futures))
+
+    def _enqueue(self, destination, content, priority, kwargs, coalesce: bool = True) -> asyncio.Future:
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        route = self._route_for(destination)
+        message = OutgoingMessage(destination, route, priority, next(self._seq), content, kwargs, future, coalesce)
+        self.routes.setdefault(route, deque()).append(message)
+        self._wakeup.set()
+        return future
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    @staticmethod
+    def _route_for(destination) -> str:
+        """Rate limit key of a destination"""
+        if isinstance(destination, discord.Webhook):
+            return f"webhook:{destination.id}:{hash(destination.token)}"
+        if isinstance(destination, (discord.User, discord.Member)):
+            return f"dm:{destination.id}"
+        return f"channel:{getattr(destination, 'id', id(destination))}"
+
+    def _bucket(self, route: str) -> TokenBucket:
+        bucket = self.buckets.get(route)
+        if bucket is None:
+            bucket = TokenBucket(self.route_rate, self.route_capacity)
+            self.buckets[route] = bucket
+        return bucket
+
+    def _next_route(self, now: float) -> Tuple[Optional[str], Optional[float]]:
+        """Pick the ready route with the most urgent head message"""
+        global_delay = self.global_bucket.delay(now)
+        best = None
+        best_key = None
+        min_wait = None
+
+        for route, queue in self.routes.items():
+            if not queue or route in self.in_flight:
+                continue
+            wait = max(global_delay, self._bucket(route).delay(now))
+            if wait > 0:
+                min_wait = wait if min_wait is None else min(min_wait, wait)
+                continue
+            key = (queue[0].priority, queue[0].seq)
+            if best_key is None or key < best_key:
+                best, best_key = route, key
+
+        return best, min_wait
+
+    def _evict_buckets(self, now: float) -> None:
+        """Forget the buckets of routes with nothing queued or in flight that refilled"""
+        self._evicted_at = now
+        for route in [route for route, bucket in self.buckets.items() if bucket.full(now)]:
+            if route not in self.routes and route not in self.in_flight:
+                del self.buckets[route]
+
+    def _take_batch(self, route: str) -> List[OutgoingMessage]:
+        """Pop the head message of a route, merged with the following ones when possible"""
+        queue = self.routes[route]
+        batch = [queue.popleft()]
+        if batch[0].coalescible:
+            length = len(batch[0].content)
+            while queue and queue[0].can_merge(batch[0]) and length + 1 + len(queue[0].content) <= MAX_MESSAGE_LENGTH:
+                message = queue.popleft()
+                length += 1 + len(message.content)
+                batch.append(message)
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            if now - self._evicted_at >= BUCKET_EVICT_INTERVAL:
+                self._evict_buckets(now)
+            route, wait = self._next_route(now)
+
+            if route is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            batch = self._take_batch(route)
+            self._bucket(route).consume(now)
+            self.global_bucket.consume(now)
+            self.in_flight.add(route)
+            task = asyncio.get_running_loop().create_task(self._deliver(route, batch))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, route: str, batch: List[OutgoingMessage]) -> None:
+        head = batch[0]
+        kwargs = dict(head.kwargs)
+        if head.content is not None:
+            kwargs["content"] = "\n".join(m.content for m in batch)
+
+        try:
+            result = await head.destination.send(**kwargs)
+        except (discord.RateLimited, discord.HTTPException) as e:
+            if isinstance(e, discord.RateLimited) or e.status == 429:
+                retry_after = getattr(e, "retry_after", None) or 1.0
+                self.rate_limited += 1
+                self._bucket(route).block(retry_after, time.monotonic())
+                self.routes.setdefault(route, deque()).extendleft(reversed(batch))
+                print(f"⚠️ Limite d'envoi atteinte sur {route}, nouvel essai dans {retry_after:.1f}s")
+            else:
+                self._fail(batch, e)
+        except Exception as e:
+            self._fail(batch, e)
+        else:
+            now = time.monotonic()
+            self.sent += 1
+            self.coalesced += len(batch) - 1
+            for message in batch:
+                self.waits.append(now - message.enqueued_at)
+                metrics.observe("message_queue_wait_seconds", now - message.enqueued_at,
+                                priority=PRIORITY_NAMES.get(message.priority, str(message.priority)))
+                if not message.future.done():
+                    message.future.set_result(result)
+        finally:
+            self.in_flight.discard(route)
+            if not self.routes.get(route):
+                self.routes.pop(route, None)
+            self._wakeup.set()
+
+    def _fail(self, batch: List[OutgoingMessage], error: Exception) -> None:
+        self.failed += 1
+        for message in batch:
+            if not message.future.done():
+                message.future.set_exception(error)
+
+    def _collect_metrics(self) -> None:
+        stats = self.stats()
+        for priority, depth in stats["queue_depth_by_priority"].items():
+            metrics.set("message_queue_depth", depth, priority=priority)
+        metrics.set("message_routes_in_flight", stats["routes_in_flight"])
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and wait time metrics"""
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for queue in self.routes.values():
+            for message in queue:
+                depth[PRIORITY_NAMES.get(message.priority, str(message.priority))] += 1
+
+        waits = sorted(self.waits)
+        return {
+            "queue_depth": sum(depth.values()),
+            "queue_depth_by_priority": depth,
+            "routes_in_flight": len(self.in_flight),
+            "route_buckets": len(self.buckets),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "rate_limited": self.rate_limited,
+            "failed": self.failed,
+            "wait_avg": sum(waits) / len(waits) if waits else 0.0,
+            "wait_p95": waits[int(len(waits) * 0.95)] if waits else 0.0,
+            "wait_max": waits[-1] if waits else 0.0,
+        }
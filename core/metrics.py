@@ -0,0 +1,218 @@
+"""
+In-process metrics (counters, gauges and latency histograms) exported in Prometheus text format
+"""
+import asyncio
+import functools
+import os
+import time
+import weakref
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+
+# Upper bounds in seconds, from a fast button click to a slow phase transition
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus expects it"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Registry of counters, gauges and histograms keyed by name and labels"""
+
+    def __init__(self):
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.gauges: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        # Bound methods setting gauges from live state, called before each export
+        self._collectors: List[weakref.WeakMethod] = []
+
+    @staticmethod
+    def _labels(labels: Dict[str, str]) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Increment a counter"""
+        series = self.counters.setdefault(name, {})
+        key = self._labels(labels)
+        series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        """Set a gauge"""
+        self.gauges.setdefault(name, {})[self._labels(labels)] = value
+
+    def collect(self, method: Callable[[], None]) -> None:
+        """
+        Call a bound method before each export, to set gauges (queue depths)
+        without touching them on every change; dropped with its object
+        """
+        self._collectors.append(weakref.WeakMethod(method))
+
+    def _run_collectors(self) -> None:
+        alive = []
+        for reference in self._collectors:
+            method = reference()
+            if method is None:
+                continue
+            alive.append(reference)
+            try:
+                method()
+            except Exception as e:
+                print(f"⚠️ Erreur lors de la collecte des métriques: {e}")
+        self._collectors = alive
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record a value (seconds) in a histogram"""
+        series = self.histograms.setdefault(name, {})
+        key = self._labels(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        histogram.observe(value)
+
+    @contextmanager
+    def time(self, name: str, **labels) -> Iterator[None]:
+        """Time a block into a histogram, labelled with its status (ok or error)"""
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, status=status, **labels)
+
+    def timed(self, name: str, **labels):
+        """Decorator timing every call of a coroutine function (see `time`)"""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.time(name, **labels):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def render(self) -> str:
+        """All series in Prometheus text exposition format"""
+        self._run_collectors()
+        lines: List[str] = []
+        for name, series in sorted(self.counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+
+        for name, series in sorted(self.gauges.items()):
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+
+        for name, series in sorted(self.histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (key, value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+# Shared by the cog, the views and the game manager
+metrics = Metrics()
+timed = metrics.timed
+
+
+def _counting(request):
+    """Wrap a discord.py `request(route, ...)` to count its calls by route and outcome"""
+    import discord
+
+    @functools.wraps(request)
+    async def wrapper(route, *args, **kwargs):
+        call = f"{route.method} {route.path}"
+        try:
+            result = await request(route, *args, **kwargs)
+        except discord.RateLimited:
+            metrics.inc("discord_api_calls_total", call=call, status="rate_limited")
+            raise
+        except discord.HTTPException as e:
+            metrics.inc("discord_api_calls_total", call=call, status="rate_limited" if e.status == 429 else "error")
+            raise
+        except Exception:
+            metrics.inc("discord_api_calls_total", call=call, status="error")
+            raise
+        metrics.inc("discord_api_calls_total", call=call, status="ok")
+        return result
+
+    return wrapper
+
+
+def count_api_calls(client) -> None:
+    """
+    Count every Discord API call of the bot in `discord_api_calls_total`
+
+    Bot requests go through `client.http.request`; interaction responses and
+    followups go through the webhook adapter's `request`: both are wrapped,
+    so nothing is counted (or missed) at the call sites.
+    """
+    from discord.webhook.async_ import async_context
+
+    client.http.request = _counting(client.http.request)
+    adapter = async_context.get()
+    adapter.request = _counting(adapter.request)
+
+
+async def serve(port: int, host: str = "127.0.0.1"):
+    """Serve the metrics on http://host:port/metrics (aiohttp ships with discord.py)"""
+    from aiohttp import web
+
+    async def handle(request):
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    print(f"📊 Métriques disponibles sur http://{host}:{port}/metrics")
+    return runner
+
+
+async def dump_periodically(path: str, interval: float = 15.0) -> None:
+    """Write the metrics to a file every `interval` seconds (for node_exporter's textfile collector)"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(metrics.render())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"❌ Erreur lors de l'écriture des métriques: {e}")
@@ -0,0 +1,202 @@
+"""
+Player → games index, kept up to date from the event log
+"""
+from collections import Counter
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
+
+from core.diagnostics import phase_label
+from core.events import EventLog
+from core.prefix_index import PrefixIndex
+
+
+# Event -> phase label the game enters (same labels as `phase_label`)
+EVENT_PHASES = {
+    "voting_started": "votes",
+    "banning_started": "bans",
+    "selection_started": "sélection",
+    "results_posted": "terminée",
+}
+
+
+class PlayerStats:
+    """Counters of one player, over finished lobbies"""
+
+    __slots__ = ("created", "joined", "finished", "picks", "bans")
+
+    def __init__(self):
+        self.created = 0
+        self.joined = 0
+        self.finished = 0
+        self.picks: Counter = Counter()
+        self.bans: Counter = Counter()
+
+
+class PlayerIndex:
+    """
+    Active and finished lobbies of every player, with per-player statistics
+
+    Built once from the game store, then updated by reading the events
+    appended to the log since the last query (by any process), so answering
+    for a player never depends on how many games are stored. Deleting a lobby
+    removes it from its players' lists; statistics of finished lobbies stay.
+    """
+
+    def __init__(self, log: EventLog):
+        self.log = log
+        self._offset = 0
+        # game id -> summary (players, phase, thread, guild, pending picks and bans)
+        self.games: Dict[str, Dict] = {}
+        # player id -> game ids, in joining order
+        self.active: Dict[int, Dict[str, None]] = {}
+        self.finished: Dict[int, Dict[str, None]] = {}
+        self.stats: Dict[int, PlayerStats] = {}
+        # Ids of the lobbies in progress, for game_id autocomplete
+        self.ids = PrefixIndex()
+        # creator id -> lobbies in progress they created
+        self.created: Dict[int, Dict[str, None]] = {}
+
+    def build(self, games: Iterable[Dict]) -> None:
+        """Index the stored games; events logged from now on are applied by `catch_up`"""
+        self._offset = self.log.size()
+        for game in games:
+            summary = self._add_game(game["id"], game, index=False)
+            for player_id in game.get("players", []):
+                self._join(game["id"], player_id)
+            summary["phase"] = phase_label(game)
+            summary["picks"] = dict(game.get("civ_selections", {}))
+            summary["bans"] = {player_id: list(bans) for player_id, bans in game.get("bans", {}).items()}
+            if game.get("results_posted"):
+                self._finish(game["id"])
+        # Sorted once rather than one insertion per game
+        self.ids = PrefixIndex(
+            game_id for game_id, summary in self.games.items() if summary["phase"] != EVENT_PHASES["results_posted"]
+        )
+
+    def catch_up(self) -> None:
+        """Apply the events appended since the last call"""
+        if self.log.size() == self._offset:
+            return
+        for self._offset, event in self.log.read(self._offset):
+            self.apply(event)
+
+    def apply(self, event: Dict) -> None:
+        game_id = event["game"]
+        data = event["data"]
+        kind = event["type"]
+
+        if kind == "game_created":
+            self._add_game(game_id, data["game"])
+            return
+        summary = self.games.get(game_id)
+        if summary is None:
+            return
+
+        if kind == "player_joined":
+            self._join(game_id, data["player_id"])
+        elif kind == "thread_created":
+            summary["thread_id"] = data["thread_id"]
+        elif kind == "ban_submitted":
+            summary["bans"][str(data["player_id"])] = data["bans"]
+        elif kind == "selection_submitted":
+            summary["picks"][str(data["player_id"])] = data["civ"]
+        elif kind == "phase_expired":
+            field = "bans" if data["phase"] == "banning" else "picks"
+            summary[field].update(data["defaults"])
+        elif kind == "game_deleted":
+            self._delete(game_id)
+
+        if kind in EVENT_PHASES:
+            summary["phase"] = EVENT_PHASES[kind]
+            if kind == "results_posted":
+                self._finish(game_id)
+
+    def _add_game(self, game_id: str, game: Dict, index: bool = True) -> Dict:
+        summary = {
+            "players": [],
+            "creator": game.get("creator"),
+            "guild_id": game.get("guild_id"),
+            "thread_id": game.get("thread_id"),
+            "phase": "inscriptions",
+            "picks": {},
+            "bans": {},
+        }
+        self.games[game_id] = summary
+        if index:
+            self.ids.add(game_id)
+        if summary["creator"] is not None:
+            self._stats(summary["creator"]).created += 1
+            self.created.setdefault(summary["creator"], {})[game_id] = None
+        return summary
+
+    def _stats(self, player_id: int) -> PlayerStats:
+        stats = self.stats.get(player_id)
+        if stats is None:
+            stats = self.stats[player_id] = PlayerStats()
+        return stats
+
+    def _join(self, game_id: str, player_id: int) -> None:
+        summary = self.games[game_id]
+        if player_id in summary["players"]:
+            return
+        summary["players"].append(player_id)
+        self.active.setdefault(player_id, {})[game_id] = None
+        self._stats(player_id).joined += 1
+
+    def _close(self, game_id: str, summary: Dict) -> None:
+        """Take a lobby out of the in-progress indexes"""
+        self.ids.discard(game_id)
+        self.created.get(summary["creator"], {}).pop(game_id, None)
+
+    def _finish(self, game_id: str) -> None:
+        summary = self.games[game_id]
+        self._close(game_id, summary)
+        for player_id in summary["players"]:
+            self.active.get(player_id, {}).pop(game_id, None)
+            self.finished.setdefault(player_id, {})[game_id] = None
+            stats = self._stats(player_id)
+            stats.finished += 1
+            pick = summary["picks"].get(str(player_id))
+            if pick:
+                stats.picks[pick] += 1
+            stats.bans.update(summary["bans"].get(str(player_id), []))
+        # Only the lobby's lists are needed from now on
+        summary["picks"] = {}
+        summary["bans"] = {}
+
+    def _delete(self, game_id: str) -> None:
+        summary = self.games.pop(game_id)
+        self._close(game_id, summary)
+        for player_id in summary["players"]:
+            self.active.get(player_id, {}).pop(game_id, None)
+            self.finished.get(player_id, {}).pop(game_id, None)
+
+    def games_of(self, player_id: int, finished_limit: int = 10) -> Dict[str, List[str]]:
+        """Active lobbies and the most recent finished ones of a player"""
+        self.catch_up()
+        finished = list(self.finished.get(player_id, {}))
+        return {
+            "active": list(self.active.get(player_id, {})),
+            "finished": finished[::-1][:finished_limit],
+        }
+
+    def complete(self, user_id: int, prefix: str, limit: int = 25) -> List[str]:
+        """
+        Ids of the lobbies in progress starting with `prefix` that the user
+        joined or created
+
+        Walks whichever is smaller: the ids with the prefix (a binary-searched
+        range of the sorted index) or the user's own lobbies.
+        """
+        self.catch_up()
+        mine = self.active.get(user_id, {}).keys() | self.created.get(user_id, {}).keys()
+        lo, hi = self.ids.bounds(prefix)
+        if hi - lo <= len(mine):
+            candidates = (game_id for game_id in self.ids.keys[lo:hi] if game_id in mine)
+        else:
+            candidates = iter(sorted(game_id for game_id in mine if game_id.startswith(prefix)))
+        return list(islice(candidates, limit))
+
+    def player_stats(self, player_id: int) -> Optional[PlayerStats]:
+        self.catch_up()
+        return self.stats.get(player_id)
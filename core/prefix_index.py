@@ -0,0 +1,42 @@
+"""
+Sorted string index answering prefix queries with binary search
+"""
+import bisect
+from typing import Iterable, List, Tuple
+
+
+class PrefixIndex:
+    """
+    Set of strings kept sorted, so the keys starting with a prefix form a
+    contiguous range found in O(log n)
+    """
+
+    def __init__(self, keys: Iterable[str] = ()):
+        self.keys: List[str] = sorted(set(keys))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        i = bisect.bisect_left(self.keys, key)
+        return i < len(self.keys) and self.keys[i] == key
+
+    def add(self, key: str) -> None:
+        i = bisect.bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            self.keys.insert(i, key)
+
+    def discard(self, key: str) -> None:
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+
+    def bounds(self, prefix: str) -> Tuple[int, int]:
+        """Index range of the keys starting with `prefix`"""
+        # Every key with the prefix sorts before prefix + the highest code point
+        return bisect.bisect_left(self.keys, prefix), bisect.bisect_left(self.keys, prefix + "\U0010ffff")
+
+    def search(self, prefix: str, limit: int = 25) -> List[str]:
+        """First `limit` keys starting with `prefix`, in order"""
+        lo, hi = self.bounds(prefix)
+        return self.keys[lo:min(hi, lo + limit)]
@@ -0,0 +1,85 @@
+"""
+Live progress board: one pinned message per lobby, edited in place
+"""
+import asyncio
+import time
+from typing import Dict
+
+import discord
+
+from utils.rendering import render_progress
+
+
+class ProgressBoard:
+    """Keeps each lobby's pinned progress message up to date, at most one edit per interval"""
+
+    def __init__(self, game_manager, interval: float = 5.0):
+        self.game_manager = game_manager
+        self.interval = interval
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._last_edit: Dict[str, float] = {}
+        self.edits = 0
+
+    async def publish(self, bot, game: Dict, channel) -> None:
+        """Post and pin the progress message of a new lobby (saved with the game by the caller)"""
+        names = await self.game_manager.users.get_names(bot, game["players"])
+        # Kept to be pinned and edited: not merged with other thread messages
+        message = await self.game_manager.messages.send(channel, render_progress(game, names), coalesce=False)
+
+        try:
+            await message.pin()
+        except discord.HTTPException as e:
+            print(f"⚠️ Impossible d'épingler le suivi de la partie {game['id']}: {e}")
+
+        game["progress_message_id"] = message.id
+
+    def notify(self, bot, game_id: str) -> None:
+        """Schedule a refresh of a lobby's board (debounced)"""
+        if game_id in self._pending:
+            # The scheduled edit will render the latest state
+            return
+
+        delay = max(0.0, self._last_edit.get(game_id, 0.0) + self.interval - time.monotonic())
+        self._pending[game_id] = asyncio.get_running_loop().create_task(self._flush(bot, game_id, delay))
+
+    def forget(self, game_id: str) -> None:
+        """Drop a deleted lobby's scheduled edit and rate limit entry"""
+        task = self._pending.pop(game_id, None)
+        if task is not None:
+            task.cancel()
+        self._last_edit.pop(game_id, None)
+
+    async def _flush(self, bot, game_id: str, delay: float) -> None:
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            # Changes arriving during the edit schedule a new one
+            self._pending.pop(game_id, None)
+
+        self._last_edit[game_id] = time.monotonic()
+        try:
+            await self._edit(bot, game_id)
+        except Exception as e:
+            print(f"⚠️ Erreur lors de la mise à jour du suivi de la partie {game_id}: {e}")
+
+    async def _edit(self, bot, game_id: str) -> None:
+        game = self.game_manager.get_game(game_id)
+        if not game or not game.get("progress_message_id"):
+            self._last_edit.pop(game_id, None)
+            return
+
+        channel = await self.game_manager.get_game_channel(bot, game)
+        if channel is None:
+            return
+
+        names = await self.game_manager.users.get_names(bot, game["players"])
+        try:
+            # Partial message: editing needs no prior fetch
+            await channel.get_partial_message(game["progress_message_id"]).edit(content=render_progress(game, names))
+            self.edits += 1
+            if game.get("results_posted"):
+                # Final state shown: later notifications (placements) are rare, no need to rate limit them
+                self._last_edit.pop(game_id, None)
+        except discord.NotFound:
+            game.pop("progress_message_id", None)
+            self.game_manager.save()
@@ -0,0 +1,176 @@
+"""
+Elo ratings of players, updated from the placements of finished lobbies
+"""
+import bisect
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.storage import file_lock, write_json_atomic
+
+
+DEFAULT_RATING = 1500.0
+K_FACTOR = 32.0
+
+_PLACEMENT_TOKENS = re.compile(r"<@!?(\d+)>|=")
+
+
+def parse_placements(text: str, players: Iterable[int]) -> Tuple[List[List[int]], str]:
+    """
+    Placements typed as mentions from first to last, "=" between tied players
+    ("@a @b = @c @d"), checked against the players of the game
+
+    Returns the placements, or an empty list and the error to show.
+    """
+    players = set(players)
+    placements: List[List[int]] = []
+    tie = False
+    seen = set()
+    for match in _PLACEMENT_TOKENS.finditer(text):
+        if match.group(0) == "=":
+            tie = bool(placements)
+            continue
+        player_id = int(match.group(1))
+        if player_id not in players:
+            return [], f"<@{player_id}> ne fait pas partie de la partie."
+        if player_id in seen:
+            return [], f"<@{player_id}> apparaît plusieurs fois."
+        seen.add(player_id)
+        if tie:
+            placements[-1].append(player_id)
+        else:
+            placements.append([player_id])
+        tie = False
+
+    missing = players - seen
+    if missing:
+        return [], f"Il manque : {', '.join(f'<@{player_id}>' for player_id in missing)}"
+    return placements, ""
+
+
+def elo_changes(placements: List[List[int]], ratings: Dict[int, float], k: float = K_FACTOR) -> Dict[int, float]:
+    """
+    Rating change of every player of a free-for-all game
+
+    `placements` lists the players by rank, tied players sharing a rank. Each
+    player plays a virtual duel against every other one (won when ranked
+    higher, drawn when tied), and K is split over the n - 1 duels so a game
+    weighs the same whatever its size.
+    """
+    ranks = {player_id: rank for rank, tied in enumerate(placements) for player_id in tied}
+    players = list(ranks)
+    if len(players) < 2:
+        return {player_id: 0.0 for player_id in players}
+
+    scale = k / (len(players) - 1)
+    changes = {}
+    for player_id in players:
+        delta = 0.0
+        for other in players:
+            if other == player_id:
+                continue
+            expected = 1 / (1 + 10 ** ((ratings[other] - ratings[player_id]) / 400))
+            if ranks[player_id] < ranks[other]:
+                actual = 1.0
+            elif ranks[player_id] == ranks[other]:
+                actual = 0.5
+            else:
+                actual = 0.0
+            delta += scale * (actual - expected)
+        changes[player_id] = delta
+    return changes
+
+
+class RatingStore:
+    """
+    Player ratings with a sorted index for the leaderboard
+
+    The index keeps (-rating, player id) pairs sorted, so the rank of a player
+    and a leaderboard page are binary searches. A report updates the file
+    under its lock; other processes pick the change up on their next query.
+    """
+
+    def __init__(self, path: str = "data/ratings.json"):
+        self.path = path
+        # player id -> {"rating", "games"}
+        self.players: Dict[int, Dict] = {}
+        self._order: List[Tuple[float, int]] = []
+        self._signature: Optional[Tuple[int, int]] = None
+
+    def _disk_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def refresh(self) -> None:
+        """Reload the ratings if another process changed them"""
+        signature = self._disk_signature()
+        if signature == self._signature:
+            return
+        self._signature = signature
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError, IOError):
+            data = {}
+        self.players = {int(player_id): entry for player_id, entry in data.items()}
+        self._order = sorted((-entry["rating"], player_id) for player_id, entry in self.players.items())
+
+    def rating(self, player_id: int) -> float:
+        self.refresh()
+        entry = self.players.get(player_id)
+        return entry["rating"] if entry else DEFAULT_RATING
+
+    def ratings(self, player_ids) -> Dict[int, float]:
+        self.refresh()
+        return {
+            player_id: self.players[player_id]["rating"] if player_id in self.players else DEFAULT_RATING
+            for player_id in player_ids
+        }
+
+    def _set(self, player_id: int, rating: float) -> None:
+        entry = self.players.get(player_id)
+        if entry is not None:
+            i = bisect.bisect_left(self._order, (-entry["rating"], player_id))
+            del self._order[i]
+        else:
+            entry = self.players[player_id] = {"rating": DEFAULT_RATING, "games": 0}
+        entry["rating"] = rating
+        entry["games"] += 1
+        bisect.insort(self._order, (-rating, player_id))
+
+    def apply(self, placements: List[List[int]]) -> Dict[int, Tuple[float, float]]:
+        """Rate a game: player id -> (old rating, new rating)"""
+        with file_lock(self.path):
+            self._signature = None
+            self.refresh()
+            old = self.ratings(player_id for tied in placements for player_id in tied)
+            changes = elo_changes(placements, old)
+            for player_id, delta in changes.items():
+                self._set(player_id, old[player_id] + delta)
+            write_json_atomic(self.path, {str(player_id): entry for player_id, entry in self.players.items()})
+            self._signature = self._disk_signature()
+        return {player_id: (old[player_id], old[player_id] + delta) for player_id, delta in changes.items()}
+
+    def rank(self, player_id: int) -> Optional[Tuple[int, int]]:
+        """1-based rank of a rated player and the number of rated players"""
+        self.refresh()
+        entry = self.players.get(player_id)
+        if entry is None:
+            return None
+        return bisect.bisect_left(self._order, (-entry["rating"], player_id)) + 1, len(self._order)
+
+    def page(self, start: int, count: int = 10) -> List[Tuple[int, int, Dict]]:
+        """(rank, player id, entry) of the players ranked from `start` (0-based)"""
+        self.refresh()
+        return [
+            (start + i + 1, player_id, self.players[player_id])
+            for i, (_, player_id) in enumerate(self._order[start:start + count])
+        ]
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._order)
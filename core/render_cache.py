@@ -0,0 +1,87 @@
+"""
+Cached message rendering for ban, selection and final results messages
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional
+
+import discord
+
+from utils.rendering import civ_list_embed_chunks, pack_embed_chunks, render_ban_intro, render_final_results
+
+
+CIV_LIST_COLOR = 0xe74c3c
+
+
+class RenderCache:
+    """Static embeds built once on first use, per-game renders memoized by game version"""
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._memo: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._civ_list_groups: Optional[List[List[discord.Embed]]] = None
+        self.hits = 0
+        self.misses = 0
+
+    def warm(self) -> None:
+        """Build the static civilization list embeds"""
+        self._civ_list_groups = [
+            [discord.Embed(title=title, description=description, color=CIV_LIST_COLOR) for title, description in group]
+            for group in pack_embed_chunks(list(civ_list_embed_chunks()))
+        ]
+
+    @property
+    def civ_list_groups(self) -> List[List[discord.Embed]]:
+        """Civilization list embeds, grouped by message"""
+        if self._civ_list_groups is None:
+            self.warm()
+        return self._civ_list_groups
+
+    def memoize(self, key: Hashable, render: Callable[[], Any]) -> Any:
+        """Return a memoized render, computing it on first use"""
+        if key in self._memo:
+            self.hits += 1
+            self._memo.move_to_end(key)
+            return self._memo[key]
+
+        self.misses += 1
+        value = render()
+        self._memo[key] = value
+        if len(self._memo) > self.max_size:
+            self._memo.popitem(last=False)
+        return value
+
+    def ban_dm(self, game: Dict) -> List[Dict[str, Any]]:
+        """
+        Message payloads of the ban DM, packed into as few messages as possible
+
+        The intro goes into the first message and the civilization list into
+        embeds; the caller attaches the ban view to the last payload.
+        """
+        def render():
+            texts = render_ban_intro(game["id"], game.get("max_bans", 2), game.get("final_settings", {}))
+            payloads = [{"embeds": group} for group in self.civ_list_groups]
+            payloads[0]["content"] = texts[0]
+            if len(texts) > 1:
+                if len(payloads) > 1:
+                    payloads[-1]["content"] = texts[1]
+                else:
+                    payloads.append({"content": texts[1]})
+            return payloads
+
+        key = ("ban_dm", game["id"], game.get("version", 0))
+        return [dict(payload) for payload in self.memoize(key, render)]
+
+    def final_results(self, game: Dict, names: Mapping[str, str]) -> List[str]:
+        """Final results sections, re-rendered only when the game or player names change"""
+        key = ("final", game["id"], game.get("version", 0), tuple(sorted(names.items())))
+        return self.memoize(key, lambda: render_final_results(
+            game["id"],
+            game.get("final_settings", {}),
+            game.get("civ_selections", {}),
+            game.get("bans", {}),
+            names
+        ))
+
+    def stats(self) -> Dict[str, int]:
+        """Memo size and hit/miss counters"""
+        return {"size": len(self._memo), "hits": self.hits, "misses": self.misses}
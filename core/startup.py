@@ -0,0 +1,174 @@
+"""
+Startup helpers: conditional command sync and time-to-ready report
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import discord
+
+
+COMMAND_HASH_FILE = "data/command_tree.json"
+
+
+def command_tree_hash(tree: discord.app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    """Hash of the command payloads that `tree.sync(guild=guild)` would upload"""
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+        key=lambda command: command["name"]
+    )
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _load_hashes(path: str) -> Dict[str, str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_hashes(path: str, hashes: Dict[str, str]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(hashes, f, indent=2)
+
+
+async def sync_if_changed(
+    tree: discord.app_commands.CommandTree,
+    guild: Optional[discord.abc.Snowflake] = None,
+    path: str = COMMAND_HASH_FILE,
+    force: bool = False
+) -> bool:
+    """
+    Sync the command tree only when it differs from the last synced one
+
+    The hash of the last synced tree is kept on disk per target (guild id or
+    "global"), so restarts and reconnects skip the sync API call entirely.
+    Returns True if a sync was made.
+    """
+    target = str(guild.id) if guild is not None else "global"
+    current = command_tree_hash(tree, guild)
+    hashes = _load_hashes(path)
+
+    if not force and hashes.get(target) == current:
+        return False
+
+    await tree.sync(guild=guild)
+    hashes[target] = current
+    _save_hashes(path, hashes)
+    return True
+
+
+def client_options(profile: str = "default") -> Dict[str, Any]:
+    """
+    Gateway intents and cache settings for a bot profile
+
+    "default" keeps discord.py's defaults. "lean" only asks for what the bot
+    uses: interactions need no intent, and the guilds intent keeps the channel
+    and thread caches (and their update/delete events) working. Members and
+    messages are not cached and guilds are not chunked at startup; names are
+    resolved through the TTL user cache instead.
+    """
+    if profile == "lean":
+        return {
+            "intents": discord.Intents(guilds=True),
+            "member_cache_flags": discord.MemberCacheFlags.none(),
+            "max_messages": None,
+            "chunk_guilds_at_startup": False,
+        }
+    if profile != "default":
+        raise ValueError(f"Profil inconnu: {profile} (attendu: default ou lean)")
+    return {"intents": discord.Intents.default()}
+
+
+def memory_usage_mb() -> Optional[float]:
+    """Resident memory of the process in MB (None if it can't be measured)"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current usage; in KB on Linux but bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
+
+
+def parse_shard_ids(value: Optional[str]) -> Optional[List[int]]:
+    """Parse a shard selection like "0-3" or "0,2,5" (None/empty means all shards)"""
+    if not value:
+        return None
+    shard_ids = []
+    for part in value.split(","):
+        start, _, end = part.strip().partition("-")
+        try:
+            shard_ids.extend(range(int(start), int(end or start) + 1))
+        except ValueError:
+            raise ValueError(f"SHARD_IDS invalide: {value} (attendu: 0-3 ou 0,2,5)") from None
+    return sorted(set(shard_ids))
+
+
+def shard_options(shard_count: Optional[str], shard_ids: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    AutoShardedBot arguments for SHARD_COUNT and SHARD_IDS, None when the bot
+    isn't sharded
+
+    discord.py needs an explicit shard count to run a subset of the shards,
+    so SHARD_IDS requires a numeric SHARD_COUNT (not "auto") and every id
+    must be below it.
+    """
+    ids = parse_shard_ids(shard_ids)
+    if not shard_count:
+        if ids is not None:
+            raise ValueError("SHARD_IDS nécessite SHARD_COUNT (nombre total de shards)")
+        return None
+    if shard_count == "auto":
+        if ids is not None:
+            raise ValueError("SHARD_IDS nécessite un SHARD_COUNT numérique, pas auto")
+        return {"shard_count": None}
+    try:
+        count = int(shard_count)
+    except ValueError:
+        raise ValueError(f"SHARD_COUNT invalide: {shard_count} (attendu: un nombre ou auto)") from None
+    if count < 1:
+        raise ValueError(f"SHARD_COUNT invalide: {shard_count} (au moins 1 shard)")
+    if ids is not None and ids[-1] >= count:
+        raise ValueError(f"SHARD_IDS {shard_ids} hors des {count} shards (0 à {count - 1})")
+    return {"shard_count": count, "shard_ids": ids}
+
+
+class StartupTimer:
+    """Records named startup steps and prints a time-to-ready report"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.steps: List[Tuple[str, float]] = []
+
+    def mark(self, step: str) -> float:
+        """Record the time spent since the previous mark"""
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._last = now
+        self.steps.append((step, elapsed))
+        return elapsed
+
+    @property
+    def total(self) -> float:
+        return self._last - self.started
+
+    def report(self) -> str:
+        lines = [f"⏱️ Démarrage en {self.total:.2f}s"]
+        memory = memory_usage_mb()
+        if memory is not None:
+            lines[0] += f", mémoire: {memory:.1f} MB"
+        lines.extend(f"   • {step}: {elapsed * 1000:.0f} ms" for step, elapsed in self.steps)
+        return "\n".join(lines)
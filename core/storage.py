@@ -1,64 +1,198 @@
 import json
 import os
-from typing import Dict, Any, List, Optional
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Set, Tuple
+from core.metrics import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, run a single process
+    fcntl = None
+
+
+_MISSING = object()
+
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive lock shared by every process using `path` (held on a sidecar .lock file)"""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def write_json_atomic(path: str, data: Any, indent: Optional[int] = None) -> bytes:
+    """
+    Write JSON through a temporary file so readers never see a partial file
+
+    Without `indent`, json uses its C encoder, several times faster on large files.
+    Returns the written bytes.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    encoded = json.dumps(data, indent=indent, ensure_ascii=False).encode("utf-8")
+    with open(tmp_path, 'wb') as f:
+        f.write(encoded)
+    os.replace(tmp_path, path)
+    metrics.inc("storage_writes_total", file=os.path.basename(path))
+    metrics.inc("storage_write_bytes_total", len(encoded), file=os.path.basename(path))
+    return encoded
+
+
+def merge3(base: Any, ours: Any, theirs: Any) -> Any:
+    """
+    Three-way merge of JSON values, recursing into objects
+
+    Keys changed on one side only keep that side's value, so two processes
+    recording different players' votes in the same game both survive. When both
+    sides changed the same value, ours wins.
+    """
+    if ours == base:
+        return theirs
+    if theirs == base or theirs == ours:
+        return ours
+    if not (isinstance(base, dict) and isinstance(ours, dict) and isinstance(theirs, dict)):
+        return ours
+
+    merged = {}
+    for key in list(ours) + [key for key in theirs if key not in ours]:
+        value = merge3(base.get(key, _MISSING), ours.get(key, _MISSING), theirs.get(key, _MISSING))
+        if value is not _MISSING:
+            merged[key] = value
+    return merged
+
 
 class Storage:
-    """Simple JSON-based storage for game data"""
+    """
+    JSON-based storage for game data, safe to share between processes
+
+    Writes happen under a file lock: the file is re-read if another process
+    changed it, merged into memory (see `merge3`), then replaced atomically.
+    Reads are served from memory; callers that need other processes' writes
+    call `refresh` first (every save does).
+    """
     
     def __init__(self, filepath: str):
         self.filepath = filepath
         self.data: List[Dict[str, Any]] = []
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        # Bumped whenever the items may have changed (load, merge, save)
+        self.generation = 0
+        # File content as last read or written: base of the three-way merge,
+        # only decoded when another process changed the file
+        self._base_raw = b"[]"
+        self._deleted: Set[str] = set()
+        self._signature: Optional[Tuple[int, int, int]] = None
         self.load()
     
+    def _disk_signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.filepath)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    
+    def _read(self) -> Tuple[bytes, List[Dict[str, Any]]]:
+        self._signature = self._disk_signature()
+        try:
+            with open(self.filepath, 'rb') as f:
+                raw = f.read()
+            return raw, json.loads(raw)
+        except (FileNotFoundError, json.JSONDecodeError, IOError):
+            return b"[]", []
+    
     def load(self) -> None:
         """Load data from JSON file"""
         if os.path.exists(self.filepath):
-            try:
-                with open(self.filepath, 'r', encoding='utf-8') as f:
-                    self.data = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                self.data = []
+            self._base_raw, self.data = self._read()
+            self._reindex()
         else:
             self.data = []
             # Create directory if it doesn't exist
             os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
             self.save()
     
+    def refresh(self) -> None:
+        """Merge changes written by other processes since the last read or write"""
+        if self._disk_signature() == self._signature:
+            return
+
+        base = {item["id"]: item for item in json.loads(self._base_raw)}
+        self._base_raw, disk_items = self._read()
+        disk = {item["id"]: item for item in disk_items}
+        kept = []
+        for item in self.data:
+            item_id = item.get("id")
+            theirs = disk.pop(item_id, None)
+            if theirs is None:
+                if item_id in base:
+                    continue  # Deleted by another process
+                kept.append(item)  # Not saved yet
+                continue
+            merged = merge3(base.get(item_id, {}), item, theirs)
+            if merged != item:
+                # Update in place: callers may hold a reference to the item
+                item.clear()
+                item.update(merged)
+            kept.append(item)
+
+        # Items created by other processes
+        for item_id, item in disk.items():
+            if item_id not in self._deleted:
+                kept.append(item)
+        self.data = kept
+        self._reindex()
+    
+    def _reindex(self) -> None:
+        self._by_id = {item.get("id"): item for item in self.data}
+        self.generation += 1
+    
     def save(self) -> None:
         """Save data to JSON file"""
-        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
-        with open(self.filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        with file_lock(self.filepath):
+            self.refresh()
+            self._base_raw = write_json_atomic(self.filepath, self.data)
+            self._signature = self._disk_signature()
+            self._deleted.clear()
+            self.generation += 1
     
-    def add(self, item: Dict[str, Any]) -> None:
-        """Add a new item to storage"""
+    def add(self, item: Dict[str, Any], save: bool = True) -> None:
+        """Add a new item to storage (`save=False` to add several before one save)"""
         self.data.append(item)
-        self.save()
+        self._by_id[item.get("id")] = item
+        if save:
+            self.save()
     
     def get_by_id(self, item_id: str) -> Optional[Dict[str, Any]]:
         """Get an item by its ID"""
-        for item in self.data:
-            if item.get("id") == item_id:
-                return item
-        return None
+        return self._by_id.get(item_id)
     
     def update(self, item_id: str, updates: Dict[str, Any]) -> bool:
         """Update an item by its ID"""
-        for item in self.data:
-            if item.get("id") == item_id:
-                item.update(updates)
-                self.save()
-                return True
-        return False
+        item = self._by_id.get(item_id)
+        if item is None:
+            return False
+        item.update(updates)
+        self.save()
+        return True
     
     def delete(self, item_id: str) -> bool:
         """Delete an item by its ID"""
-        for i, item in enumerate(self.data):
-            if item.get("id") == item_id:
-                del self.data[i]
-                self.save()
-                return True
-        return False
+        item = self._by_id.pop(item_id, None)
+        if item is None:
+            return False
+        # By identity: comparing dicts would walk their content
+        self.data = [other for other in self.data if other is not item]
+        self._deleted.add(item_id)
+        self.save()
+        return True
     
     def get_all(self) -> List[Dict[str, Any]]:
         """Get all items from storage"""
@@ -66,5 +200,7 @@ class Storage:
     
     def clear(self) -> None:
         """Clear all data from storage"""
+        self._deleted.update(item["id"] for item in self.data)
         self.data = []
+        self._by_id = {}
         self.save()
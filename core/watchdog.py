@@ -0,0 +1,97 @@
+"""
+Event loop lag watchdog: finds what blocks the loop while it is blocked
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from core.metrics import metrics
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LoopWatchdog:
+    """
+    Measures event loop lag and reports blocking calls
+
+    A task on the loop ticks every `interval` and records how late it woke up.
+    A helper thread watches the ticks: when none happened for `threshold`
+    seconds, the loop is stuck in synchronous code, so it samples the loop
+    thread's stack right then and logs the function that is blocking.
+    """
+
+    def __init__(self, interval: float = 0.25, threshold: float = 0.5):
+        self.interval = interval
+        self.threshold = threshold
+        self._last_tick = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stalls = 0
+        self.max_lag = 0.0
+
+    def start(self) -> None:
+        """Start watching the running loop"""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._tick())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _tick(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - started - self.interval)
+            self._last_tick = now
+            self.max_lag = max(self.max_lag, lag)
+            metrics.observe("loop_lag_seconds", lag)
+
+    def _watch(self) -> None:
+        reported_tick = None
+        while not self._stop.wait(self.interval / 2):
+            last_tick = self._last_tick
+            blocked_for = time.monotonic() - last_tick - self.interval
+            if blocked_for < self.threshold or last_tick == reported_tick:
+                continue
+            # One report per stall: the next one needs the loop to tick again
+            reported_tick = last_tick
+            self.stalls += 1
+            metrics.inc("loop_stalls_total")
+            self._report(blocked_for)
+
+    def _report(self, blocked_for: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return
+        stack = traceback.extract_stack(frame)
+
+        # Innermost frame of our own code: the call that should not be on the loop
+        culprit = next(
+            (entry for entry in reversed(stack) if entry.filename.startswith(PROJECT_ROOT)),
+            stack[-1]
+        )
+        filename = culprit.filename
+        if filename.startswith(PROJECT_ROOT):
+            filename = os.path.relpath(filename, PROJECT_ROOT)
+        location = f"{filename}:{culprit.lineno} {culprit.name}()"
+        metrics.inc("loop_stalls_by_function_total", function=location)
+        print(
+            f"⚠️ Boucle d'événements bloquée depuis {blocked_for:.2f}s dans {location}\n"
+            + "".join(traceback.format_list(stack[-15:]))
+        )
@@ -13,7 +13,8 @@ class Game:
         creator_id: int,
         max_bans: int = 2,
         civ_pool_size: int = 3,
-        thread_id: Optional[int] = None
+        thread_id: Optional[int] = None,
+        guild_id: Optional[int] = None
     ):
         self.id = str(uuid.uuid4())[:8]
         self.creator = creator_id
@@ -29,6 +30,10 @@ class Game:
         self.selection_started = False
         self.results_channel_id: Optional[int] = None
         self.thread_id = thread_id
+        self.guild_id = guild_id
+        self.version = 0
+        self.last_event_seq = 0
+        self.last_event_at: Optional[float] = None
     
     def to_dict(self) -> Dict:
         """Convert game to dictionary for storage"""
@@ -47,6 +52,10 @@ class Game:
             "selection_started": self.selection_started,
             "results_channel_id": self.results_channel_id,
             "thread_id": self.thread_id,
+            "guild_id": self.guild_id,
+            "version": self.version,
+            "last_event_seq": self.last_event_seq,
+            "last_event_at": self.last_event_at,
         }
     
     @classmethod
@@ -67,6 +76,10 @@ class Game:
         game.selection_started = data.get("selection_started", False)
         game.results_channel_id = data.get("results_channel_id")
         game.thread_id = data.get("thread_id")
+        game.guild_id = data.get("guild_id")
+        game.version = data.get("version", 0)
+        game.last_event_seq = data.get("last_event_seq", 0)
+        game.last_event_at = data.get("last_event_at")
         return game
     
     def add_player(self, player_id: int) -> bool:
@@ -0,0 +1,123 @@
+"""
+Fuzzy search of civilizations by leader or civilization name
+"""
+import re
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from core.configs import LEADERS
+
+
+# A typed token matches a name token it starts, or one sharing enough trigrams
+MIN_TOKEN_SCORE = 0.5
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_NAME_SEPARATORS = re.compile(r"[,;\n]+")
+
+
+def fold(text: str) -> str:
+    """Lowercase without accents or punctuation: "Cléopâtre - Ptolémaïque" -> "cleopatre ptolemaique" """
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _NON_ALNUM.sub(" ", stripped.lower()).strip()
+
+
+def split_names(text: str, emojis: Iterable[str] = ()) -> List[str]:
+    """Names typed in a modal: separated by commas, semicolons, new lines or emojis"""
+    for emoji in emojis:
+        text = text.replace(emoji, ",")
+    return [part.strip() for part in _NAME_SEPARATORS.split(text) if fold(part)]
+
+
+def trigrams(token: str) -> FrozenSet[str]:
+    padded = f" {token} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class CivSearchIndex:
+    """
+    Accent-folded trigram index over civilization names
+
+    Every word of "Leader (Civilization)" is indexed, so "cleo ptol" finds
+    Cléopâtre - Ptolémaïque and "perse nader" finds Nader Shah (Perse). Each
+    typed word must match a word of the name, as a prefix or fuzzily (shared
+    trigrams, for typos); names are ranked by how well their words match.
+    """
+
+    def __init__(self, civs: Iterable[str]):
+        self.civs: List[str] = list(civs)
+        # civ index -> [(word, trigrams of the word)]
+        self._tokens: List[List[Tuple[str, FrozenSet[str]]]] = []
+        self._by_trigram: Dict[str, Set[int]] = defaultdict(set)
+        for i, civ in enumerate(self.civs):
+            tokens = [(token, trigrams(token)) for token in dict.fromkeys(fold(civ).split())]
+            self._tokens.append(tokens)
+            for _, grams in tokens:
+                for gram in grams:
+                    self._by_trigram[gram].add(i)
+
+    def _token_score(self, query: str, query_grams: FrozenSet[str], civ: int) -> float:
+        best = 0.0
+        for token, grams in self._tokens[civ]:
+            if token.startswith(query):
+                return 1.0
+            # Dice coefficient of the trigram sets
+            best = max(best, 2 * len(query_grams & grams) / (len(query_grams) + len(grams)))
+        return best
+
+    def search(self, query: str, limit: int = 25, among: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """Best matching civilizations (restricted to `among`) with their score in (0, 1]"""
+        words = fold(query).split()
+        if not words:
+            return []
+        allowed = None if among is None else set(among)
+
+        candidates: Optional[Set[int]] = None
+        scores: Dict[int, float] = defaultdict(float)
+        for word in words:
+            grams = trigrams(word)
+            if len(word) < 2:
+                matches = set(range(len(self.civs)))  # No trigram of a name starts a single letter
+            else:
+                # Names sharing a trigram with the word; the leading trigram covers prefixes
+                matches = set().union(*(self._by_trigram.get(gram, ()) for gram in grams))
+            kept = set()
+            for civ in matches if candidates is None else candidates & matches:
+                score = self._token_score(word, grams, civ)
+                if score >= MIN_TOKEN_SCORE:
+                    scores[civ] += score
+                    kept.add(civ)
+            if not kept:
+                return []
+            candidates = kept
+
+        ranked = sorted(
+            (
+                (self.civs[civ], scores[civ] / len(words))
+                for civ in candidates
+                if allowed is None or self.civs[civ] in allowed
+            ),
+            key=lambda entry: (-entry[1], entry[0])
+        )
+        return ranked[:limit]
+
+    def resolve(self, query: str, among: Optional[Iterable[str]] = None) -> Tuple[Optional[str], List[str]]:
+        """
+        The civilization a typed name designates, or None and the candidates
+        when it is ambiguous (or nothing when no name matches)
+        """
+        results = self.search(query, limit=5, among=among)
+        if not results:
+            return None, []
+        best = [civ for civ, score in results if score == results[0][1]]
+        if len(best) == 1:
+            return best[0], []
+        return None, best
+
+
+@lru_cache(maxsize=1)
+def civ_index() -> CivSearchIndex:
+    """Search index over every civilization, built on first use"""
+    return CivSearchIndex(LEADERS)
@@ -2,7 +2,8 @@
 Civilization-related utility functions
 """
 import random
-from typing import List, Tuple
+import re
+from typing import Dict, List, Tuple
 from core.configs import CIV_EMOJI_CONFIG, LEADERS
 
 
@@ -48,44 +49,54 @@ def assign_civ_pools(
     return pools
 
 
+# A single pictograph (the ranges of the emoji blocks)
+_PICTOGRAPH = (
+    "["
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map symbols
+    "\U0001F1E0-\U0001F1FF"  # flags (iOS)
+    "\U00002500-\U00002BEF"  # chinese char
+    "\U00002702-\U000027B0"
+    "\U000024C2-\U0001F251"
+    "\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
+    "\U00002600-\U000027BF"  # Miscellaneous Symbols
+    "\U0001F650-\U0001F67F"  # Ornamental Dingbats
+    "\U0001F780-\U0001F7FF"  # Geometric Shapes Extended
+    "\U0001FA70-\U0001FAFF"  # Symbols and Pictographs Extended-A
+    "]"
+)
+# Variation selector and skin tone modifiers attached to a pictograph
+_MODIFIERS = "[\ufe0f\U0001F3FB-\U0001F3FF]*"
+
+# One emoji: a pictograph with its modifiers, and the pictographs joined to it
+# by zero width joiners (🕵️‍♀️ is 🕵 + U+FE0F + ZWJ + ♀ + U+FE0F)
+EMOJI_PATTERN = re.compile(
+    # Flags are pairs of regional indicators
+    "[\U0001F1E6-\U0001F1FF]{2}"
+    f"|{_PICTOGRAPH}{_MODIFIERS}(?:\u200d{_PICTOGRAPH}{_MODIFIERS})*"
+)
+
+
+def _bare(emoji: str) -> str:
+    """An emoji without variation selectors: keyboards often leave them out"""
+    return emoji.replace("\ufe0f", "")
+
+
+# emoji without variation selectors -> civilizations using it
+_CIVS_BY_EMOJI: Dict[str, List[str]] = {}
+for _civ, _emoji in CIV_EMOJI_CONFIG.items():
+    _CIVS_BY_EMOJI.setdefault(_bare(_emoji), []).append(_civ)
+
+
 def parse_emoji_from_text(text: str) -> List[str]:
-    """Extract emojis from text input"""
-    import re
-    
-    emoji_pattern = re.compile(
-        "["
-        "\U0001F600-\U0001F64F"  # emoticons
-        "\U0001F300-\U0001F5FF"  # symbols & pictographs
-        "\U0001F680-\U0001F6FF"  # transport & map symbols
-        "\U0001F1E0-\U0001F1FF"  # flags (iOS)
-        "\U00002500-\U00002BEF"  # chinese char
-        "\U00002702-\U000027B0"
-        "\U000024C2-\U0001F251"
-        "\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
-        "\U00002600-\U000027BF"  # Miscellaneous Symbols
-        "\U0001F650-\U0001F67F"  # Ornamental Dingbats
-        "\U0001F780-\U0001F7FF"  # Geometric Shapes Extended
-        "\U0001FA70-\U0001FAFF"  # Symbols and Pictographs Extended-A
-        "]+", 
-        flags=re.UNICODE
-    )
-    
-    found_emojis = emoji_pattern.findall(text)
-    
-    # Check for multi-character emojis
-    if "🕵️‍♀️" in text:
-        found_emojis.append("🕵️‍♀️")
-    
-    return found_emojis
+    """Extract emojis from text input, one per emoji even when typed without spaces"""
+    return EMOJI_PATTERN.findall(text)
 
 
 def emoji_to_civ(emoji: str) -> List[str]:
-    """Get civilization(s) that match an emoji"""
-    matching_civs = []
-    for civ, civ_emoji in CIV_EMOJI_CONFIG.items():
-        if civ_emoji == emoji:
-            matching_civs.append(civ)
-    return matching_civs
+    """Get civilization(s) that match an emoji, with or without variation selectors"""
+    return list(_CIVS_BY_EMOJI.get(_bare(emoji), ()))
 
 
 def emojis_to_civs(emojis: List[str]) -> Tuple[List[str], List[str], List[Tuple[str, List[str]]]]:
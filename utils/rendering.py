@@ -0,0 +1,326 @@
+"""
+Text rendering utilities for DMs and thread messages
+"""
+from functools import lru_cache
+from typing import Dict, List, Mapping, Tuple
+from core.configs import CIV_EMOJI_CONFIG, GAME_OPTIONS, LEADERS_TO_LINK
+
+
+# Discord limits
+MESSAGE_LIMIT = 2000
+EMBED_DESCRIPTION_LIMIT = 4096
+EMBED_TOTAL_LIMIT = 6000
+EMBEDS_PER_MESSAGE = 10
+
+CIVS_PER_PAGE = 25
+
+
+def chunk_lines(lines: List[str], limit: int) -> List[str]:
+    """Join lines into as few chunks as possible, each at most `limit` characters"""
+    chunks = []
+    current = ""
+    for line in lines:
+        if current and len(current) + len(line) > limit:
+            chunks.append(current)
+            current = ""
+        current += line
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def pack_embed_chunks(chunks: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+    """
+    Group (title, description) embed chunks into messages
+
+    Each group respects the embeds-per-message and total-characters limits.
+    """
+    groups = []
+    current = []
+    current_length = 0
+    for title, description in chunks:
+        size = len(title) + len(description)
+        if current and (len(current) >= EMBEDS_PER_MESSAGE or current_length + size > EMBED_TOTAL_LIMIT):
+            groups.append(current)
+            current = []
+            current_length = 0
+        current.append((title, description))
+        current_length += size
+    if current:
+        groups.append(current)
+    return groups
+
+
+@lru_cache(maxsize=None)
+def civ_list_embed_chunks() -> Tuple[Tuple[str, str], ...]:
+    """Full civilization list as (title, description) embed chunks, built once"""
+    lines = [f"{emoji} {civ}\n" for civ, emoji in CIV_EMOJI_CONFIG.items()]
+    descriptions = chunk_lines(lines, EMBED_DESCRIPTION_LIMIT)
+    return tuple(
+        (f"📜 Liste des Civilisations ({i}/{len(descriptions)})", description)
+        for i, description in enumerate(descriptions, 1)
+    )
+
+
+@lru_cache(maxsize=None)
+def render_civ_page(page: int) -> str:
+    """Render one page of the /show_civs listing"""
+    total_pages = civ_page_count()
+    start_idx = (page - 1) * CIVS_PER_PAGE
+    page_civs = list(CIV_EMOJI_CONFIG.items())[start_idx:start_idx + CIVS_PER_PAGE]
+
+    msg = f"## 🗺️ Civilisations (Page {page}/{total_pages})\n\n"
+    for civ, emoji in page_civs:
+        msg += f"{emoji} **{civ}**\n"
+
+    if page < total_pages:
+        msg += f"\n*Utilise `/show_civs page:{page+1}` pour la suite*"
+    return msg
+
+
+def civ_page_count() -> int:
+    """Number of /show_civs pages"""
+    return (len(CIV_EMOJI_CONFIG) + CIVS_PER_PAGE - 1) // CIVS_PER_PAGE
+
+
+def render_settings_summary(weighted_results: Mapping[str, Dict]) -> str:
+    """Bullet list of the drawn settings"""
+    return "\n".join([
+        f"• **{cat}**: {res['selected']}"
+        for cat, res in weighted_results.items()
+    ])
+
+
+BAN_INSTRUCTIONS = (
+    "**🎯 Comment bannir des civilisations:**\n\n"
+    "1️⃣ **Copie les emojis** des civilisations que tu veux bannir\n"
+    "2️⃣ Clique sur **📝 Entrer mes bans**\n"
+    "3️⃣ **Colle les emojis** dans la fenêtre\n"
+    "4️⃣ Clique sur **✅ Confirmer mes bans** quand tu as fini\n\n"
+    "💡 **Astuce:** Tu peux entrer plusieurs emojis à la fois!"
+)
+
+SELECTION_INSTRUCTIONS = (
+    "**🎯 Comment choisir ta civilisation:**\n\n"
+    "1️⃣ **Copie l'emoji** de la civilisation\n"
+    "2️⃣ Clique sur **📝 Choisir ma civilisation**\n"
+    "3️⃣ **Colle l'emoji** dans la fenêtre\n"
+    "4️⃣ Clique sur **✅ Confirmer**\n\n"
+    "💡 **Astuce:** Choisis parmi ta liste!"
+)
+
+
+def render_ban_intro(game_id: str, max_bans: int, weighted_results: Mapping[str, Dict]) -> List[str]:
+    """
+    Text of the ban DM (intro + instructions)
+
+    Returns a single message when it fits Discord's limit, two otherwise.
+    """
+    intro = (
+        f"🚫 **Phase de Ban - Partie {game_id}**\n\n"
+        f"📋 **Paramètres de la partie:**\n{render_settings_summary(weighted_results)}\n\n"
+        f"Tu peux bannir jusqu'à **{max_bans}** civilisations."
+    )
+    combined = f"{intro}\n\n{BAN_INSTRUCTIONS}"
+    if len(combined) <= MESSAGE_LIMIT:
+        return [combined]
+    return [intro, BAN_INSTRUCTIONS]
+
+
+def render_selection_pool(player_civs: List[str]) -> str:
+    """Embed description listing a player's civilization pool"""
+    civ_list = "\n".join([
+        f"{CIV_EMOJI_CONFIG[civ]} [{civ}]({LEADERS_TO_LINK[civ]})"
+        for civ in player_civs
+    ])
+    return (
+        f"**Tes civilisations disponibles ({len(player_civs)}):**\n{civ_list}\n\n"
+        f"Choisis UNE civilisation parmi cette liste."
+    )
+
+
+def render_final_results(
+    game_id: str,
+    weighted_results: Mapping[str, Dict],
+    civ_selections: Mapping[str, str],
+    bans: Mapping[str, List[str]],
+    names: Mapping[str, str]
+) -> List[str]:
+    """Render the three final results sections (settings, picks, bans)"""
+    # Settings
+    settings_msg = f"# 🎮 Résultats Finaux - Partie {game_id}\n\n"
+    settings_msg += "## 🎲 Configuration sélectionnée\n\n"
+
+    for category, result_data in weighted_results.items():
+        selected = result_data["selected"]
+        votes_count = result_data["votes"]
+        total_votes = sum(votes_count.values())
+        winning_votes = votes_count.get(selected, 0)
+        settings_msg += f"**{category}**: {selected} ({winning_votes}/{total_votes} votes)\n"
+
+    # Player selections
+    selections_msg = "## 👑 Civilisations choisies par les joueurs\n\n"
+
+    if civ_selections:
+        for player_id, civ in civ_selections.items():
+            emoji = CIV_EMOJI_CONFIG.get(civ, "")
+            name = names.get(player_id, f"Joueur {player_id}")
+            selections_msg += f"{emoji} **{name}**: {civ}\n"
+    else:
+        selections_msg += "*Aucune sélection effectuée*\n"
+
+    # Banned civs
+    bans_msg = "## 🚫 Civilisations bannies\n\n"
+
+    all_bans = {}
+    for player_id, player_bans in bans.items():
+        for ban in player_bans:
+            if ban not in all_bans:
+                all_bans[ban] = []
+            all_bans[ban].append(player_id)
+
+    if all_bans:
+        sorted_bans = sorted(all_bans.items(), key=lambda x: len(x[1]), reverse=True)
+        for civ, banners in sorted_bans[:30]:
+            emoji = CIV_EMOJI_CONFIG.get(civ, "")
+            bans_msg += f"{emoji} **{civ}** - {len(banners)} ban(s)\n"
+
+        if len(sorted_bans) > 30:
+            bans_msg += f"\n*Et {len(sorted_bans) - 30} autres civilisations bannies...*\n"
+    else:
+        bans_msg += "*Aucune civilisation bannie*\n"
+
+    return [settings_msg, selections_msg, bans_msg]
+
+
+def render_progress(game: Mapping, names: Mapping[int, str]) -> str:
+    """Render the votes/bans/selections progress report of a game"""
+    players = game["players"]
+    msg = f"## 📊 Progression - Partie {game['id']}\n\n"
+
+    # Voting progress
+    if game.get("voting_started"):
+        msg += "### 🗳️ Votes\n"
+        completed = 0
+        for player_id in players:
+            votes = game.get("votes", {}).get(str(player_id), {})
+            status = "✅" if len(votes) == len(GAME_OPTIONS) else "⏳"
+            msg += f"{status} **{names.get(player_id, player_id)}**: {len(votes)}/{len(GAME_OPTIONS)} catégories\n"
+            if len(votes) == len(GAME_OPTIONS):
+                completed += 1
+        msg += f"\n**Total**: {completed}/{len(players)} joueurs\n\n"
+
+    # Ban progress
+    if game.get("banning_started"):
+        msg += "### 🚫 Bans\n"
+        completed = 0
+        for player_id in players:
+            bans = game.get("bans", {}).get(str(player_id), [])
+            status = "✅" if str(player_id) in game.get("bans", {}) else "⏳"
+            msg += f"{status} **{names.get(player_id, player_id)}**: {len(bans)}/{game.get('max_bans', 2)} ban(s)\n"
+            if str(player_id) in game.get("bans", {}):
+                completed += 1
+        msg += f"\n**Total**: {completed}/{len(players)} joueurs\n\n"
+
+    # Selection progress
+    if game.get("selection_started"):
+        msg += "### 🎯 Sélection des civilisations\n"
+        completed = 0
+        for player_id in players:
+            civ = game.get("civ_selections", {}).get(str(player_id))
+            status = "✅" if civ else "⏳"
+            if civ:
+                emoji = CIV_EMOJI_CONFIG.get(civ, "")
+                msg += f"{status} **{names.get(player_id, player_id)}**: {emoji} {civ}\n"
+                completed += 1
+            else:
+                msg += f"{status} **{names.get(player_id, player_id)}**: En attente...\n"
+        msg += f"\n**Total**: {completed}/{len(players)} joueurs\n"
+
+    if not game.get("voting_started"):
+        if players:
+            msg += f"### 👥 Joueurs inscrits ({len(players)})\n"
+            msg += "\n".join(f"• **{names.get(player_id, player_id)}**" for player_id in players)
+            msg += "\n\n"
+        msg += "Les votes n'ont pas encore commencé."
+
+    return msg
+
+
+def render_player_games(games: Mapping[str, List[str]], summaries: Mapping[str, Dict]) -> str:
+    """Render a player's active and recently finished lobbies"""
+    def line(game_id):
+        summary = summaries[game_id]
+        thread = f" → <#{summary['thread_id']}>" if summary.get("thread_id") else ""
+        return f"• `{game_id}` — {summary['phase']}, {len(summary['players'])} joueur(s){thread}\n"
+
+    msg = "## 🎮 Mes parties\n\n### En cours\n"
+    msg += "".join(line(game_id) for game_id in games["active"]) or "*Aucune partie en cours*\n"
+    msg += "\n### Terminées récemment\n"
+    msg += "".join(line(game_id) for game_id in games["finished"]) or "*Aucune partie terminée*\n"
+    return msg
+
+
+def render_player_stats(stats, active: int, top: int = 3) -> str:
+    """Render a player's lobby counters and favourite picks and bans"""
+    def favourites(counter):
+        if not counter:
+            return "*Aucune*\n"
+        return "".join(
+            f"• {CIV_EMOJI_CONFIG.get(civ, '')} {civ} ×{count}\n"
+            for civ, count in counter.most_common(top)
+        )
+
+    return (
+        "## 📈 Mes statistiques\n\n"
+        f"**Parties rejointes**: {stats.joined} ({active} en cours, {stats.finished} terminées)\n"
+        f"**Parties créées**: {stats.created}\n\n"
+        f"### 🎯 Civilisations les plus jouées\n{favourites(stats.picks)}\n"
+        f"### 🚫 Civilisations les plus bannies\n{favourites(stats.bans)}"
+    )
+
+
+def render_stats(title: str, games: int, bans: List[Tuple[str, int, float]], picks: List[Tuple[str, int, float]],
+                 winners: List[Tuple[str, str, int, float]]) -> List[str]:
+    """
+    Render the most banned and picked civilizations and the most drawn
+    settings (as ranked by core.analytics), one message per section
+    """
+    bans_msg = f"## 📊 Statistiques — {title}\n**Parties terminées**: {games}\n\n"
+    bans_msg += "### 🚫 Civilisations les plus bannies\n"
+    bans_msg += "".join(
+        f"{rank}. {CIV_EMOJI_CONFIG.get(civ, '')} {civ}: {count} ban(s), {share:.0%} des parties\n"
+        for rank, (civ, count, share) in enumerate(bans, 1)
+    ) or "*Aucun ban*\n"
+
+    picks_msg = "### 🎯 Civilisations les plus choisies (quand proposées)\n"
+    picks_msg += "".join(
+        f"{rank}. {CIV_EMOJI_CONFIG.get(civ, '')} {civ}: {rate:.0%} ({count} choix)\n"
+        for rank, (civ, count, rate) in enumerate(picks, 1)
+    ) or "*Pas encore assez de parties*\n"
+
+    settings_msg = "### 🎲 Paramètres les plus tirés\n"
+    settings_msg += "".join(
+        f"**{category}**: {option} ({count} partie(s), tiré {rate:.0%} des fois où il avait des votes)\n"
+        for category, option, count, rate in winners
+    ) or "*Aucun paramètre tiré*\n"
+    return [bans_msg, picks_msg, settings_msg]
+
+
+def render_rating_changes(game_id: str, placements: List[List[int]], changes: Mapping[int, Tuple[float, float]],
+                          names: Mapping[int, str]) -> str:
+    """Render the placements of a game with every player's rating change"""
+    msg = f"## 🏁 Classement de la partie {game_id}\n\n"
+    for rank, tied in enumerate(placements, 1):
+        for player_id in tied:
+            old, new = changes[player_id]
+            msg += f"**{rank}.** {names.get(player_id, player_id)}: {new:.0f} ({new - old:+.0f})\n"
+    return msg
+
+
+def render_leaderboard(entries: List[Tuple[int, int, Dict]], names: Mapping[int, str], page: int, pages: int) -> str:
+    """Render one page of the rating leaderboard"""
+    msg = f"## 🏆 Classement Elo (page {page}/{pages})\n\n"
+    for rank, player_id, entry in entries:
+        msg += f"**{rank}.** {names.get(player_id, player_id)}: {entry['rating']:.0f} ({entry['games']} partie(s))\n"
+    return msg
@@ -2,16 +2,21 @@
 Voting and results calculation utilities
 """
 import random
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 
-def calculate_weighted_results(votes: Dict[str, Dict], categories: Dict[str, list]) -> Dict[str, Any]:
+def calculate_weighted_results(
+    votes: Dict[str, Dict],
+    categories: Dict[str, list],
+    weights: Optional[Dict[str, float]] = None
+) -> Dict[str, Any]:
     """
     Calculate weighted random results from all player votes
     
     Args:
         votes: Dict of player_id -> {category: choice}
         categories: Dict of category -> [options]
+        weights: Optional Dict of player_id -> weight of their votes in the draw (1 by default)
     
     Returns:
         Dict of category -> {"selected": choice, "votes": {option: count}}
@@ -20,18 +25,20 @@ def calculate_weighted_results(votes: Dict[str, Dict], categories: Dict[str, lis
     
     for category in categories.keys():
         votes_count = {}
+        draw_weights = {}
         
         # Count votes for this category
-        for player_votes in votes.values():
+        for player_id, player_votes in votes.items():
             if category in player_votes:
                 choice = player_votes[category]
                 votes_count[choice] = votes_count.get(choice, 0) + 1
+                weight = weights.get(player_id, 1.0) if weights else 1.0
+                draw_weights[choice] = draw_weights.get(choice, 0) + weight
         
         # Weighted random selection
         if votes_count:
-            choices = list(votes_count.keys())
-            weights = list(votes_count.values())
-            selected = random.choices(choices, weights=weights, k=1)[0]
+            choices = list(draw_weights.keys())
+            selected = random.choices(choices, weights=list(draw_weights.values()), k=1)[0]
             final_settings[category] = {
                 "selected": selected,
                 "votes": votes_count
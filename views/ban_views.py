@@ -3,187 +3,237 @@ Discord UI views for ban phase
 """
 import discord
 from core.configs import CIV_EMOJI_CONFIG
+from core.metrics import timed
 from utils.civilization import parse_emoji_from_text, emojis_to_civs
+from utils.civ_search import civ_index, split_names
+
+
+# action -> (label, style, row)
+BAN_ACTIONS = {
+    "enter": ("📝 Entrer mes bans", discord.ButtonStyle.primary, 0),
+    "view": ("👀 Voir mes bans actuels", discord.ButtonStyle.secondary, 0),
+    "clear": ("🗑️ Effacer mes bans", discord.ButtonStyle.secondary, 0),
+    "confirm": ("✅ Confirmer mes bans", discord.ButtonStyle.success, 1),
+    "help": ("❓ Aide", discord.ButtonStyle.secondary, 1),
+}
 
 
 class BanCollectorView(discord.ui.View):
-    """View for text-based emoji ban collection"""
-    
-    def __init__(self, game_manager, game_id, user_id, max_bans):
-        super().__init__(timeout=600)  # 10 minute timeout
-        self.game_manager = game_manager
+    """View for text-based emoji ban collection, made only of persistent buttons"""
+
+    def __init__(self, game_id, user_id, disabled=False):
+        super().__init__(timeout=None)
+        for action in BAN_ACTIONS:
+            self.add_item(BanButton(action, game_id, user_id, disabled=disabled))
+
+
+class BanButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"ban:(?P<action>enter|view|clear|confirm|help):(?P<game_id>\w+):(?P<user_id>\d+)"
+):
+    """Ban phase button, routed by its custom_id so it keeps working after a restart"""
+
+    def __init__(self, action, game_id, user_id, disabled=False):
+        label, style, row = BAN_ACTIONS[action]
+        super().__init__(
+            discord.ui.Button(
+                label=label,
+                style=style,
+                row=row,
+                disabled=disabled,
+                custom_id=f"ban:{action}:{game_id}:{user_id}"
+            )
+        )
+        self.action = action
         self.game_id = game_id
         self.user_id = user_id
-        self.max_bans = max_bans
-        self.selected_bans = []
-        
-    @discord.ui.button(label="📝 Entrer mes bans", style=discord.ButtonStyle.primary, row=0)
-    async def enter_bans(self, interaction: discord.Interaction, button: discord.ui.Button):
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["action"], match["game_id"], int(match["user_id"]))
+
+    @timed("component_seconds", component="ban")
+    async def callback(self, interaction: discord.Interaction):
         if interaction.user.id != self.user_id:
             await interaction.response.send_message(
-                "❌ Ce n'est pas ton interface de ban!", 
+                "❌ Ce n'est pas ton interface de ban!",
                 ephemeral=True
             )
             return
-        
-        modal = BanInputModal(self)
-        await interaction.response.send_modal(modal)
-    
-    @discord.ui.button(label="👀 Voir mes bans actuels", style=discord.ButtonStyle.secondary, row=0)
-    async def view_current(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if interaction.user.id != self.user_id:
-            await interaction.response.send_message(
-                "❌ Ce n'est pas ton interface de ban!", 
-                ephemeral=True
-            )
+
+        game_manager = interaction.client.game_manager
+        game = game_manager.get_game(self.game_id)
+        if not game:
+            await interaction.response.send_message("❌ Partie introuvable !", ephemeral=True)
             return
-        
-        if not self.selected_bans:
+
+        handler = getattr(self, f"_{self.action}")
+        await handler(interaction, game_manager, game)
+
+    async def _enter(self, interaction, game_manager, game):
+        modal = BanInputModal(game_manager, self.game_id, self.user_id, game.get("max_bans", 2))
+        await interaction.response.send_modal(modal)
+
+    async def _view(self, interaction, game_manager, game):
+        selected_bans = game_manager.drafts.get("banning", self.game_id, self.user_id, [])
+        if not selected_bans:
             await interaction.response.send_message(
                 "Tu n'as encore sélectionné aucune civilisation.",
                 ephemeral=True
             )
         else:
-            ban_list = "\n".join([f"{CIV_EMOJI_CONFIG[civ]} {civ}" for civ in self.selected_bans])
+            ban_list = "\n".join([f"{CIV_EMOJI_CONFIG[civ]} {civ}" for civ in selected_bans])
             await interaction.response.send_message(
-                f"**Tes bans actuels ({len(self.selected_bans)}/{self.max_bans}):**\n{ban_list}",
+                f"**Tes bans actuels ({len(selected_bans)}/{game.get('max_bans', 2)}):**\n{ban_list}",
                 ephemeral=True
             )
-    
-    @discord.ui.button(label="🗑️ Effacer mes bans", style=discord.ButtonStyle.secondary, row=0)
-    async def clear_bans(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if interaction.user.id != self.user_id:
-            await interaction.response.send_message(
-                "❌ Ce n'est pas ton interface de ban!", 
-                ephemeral=True
-            )
-            return
-        
-        self.selected_bans = []
+
+    async def _clear(self, interaction, game_manager, game):
+        game_manager.drafts.discard("banning", self.game_id, self.user_id)
         await interaction.response.send_message(
             "✅ Tes bans ont été effacés!",
             ephemeral=True
         )
-    
-    @discord.ui.button(label="✅ Confirmer mes bans", style=discord.ButtonStyle.success, row=1)
-    async def confirm_bans(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if interaction.user.id != self.user_id:
+
+    async def _confirm(self, interaction, game_manager, game):
+        if str(self.user_id) in game.get("bans", {}):
             await interaction.response.send_message(
-                "❌ Ce n'est pas ton interface de ban!", 
+                "❌ Tes bans ont déjà été enregistrés!",
                 ephemeral=True
             )
             return
-        
+
         # Save bans
-        game = self.game_manager.get_game(self.game_id)
-        if "bans" not in game:
-            game["bans"] = {}
-        
-        game["bans"][str(self.user_id)] = self.selected_bans
-        self.game_manager.save()
-        
+        selected_bans = game_manager.drafts.get("banning", self.game_id, self.user_id, [])
+        game_manager.record(game, "ban_submitted", player_id=self.user_id, bans=selected_bans)
+        game_manager.save(game)
+        game_manager.drafts.discard("banning", self.game_id, self.user_id)
+
         # Send confirmation
-        if self.selected_bans:
-            ban_list = "\n".join([f"{CIV_EMOJI_CONFIG[civ]} {civ}" for civ in self.selected_bans[:10]])
-            if len(self.selected_bans) > 10:
-                ban_list += f"\n*... et {len(self.selected_bans) - 10} autres*"
-            response_msg = f"🚫 **Tes bans ont été enregistrés ({len(self.selected_bans)} civilisation(s)):**\n{ban_list}"
+        if selected_bans:
+            ban_list = "\n".join([f"{CIV_EMOJI_CONFIG[civ]} {civ}" for civ in selected_bans[:10]])
+            if len(selected_bans) > 10:
+                ban_list += f"\n*... et {len(selected_bans) - 10} autres*"
+            response_msg = f"🚫 **Tes bans ont été enregistrés ({len(selected_bans)} civilisation(s)):**\n{ban_list}"
         else:
             response_msg = "✅ Tu as choisi de ne bannir aucune civilisation!"
-        
+
         await interaction.response.send_message(response_msg, ephemeral=True)
-        
+
         # Disable all buttons
-        for item in self.children:
-            item.disabled = True
-        await interaction.message.edit(view=self)
-        
-        # Check if all players have finished banning
-        await self.game_manager.check_bans_complete(interaction.client, self.game_id)
-    
-    @discord.ui.button(label="❓ Aide", style=discord.ButtonStyle.secondary, row=1)
-    async def show_help(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.message.edit(view=BanCollectorView(self.game_id, self.user_id, disabled=True))
+
+        # Check if all players have finished banning (in the background)
+        game_manager.queue_check(interaction.client, self.game_id, "bans")
+
+    async def _help(self, interaction, game_manager, game):
+        max_bans = game.get("max_bans", 2)
         help_msg = (
             "**📖 Comment utiliser le système de ban:**\n\n"
             "1. Clique sur **📝 Entrer mes bans**\n"
             "2. Entre les emojis des civilisations à bannir\n"
             "   Exemple: `🎭 ⚔️ 🦅` (pour bannir Lincoln, Alexandre et Chaka)\n"
-            "3. Tu peux entrer plusieurs emojis séparés par des espaces\n"
-            f"4. Tu peux bannir jusqu'à **{self.max_bans}** civilisations\n"
+            "3. Tu peux entrer plusieurs emojis séparés par des espaces, ou des noms (même partiels, sans accents) séparés par des virgules\n"
+            "   Exemple: `cleo ptol, perse nader`\n"
+            f"4. Tu peux bannir jusqu'à **{max_bans}** civilisations\n"
             "5. Clique sur **✅ Confirmer** quand tu as fini\n\n"
             "**💡 Astuce:** Copie les emojis directement depuis la liste des civilisations!\n"
-            f"**💡 Astuce:** Tu peux bannir autant de civilisation que tu le souhaites en deçà de la limite qui est de {self.max_bans}"
+            f"**💡 Astuce:** Tu peux bannir autant de civilisation que tu le souhaites en deçà de la limite qui est de {max_bans}"
         )
         await interaction.response.send_message(help_msg, ephemeral=True)
 
 
 class BanInputModal(discord.ui.Modal, title="Entrer les bans"):
     """Modal for entering ban emojis"""
-    
-    def __init__(self, parent_view):
+
+    def __init__(self, game_manager, game_id, user_id, max_bans):
         super().__init__()
-        self.parent_view = parent_view
-        
+        self.game_manager = game_manager
+        self.game_id = game_id
+        self.user_id = user_id
+        self.max_bans = max_bans
+
         self.ban_input = discord.ui.TextInput(
-            label=f"Entre les emojis à bannir (max {parent_view.max_bans})",
-            placeholder="Exemple: 🎭 ⚔️ 🦅 🌊",
+            label=f"Emojis ou noms à bannir (max {max_bans})",
+            placeholder="Exemple: 🎭 ⚔️ ou cleo ptol, perse nader",
             style=discord.TextStyle.short,
             required=False,
-            max_length=100
+            max_length=200
         )
         self.add_item(self.ban_input)
-    
+
+    @timed("component_seconds", component="ban_modal")
     async def on_submit(self, interaction: discord.Interaction):
         input_text = self.ban_input.value.strip()
-        
+
         if not input_text:
             await interaction.response.send_message(
-                "❌ Aucun emoji entré. Utilise 🗑️ pour effacer tes bans.",
+                "❌ Rien n'a été entré. Utilise 🗑️ pour effacer tes bans.",
                 ephemeral=True
             )
             return
-        
-        # Parse emojis
+
+        # Emojis and names can be mixed
         found_emojis = parse_emoji_from_text(input_text)
-        
-        if not found_emojis:
+        names = split_names(input_text, found_emojis)
+
+        if not found_emojis and not names:
             await interaction.response.send_message(
-                "❌ Aucun emoji valide trouvé. Entre uniquement des emojis.",
+                "❌ Aucun emoji ni nom de civilisation trouvé.",
                 ephemeral=True
             )
             return
-        
+
         # Convert to civilizations
         selected_civs, not_found, duplicates = emojis_to_civs(found_emojis)
-        
+        unknown_names = []
+        ambiguous_names = []
+        for name in names:
+            civ, candidates = civ_index().resolve(name)
+            if civ:
+                if civ not in selected_civs:
+                    selected_civs.append(civ)
+            elif candidates:
+                ambiguous_names.append((name, candidates))
+            else:
+                unknown_names.append(name)
+
+        response = ""
         # Handle duplicates
         if duplicates:
-            dup_msg = "**⚠️ Ces emojis correspondent à plusieurs civilisations:**\n"
+            response += "**⚠️ Ces emojis correspondent à plusieurs civilisations:**\n"
             for emoji, civs in duplicates:
-                dup_msg += f"\n{emoji} pourrait être:\n"
+                response += f"\n{emoji} pourrait être:\n"
                 for civ in civs:
-                    dup_msg += f"  • {civ}\n"
-            dup_msg += "\n**Les civilisations avec emojis uniques ont été ajoutées.**"
-            
-            await interaction.response.send_message(
-                dup_msg + f"\n\n✅ {len(selected_civs)} civilisation(s) ajoutée(s) aux bans.",
-                ephemeral=True
-            )
-        else:
-            response = f"✅ {len(selected_civs)} civilisation(s) ajoutée(s) aux bans."
-            if not_found:
-                response += f"\n⚠️ Emojis non reconnus: {' '.join(not_found)}"
-            await interaction.response.send_message(response, ephemeral=True)
-        
-        # Add to bans
-        self.parent_view.selected_bans.extend(selected_civs)
-        self.parent_view.selected_bans = list(set(self.parent_view.selected_bans))  # Remove duplicates
-        
+                    response += f"  • {civ}\n"
+            response += "\n**Les civilisations avec emojis uniques ont été ajoutées.**\n\n"
+        if ambiguous_names:
+            response += "**⚠️ Ces noms correspondent à plusieurs civilisations (précise-les):**\n"
+            for name, civs in ambiguous_names:
+                response += f"\n« {name} » pourrait être:\n"
+                for civ in civs:
+                    response += f"  • {CIV_EMOJI_CONFIG.get(civ, '')} {civ}\n"
+            response += "\n"
+
+        response += f"✅ {len(selected_civs)} civilisation(s) ajoutée(s) aux bans."
+        if not_found:
+            response += f"\n⚠️ Emojis non reconnus: {' '.join(not_found)}"
+        if unknown_names:
+            response += f"\n⚠️ Noms non reconnus: {', '.join(unknown_names)}"
+        await interaction.response.send_message(response, ephemeral=True)
+
+        # Add to the draft (saved only when the player confirms)
+        drafts = self.game_manager.drafts
+        selected_bans = drafts.get("banning", self.game_id, self.user_id, []) + selected_civs
+        selected_bans = list(dict.fromkeys(selected_bans))  # Remove duplicates
+
         # Check max bans
-        if len(self.parent_view.selected_bans) > self.parent_view.max_bans:
-            overflow = len(self.parent_view.selected_bans) - self.parent_view.max_bans
-            self.parent_view.selected_bans = self.parent_view.selected_bans[:self.parent_view.max_bans]
+        if len(selected_bans) > self.max_bans:
+            overflow = len(selected_bans) - self.max_bans
+            selected_bans = selected_bans[:self.max_bans]
             await interaction.followup.send(
-                f"⚠️ Limite de {self.parent_view.max_bans} bans atteinte. {overflow} civilisation(s) ignorée(s).",
+                f"⚠️ Limite de {self.max_bans} bans atteinte. {overflow} civilisation(s) ignorée(s).",
                 ephemeral=True
             )
+
+        drafts.set("banning", self.game_id, self.user_id, selected_bans)
@@ -2,32 +2,60 @@
 Discord UI views for game creation and joining
 """
 import discord
-from views.voting_views import VoteView
+from core.metrics import timed
+
+
+# action -> (label, style)
+JOIN_ACTIONS = {
+    "join": ("Rejoindre la partie", discord.ButtonStyle.green),
+    "start": ("Commencer les votes", discord.ButtonStyle.primary),
+}
 
 
 class GameJoinView(discord.ui.View):
     """View with join and start buttons for a game"""
     
-    def __init__(self, game_manager, game_id):
+    def __init__(self, game_id, disabled=False):
         super().__init__(timeout=None)
-        self.game_manager = game_manager
-        self.game_id = game_id
-        
-        join_button = discord.ui.Button(
-            label="Rejoindre la partie", 
-            style=discord.ButtonStyle.green
-        )
-        start_button = discord.ui.Button(
-            label="Commencer les votes", 
-            style=discord.ButtonStyle.primary
+        for action in JOIN_ACTIONS:
+            self.add_item(GameJoinButton(action, game_id, disabled=disabled))
+
+
+class GameJoinButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"game:(?P<action>join|start):(?P<game_id>\w+)"
+):
+    """Join/start button, routed by its custom_id so it keeps working after a restart"""
+    
+    def __init__(self, action, game_id, disabled=False):
+        label, style = JOIN_ACTIONS[action]
+        super().__init__(
+            discord.ui.Button(
+                label=label,
+                style=style,
+                disabled=disabled,
+                custom_id=f"game:{action}:{game_id}"
+            )
         )
+        self.action = action
+        self.game_id = game_id
+    
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["action"], match["game_id"])
+    
+    async def callback(self, interaction: discord.Interaction):
+        self.game_manager = interaction.client.game_manager
+        if not self.game_manager.get_game(self.game_id):
+            await interaction.response.send_message("❌ Partie introuvable !", ephemeral=True)
+            return
         
-        join_button.callback = self.join_callback
-        start_button.callback = self.start_callback
-        
-        self.add_item(join_button)
-        self.add_item(start_button)
+        if self.action == "join":
+            await self.join_callback(interaction)
+        else:
+            await self.start_callback(interaction)
     
+    @timed("component_seconds", component="join")
     async def join_callback(self, interaction: discord.Interaction):
         """Handle player joining the game"""
         game = self.game_manager.get_game(self.game_id)
@@ -40,20 +68,31 @@ class GameJoinView(discord.ui.View):
             return
 
         if interaction.user.id not in game["players"]:
-            game["players"].append(interaction.user.id)
-            self.game_manager.save()
+            self.game_manager.record(game, "player_joined", player_id=interaction.user.id)
+            self.game_manager.save(game)
+            # Vote DMs and name lookups reuse this user instead of fetching it
+            self.game_manager.users.remember(interaction.user)
+            self.game_manager.progress.notify(interaction.client, self.game_id)
             
             # Send join message to thread
             thread_id = game.get("thread_id")
             if thread_id:
                 try:
-                    thread = await interaction.client.fetch_channel(thread_id)
-                    await thread.send(f"{interaction.user.mention} a rejoint la partie !")
+                    thread = await self.game_manager.get_channel(interaction.client, thread_id)
+                except:
+                    thread = None
+                
+                if thread:
+                    # Answer the interaction first: the thread notice may wait in the send queue
                     await interaction.response.send_message(
-                        f"Tu as rejoint la partie ! Suis la conversation dans le thread.", 
+                        "Tu as rejoint la partie ! Suis la conversation dans le thread.", 
                         ephemeral=True
                     )
-                except:
+                    try:
+                        await self.game_manager.messages.send(thread, f"{interaction.user.mention} a rejoint la partie !")
+                    except Exception as e:
+                        print(f"⚠️ Erreur lors de l'envoi dans le thread: {e}")
+                else:
                     await interaction.response.send_message(
                         f"{interaction.user.mention} a rejoint la partie !", 
                         ephemeral=False
@@ -69,6 +108,7 @@ class GameJoinView(discord.ui.View):
                 ephemeral=True
             )
     
+    @timed("component_seconds", component="start")
     async def start_callback(self, interaction: discord.Interaction):
         """Handle starting the voting phase"""
         game = self.game_manager.get_game(self.game_id)
@@ -80,65 +120,30 @@ class GameJoinView(discord.ui.View):
             )
             return
 
-        if len(game["players"]) == 0:
+        if game["voting_started"]:
             await interaction.response.send_message(
-                "Aucun joueur n'a rejoint la partie !", 
+                "Les votes ont déjà commencé !", 
                 ephemeral=True
             )
             return
 
-        game["voting_started"] = True
-        game["results_channel_id"] = game.get("thread_id") or interaction.channel_id
-        self.game_manager.save()
-
-        # Disable buttons
-        for item in self.children:
-            item.disabled = True
-        await interaction.message.edit(view=self)
-
-        # Send start message to thread
-        thread_id = game.get("thread_id")
-        if thread_id:
-            try:
-                thread = await interaction.client.fetch_channel(thread_id)
-                await interaction.response.send_message(
-                    "Les votes démarrent...", 
-                    ephemeral=True
-                )
-                await thread.send(
-                    "🗳️ Les votes ont commencé ! Chaque joueur va recevoir un message privé."
-                )
-            except:
-                await interaction.response.send_message(
-                    "🗳️ Les votes ont commencé ! Chaque joueur va recevoir un message privé."
-                )
-        else:
+        if len(game["players"]) == 0:
             await interaction.response.send_message(
-                "🗳️ Les votes ont commencé ! Chaque joueur va recevoir un message privé."
+                "Aucun joueur n'a rejoint la partie !", 
+                ephemeral=True
             )
+            return
 
-        # Send voting DMs to players
-        failed_users = []
-        for player_id in game["players"]:
-            try:
-                user = await interaction.client.fetch_user(player_id)
-                vote_view = VoteView(self.game_manager, self.game_id, player_id)
-                await user.send(
-                    f"🎮 **Votes pour la partie {self.game_id} - Page 1/3**\n\n"
-                    f"Sélectionne toutes tes options ci-dessous, puis clique sur 'Page suivante' pour continuer.",
-                    view=vote_view,
-                )
-                print(f"✅ Message envoyé à {user.name} ({player_id})")
-            except discord.Forbidden:
-                failed_users.append(f"<@{player_id}>")
-                print(f"❌ {player_id} a bloqué les MPs du bot")
-            except Exception as e:
-                failed_users.append(f"<@{player_id}>")
-                print(f"❌ Erreur lors de l'envoi du message à {player_id}: {e}")
-        
-        if failed_users:
-            target_channel = thread if thread_id else interaction.channel
-            await target_channel.send(
-                f"⚠️ Impossible d'envoyer les MPs à : {', '.join(failed_users)}\n"
-                f"Ils doivent activer les MPs depuis les membres du serveur dans leurs paramètres de confidentialité."
-            )
+        self.game_manager.record(
+            game, "voting_started",
+            results_channel_id=game.get("thread_id") or interaction.channel_id
+        )
+        self.game_manager.save(game)
+        self.game_manager.progress.notify(interaction.client, self.game_id)
+
+        # Acknowledge by disabling the buttons; the announcement and vote DMs run in the background
+        await interaction.response.edit_message(view=GameJoinView(self.game_id, disabled=True))
+        self.game_manager.jobs.submit(
+            "envoi des votes", self.game_id,
+            self.game_manager.send_vote_interfaces, interaction.client, self.game_id, interaction.channel_id
+        )
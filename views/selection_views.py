@@ -3,97 +3,129 @@ Discord UI views for civilization selection phase
 """
 import discord
 from core.configs import CIV_EMOJI_CONFIG
-from utils.civilization import parse_emoji_from_text
+from core.metrics import timed
+from utils.civilization import emoji_to_civ, parse_emoji_from_text
+from utils.civ_search import civ_index
+
+
+# action -> (label, style, row)
+SELECTION_ACTIONS = {
+    "select": ("📝 Choisir ma civilisation", discord.ButtonStyle.primary, 0),
+    "view": ("👀 Voir ma sélection", discord.ButtonStyle.secondary, 0),
+    "confirm": ("✅ Confirmer mon choix", discord.ButtonStyle.success, 1),
+    "help": ("❓ Aide", discord.ButtonStyle.secondary, 1),
+}
 
 
 class CivSelectionView(discord.ui.View):
-    """View for civilization selection"""
-    
-    def __init__(self, game_manager, game_id, user_id, available_civs):
-        super().__init__(timeout=600)  # 10 minute timeout
-        self.game_manager = game_manager
+    """View for civilization selection, made only of persistent buttons"""
+
+    def __init__(self, game_id, user_id, disabled=False):
+        super().__init__(timeout=None)
+        for action in SELECTION_ACTIONS:
+            self.add_item(SelectionButton(action, game_id, user_id, disabled=disabled))
+
+
+class SelectionButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"pick:(?P<action>select|view|confirm|help):(?P<game_id>\w+):(?P<user_id>\d+)"
+):
+    """Selection phase button, routed by its custom_id so it keeps working after a restart"""
+
+    def __init__(self, action, game_id, user_id, disabled=False):
+        label, style, row = SELECTION_ACTIONS[action]
+        super().__init__(
+            discord.ui.Button(
+                label=label,
+                style=style,
+                row=row,
+                disabled=disabled,
+                custom_id=f"pick:{action}:{game_id}:{user_id}"
+            )
+        )
+        self.action = action
         self.game_id = game_id
         self.user_id = user_id
-        self.available_civs = available_civs
-        self.selected_civ = None
-        
-    @discord.ui.button(label="📝 Choisir ma civilisation", style=discord.ButtonStyle.primary, row=0)
-    async def select_civ(self, interaction: discord.Interaction, button: discord.ui.Button):
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["action"], match["game_id"], int(match["user_id"]))
+
+    @timed("component_seconds", component="selection")
+    async def callback(self, interaction: discord.Interaction):
         if interaction.user.id != self.user_id:
             await interaction.response.send_message(
-                "❌ Ce n'est pas ton interface de sélection!", 
+                "❌ Ce n'est pas ton interface de sélection!",
                 ephemeral=True
             )
             return
-        
-        modal = CivSelectionModal(self)
-        await interaction.response.send_modal(modal)
-    
-    @discord.ui.button(label="👀 Voir ma sélection", style=discord.ButtonStyle.secondary, row=0)
-    async def view_current(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if interaction.user.id != self.user_id:
-            await interaction.response.send_message(
-                "❌ Ce n'est pas ton interface de sélection!", 
-                ephemeral=True
-            )
+
+        game_manager = interaction.client.game_manager
+        game = game_manager.get_game(self.game_id)
+        if not game:
+            await interaction.response.send_message("❌ Partie introuvable !", ephemeral=True)
             return
-        
-        if not self.selected_civ:
+
+        handler = getattr(self, f"_{self.action}")
+        await handler(interaction, game_manager, game)
+
+    async def _select(self, interaction, game_manager, game):
+        available_civs = game.get("civ_pools", {}).get(str(self.user_id), [])
+        modal = CivSelectionModal(game_manager, self.game_id, self.user_id, available_civs)
+        await interaction.response.send_modal(modal)
+
+    async def _view(self, interaction, game_manager, game):
+        selected_civ = game_manager.drafts.get("selection", self.game_id, self.user_id)
+        if not selected_civ:
             await interaction.response.send_message(
                 "Tu n'as pas encore sélectionné de civilisation.",
                 ephemeral=True
             )
         else:
             await interaction.response.send_message(
-                f"**Ta sélection actuelle:**\n{CIV_EMOJI_CONFIG[self.selected_civ]} {self.selected_civ}",
+                f"**Ta sélection actuelle:**\n{CIV_EMOJI_CONFIG[selected_civ]} {selected_civ}",
                 ephemeral=True
             )
-    
-    @discord.ui.button(label="✅ Confirmer mon choix", style=discord.ButtonStyle.success, row=1)
-    async def confirm_selection(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if interaction.user.id != self.user_id:
+
+    async def _confirm(self, interaction, game_manager, game):
+        selected_civ = game_manager.drafts.get("selection", self.game_id, self.user_id)
+        if not selected_civ:
             await interaction.response.send_message(
-                "❌ Ce n'est pas ton interface de sélection!", 
+                "❌ Tu dois d'abord choisir une civilisation!",
                 ephemeral=True
             )
             return
-        
-        if not self.selected_civ:
+
+        if str(self.user_id) in game.get("civ_selections", {}):
             await interaction.response.send_message(
-                "❌ Tu dois d'abord choisir une civilisation!",
+                "❌ Ton choix a déjà été enregistré!",
                 ephemeral=True
             )
             return
-        
+
         # Save selection
-        game = self.game_manager.get_game(self.game_id)
-        if "civ_selections" not in game:
-            game["civ_selections"] = {}
-        
-        game["civ_selections"][str(self.user_id)] = self.selected_civ
-        self.game_manager.save()
-        
+        game_manager.record(game, "selection_submitted", player_id=self.user_id, civ=selected_civ)
+        game_manager.save(game)
+        game_manager.drafts.discard("selection", self.game_id, self.user_id)
+
         # Send confirmation
         await interaction.response.send_message(
-            f"✅ **Tu as choisi:**\n{CIV_EMOJI_CONFIG[self.selected_civ]} {self.selected_civ}\n\n"
+            f"✅ **Tu as choisi:**\n{CIV_EMOJI_CONFIG[selected_civ]} {selected_civ}\n\n"
             f"Ton choix a été enregistré!",
             ephemeral=True
         )
-        
+
         # Disable all buttons
-        for item in self.children:
-            item.disabled = True
-        await interaction.message.edit(view=self)
-        
-        # Check if all players have finished selecting
-        await self.game_manager.check_selections_complete(interaction.client, self.game_id)
-    
-    @discord.ui.button(label="❓ Aide", style=discord.ButtonStyle.secondary, row=1)
-    async def show_help(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.message.edit(view=CivSelectionView(self.game_id, self.user_id, disabled=True))
+
+        # Check if all players have finished selecting (in the background)
+        game_manager.queue_check(interaction.client, self.game_id, "sélections")
+
+    async def _help(self, interaction, game_manager, game):
         help_msg = (
             "**📖 Comment choisir ta civilisation:**\n\n"
             "1. Clique sur **📝 Choisir ma civilisation**\n"
-            "2. Entre l'emoji de la civilisation que tu veux jouer\n"
+            "2. Entre l'emoji ou le nom (même partiel) de la civilisation que tu veux jouer\n"
             "3. Clique sur **✅ Confirmer** pour valider ton choix\n\n"
             "**💡 Astuce:** Copie l'emoji directement depuis la liste ci-dessus!\n"
             "**⚠️ Note:** Tu ne peux choisir qu'une seule civilisation parmi celles proposées."
@@ -103,50 +135,58 @@ class CivSelectionView(discord.ui.View):
 
 class CivSelectionModal(discord.ui.Modal, title="Choisir ma civilisation"):
     """Modal for entering civilization emoji"""
-    
-    def __init__(self, parent_view):
+
+    def __init__(self, game_manager, game_id, user_id, available_civs):
         super().__init__()
-        self.parent_view = parent_view
-        
+        self.game_manager = game_manager
+        self.game_id = game_id
+        self.user_id = user_id
+        self.available_civs = available_civs
+
         self.civ_input = discord.ui.TextInput(
-            label="Entre l'emoji de ta civilisation",
-            placeholder="Exemple: 🎭",
+            label="Emoji ou nom de ta civilisation",
+            placeholder="Exemple: 🎭 ou lincoln",
             style=discord.TextStyle.short,
             required=True,
-            max_length=10
+            max_length=60
         )
         self.add_item(self.civ_input)
-    
+
+    @timed("component_seconds", component="selection_modal")
     async def on_submit(self, interaction: discord.Interaction):
         input_text = self.civ_input.value.strip()
-        
+
         if not input_text:
             await interaction.response.send_message(
-                "❌ Aucun emoji entré.",
+                "❌ Rien n'a été entré.",
                 ephemeral=True
             )
             return
-        
+
         # Parse emoji
         found_emojis = parse_emoji_from_text(input_text)
-        
-        if not found_emojis:
-            await interaction.response.send_message(
-                "❌ Aucun emoji valide trouvé.",
-                ephemeral=True
-            )
-            return
-        
-        # Get the first emoji
-        emoji = found_emojis[0]
-        
-        # Find matching civilization in available civs
+
         matching_civ = None
-        for civ in self.parent_view.available_civs:
-            if CIV_EMOJI_CONFIG.get(civ) == emoji:
-                matching_civ = civ
-                break
-        
+        if found_emojis:
+            # Get the first emoji
+            emoji = found_emojis[0]
+
+            # Find matching civilization in available civs
+            civs = emoji_to_civ(emoji)
+            matching_civ = next((civ for civ in self.available_civs if civ in civs), None)
+        else:
+            # A name: only the player's pool can match
+            emoji = f"« {input_text} »"
+            matching_civ, candidates = civ_index().resolve(input_text, among=self.available_civs)
+            if candidates:
+                await interaction.response.send_message(
+                    f"⚠️ {emoji} pourrait être:\n"
+                    + "".join(f"  • {CIV_EMOJI_CONFIG.get(civ, '')} {civ}\n" for civ in candidates)
+                    + "Précise le nom ou utilise l'emoji.",
+                    ephemeral=True
+                )
+                return
+
         if not matching_civ:
             await interaction.response.send_message(
                 f"❌ {emoji} ne correspond à aucune de tes civilisations disponibles.\n"
@@ -154,11 +194,12 @@ class CivSelectionModal(discord.ui.Modal, title="Choisir ma civilisation"):
                 ephemeral=True
             )
             return
-        
-        # Set the selection
-        self.parent_view.selected_civ = matching_civ
+
+        # Set the draft pick (saved only when the player confirms)
+        self.game_manager.drafts.set("selection", self.game_id, self.user_id, matching_civ)
+
         await interaction.response.send_message(
-            f"✅ Civilisation sélectionnée: {emoji} {matching_civ}\n"
+            f"✅ Civilisation sélectionnée: {CIV_EMOJI_CONFIG.get(matching_civ, '')} {matching_civ}\n"
             f"Clique sur **✅ Confirmer** pour valider ton choix.",
             ephemeral=True
         )
@@ -1,235 +1,233 @@
 """
 Discord UI views for voting phase
 """
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
 import discord
 from core.configs import GAME_OPTIONS
+from core.metrics import timed
 
 
-class VoteView(discord.ui.View):
-    """First page of voting interface"""
-    
-    def __init__(self, game_manager, game_id, user_id):
-        super().__init__(timeout=None)
-        self.game_manager = game_manager
-        self.game_id = game_id
-        self.user_id = user_id
-        self.user_votes = {}
-        
-        # Add first 4 select menus (rows 0-3)
-        categories = list(GAME_OPTIONS.keys())
-        
-        for i, category in enumerate(categories[:4]):
-            options = GAME_OPTIONS[category]
-            self.add_item(
-                OptionSelect(category, options, game_manager, game_id, user_id, self, row=i)
-            )
-    
-    @discord.ui.button(
-        label="Page suivante ➡️", 
-        style=discord.ButtonStyle.primary, 
-        row=4
+VOTE_CATEGORIES = list(GAME_OPTIONS.keys())
+
+# Discord allows 5 rows per message: 4 select menus + 1 row of buttons per page
+VOTE_PAGES = [VOTE_CATEGORIES[:4], VOTE_CATEGORIES[4:8], VOTE_CATEGORIES[8:]]
+
+# category -> page it is displayed on
+CATEGORY_PAGE = {
+    category: page
+    for page, categories in enumerate(VOTE_PAGES)
+    for category in categories
+}
+
+# category -> {option: index}, used to encode ballots
+OPTION_INDEX = {
+    category: {option: i for i, option in enumerate(options)}
+    for category, options in GAME_OPTIONS.items()
+}
+
+# action -> (label, style); "prev"/"next" buttons carry the page they lead to
+VOTE_BUTTONS = {
+    "prev": ("⬅️ Retour", discord.ButtonStyle.secondary),
+    "next": ("Page suivante ➡️", discord.ButtonStyle.primary),
+    "submit": ("✅ Valider tous mes choix", discord.ButtonStyle.success),
+}
+
+BALLOT_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BALLOT_EMPTY = "-"
+
+
+def encode_ballot(ballot: Dict[str, str]) -> str:
+    """Encode a partial ballot as one character per category (fits in a custom_id)"""
+    return "".join(
+        BALLOT_DIGITS[OPTION_INDEX[category][ballot[category]]] if category in ballot else BALLOT_EMPTY
+        for category in VOTE_CATEGORIES
     )
-    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # Save current page votes temporarily
-        game = self.game_manager.get_game(self.game_id)
-        if "temp_votes" not in game:
-            game["temp_votes"] = {}
-        if str(self.user_id) not in game["temp_votes"]:
-            game["temp_votes"][str(self.user_id)] = {}
-        
-        game["temp_votes"][str(self.user_id)].update(self.user_votes)
-        self.game_manager.save()
-        
-        # Go to second view
-        new_view = VoteView2(self.game_manager, self.game_id, self.user_id)
-        new_view.user_votes = game["temp_votes"][str(self.user_id)].copy()
-        
-        await interaction.response.edit_message(
-            content="🎮 **Votes pour la partie - Page 2/3**\n\nSélectionne tes options ci-dessous, puis clique sur 'Page suivante'.",
-            view=new_view
-        )
 
 
-class VoteView2(discord.ui.View):
-    """Second page of voting interface"""
-    
-    def __init__(self, game_manager, game_id, user_id):
-        super().__init__(timeout=None)
-        self.game_manager = game_manager
-        self.game_id = game_id
-        self.user_id = user_id
-        self.user_votes = {}
-        
-        categories = list(GAME_OPTIONS.keys())
-        
-        for i, category in enumerate(categories[4:8]):
-            options = GAME_OPTIONS[category]
-            self.add_item(
-                OptionSelect(category, options, game_manager, game_id, user_id, self, row=i)
-            )
-    
-    @discord.ui.button(
-        label="⬅️ Retour", 
-        style=discord.ButtonStyle.secondary, 
-        row=4
+def decode_ballot(code: str) -> Dict[str, str]:
+    """Decode a ballot encoded with `encode_ballot`"""
+    ballot = {}
+    for category, char in zip(VOTE_CATEGORIES, code):
+        if char == BALLOT_EMPTY:
+            continue
+        index = BALLOT_DIGITS.find(char)
+        if 0 <= index < len(GAME_OPTIONS[category]):
+            ballot[category] = GAME_OPTIONS[category][index]
+    return ballot
+
+
+@lru_cache(maxsize=None)
+def _select_options(category: str, selected: Optional[str]) -> Tuple[discord.SelectOption, ...]:
+    """Select options of a category, built once per (category, selected option)"""
+    return tuple(
+        discord.SelectOption(label=option, value=option, default=option == selected)
+        for option in GAME_OPTIONS[category][:25]
     )
-    async def back_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        game = self.game_manager.get_game(self.game_id)
-        if "temp_votes" not in game:
-            game["temp_votes"] = {}
-        if str(self.user_id) not in game["temp_votes"]:
-            game["temp_votes"][str(self.user_id)] = {}
-        
-        game["temp_votes"][str(self.user_id)].update(self.user_votes)
-        self.game_manager.save()
-        
-        new_view = VoteView(self.game_manager, self.game_id, self.user_id)
-        new_view.user_votes = game["temp_votes"][str(self.user_id)].copy()
-        
-        await interaction.response.edit_message(
-            content="🎮 **Votes pour la partie - Page 1/3**\n\nSélectionne tes options ci-dessous, puis clique sur 'Page suivante'.",
-            view=new_view
+
+
+def vote_page_content(game_id, page):
+    """Message content of a voting page"""
+    if page == 0:
+        return (
+            f"🎮 **Votes pour la partie {game_id} - Page 1/{len(VOTE_PAGES)}**\n\n"
+            f"Sélectionne toutes tes options ci-dessous, puis clique sur 'Page suivante' pour continuer."
         )
-    
-    @discord.ui.button(
-        label="Page suivante ➡️", 
-        style=discord.ButtonStyle.primary, 
-        row=4
-    )
-    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        game = self.game_manager.get_game(self.game_id)
-        if "temp_votes" not in game:
-            game["temp_votes"] = {}
-        if str(self.user_id) not in game["temp_votes"]:
-            game["temp_votes"][str(self.user_id)] = {}
-        
-        game["temp_votes"][str(self.user_id)].update(self.user_votes)
-        self.game_manager.save()
-        
-        new_view = VoteView3(self.game_manager, self.game_id, self.user_id)
-        new_view.user_votes = game["temp_votes"][str(self.user_id)].copy()
-        
-        await interaction.response.edit_message(
-            content="🎮 **Votes pour la partie - Page 3/3**\n\nSélectionne tes dernières options ci-dessous, puis clique sur 'Valider'.",
-            view=new_view
+    if page < len(VOTE_PAGES) - 1:
+        return (
+            f"🎮 **Votes pour la partie {game_id} - Page {page + 1}/{len(VOTE_PAGES)}**\n\n"
+            f"Sélectionne tes options ci-dessous, puis clique sur 'Page suivante'."
         )
+    return (
+        f"🎮 **Votes pour la partie {game_id} - Page {page + 1}/{len(VOTE_PAGES)}**\n\n"
+        f"Sélectionne tes dernières options ci-dessous, puis clique sur 'Valider'."
+    )
 
 
-class VoteView3(discord.ui.View):
-    """Third page of voting interface"""
-    
-    def __init__(self, game_manager, game_id, user_id):
+class VoteView(discord.ui.View):
+    """
+    One page of the voting interface, made only of persistent components
+
+    The partial ballot is encoded in every component's custom_id, so nothing
+    is stored until the player submits.
+    """
+
+    def __init__(self, game_id, user_id, page=0, ballot=None, disabled=False):
         super().__init__(timeout=None)
-        self.game_manager = game_manager
-        self.game_id = game_id
-        self.user_id = user_id
-        self.user_votes = {}
-        
-        categories = list(GAME_OPTIONS.keys())
-        
-        for i, category in enumerate(categories[8:]):
-            options = GAME_OPTIONS[category]
+        ballot = ballot or {}
+        code = encode_ballot(ballot)
+
+        for row, category in enumerate(VOTE_PAGES[page]):
             self.add_item(
-                OptionSelect(category, options, game_manager, game_id, user_id, self, row=i)
+                VoteSelect(game_id, user_id, VOTE_CATEGORIES.index(category), code, row=row, disabled=disabled)
+            )
+
+        if page > 0:
+            self.add_item(VoteButton("prev", game_id, user_id, page - 1, code, disabled=disabled))
+        if page < len(VOTE_PAGES) - 1:
+            self.add_item(VoteButton("next", game_id, user_id, page + 1, code, disabled=disabled))
+        else:
+            self.add_item(VoteButton("submit", game_id, user_id, page, code, disabled=disabled))
+
+
+class VoteButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"vote:(?P<action>prev|next|submit):(?P<game_id>\w+):(?P<user_id>\d+):(?P<page>\d+):(?P<ballot>[0-9a-z-]+)"
+):
+    """Page navigation and submit button, routed by its custom_id"""
+
+    def __init__(self, action, game_id, user_id, page, ballot_code, disabled=False):
+        label, style = VOTE_BUTTONS[action]
+        super().__init__(
+            discord.ui.Button(
+                label=label,
+                style=style,
+                row=4,
+                disabled=disabled,
+                custom_id=f"vote:{action}:{game_id}:{user_id}:{page}:{ballot_code}"
             )
-    
-    @discord.ui.button(
-        label="⬅️ Retour", 
-        style=discord.ButtonStyle.secondary, 
-        row=4
-    )
-    async def back_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        game = self.game_manager.get_game(self.game_id)
-        if "temp_votes" not in game:
-            game["temp_votes"] = {}
-        if str(self.user_id) not in game["temp_votes"]:
-            game["temp_votes"][str(self.user_id)] = {}
-        
-        game["temp_votes"][str(self.user_id)].update(self.user_votes)
-        self.game_manager.save()
-        
-        new_view = VoteView2(self.game_manager, self.game_id, self.user_id)
-        new_view.user_votes = game["temp_votes"][str(self.user_id)].copy()
-        
-        await interaction.response.edit_message(
-            content="🎮 **Votes pour la partie - Page 2/3**\n\nSélectionne tes options ci-dessous.",
-            view=new_view
         )
-    
-    @discord.ui.button(
-        label="✅ Valider tous mes choix", 
-        style=discord.ButtonStyle.success, 
-        row=4
-    )
-    async def submit_all(self, interaction: discord.Interaction, button: discord.ui.Button):
-        game = self.game_manager.get_game(self.game_id)
-        previous_votes = game.get("temp_votes", {}).get(str(self.user_id), {})
-        
-        # Merge with current view votes
-        all_votes = {**previous_votes, **self.user_votes}
-        
+        self.action = action
+        self.game_id = game_id
+        self.user_id = user_id
+        self.page = page
+        self.ballot_code = ballot_code
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["action"], match["game_id"], int(match["user_id"]), int(match["page"]), match["ballot"])
+
+    @timed("component_seconds", component="vote_button")
+    async def callback(self, interaction: discord.Interaction):
+        game_manager = interaction.client.game_manager
+        game = game_manager.get_game(self.game_id)
+        if not game:
+            await interaction.response.send_message("❌ Partie introuvable !", ephemeral=True)
+            return
+
+        ballot = decode_ballot(self.ballot_code)
+        if self.action != "submit":
+            await interaction.response.edit_message(
+                content=vote_page_content(self.game_id, self.page),
+                view=VoteView(self.game_id, self.user_id, self.page, ballot)
+            )
+            return
+
+        await self._submit(interaction, game_manager, ballot)
+
+    async def _submit(self, interaction, game_manager, all_votes):
+        # Another process may have closed the votes: check the latest state
+        game = game_manager.get_game(self.game_id, fresh=True)
+        if not game or game.get("banning_started"):
+            await interaction.response.send_message(
+                "❌ Les votes sont clos pour cette partie !",
+                ephemeral=True
+            )
+            return
+
         # Check if all categories have been voted on
         missing = []
         for category in GAME_OPTIONS.keys():
             if category not in all_votes:
                 missing.append(category)
-        
+
         if missing:
             await interaction.response.send_message(
-                f"❌ Il te manque encore ces catégories:\n" + "\n".join(f"- {cat}" for cat in missing),
+                "❌ Il te manque encore ces catégories:\n" + "\n".join(f"- {cat}" for cat in missing),
                 ephemeral=True
             )
             return
-        
-        # Save all votes permanently
-        if "votes" not in game:
-            game["votes"] = {}
-        game["votes"][str(self.user_id)] = all_votes
-        
-        # Clean up temp votes
-        if "temp_votes" in game and str(self.user_id) in game["temp_votes"]:
-            del game["temp_votes"][str(self.user_id)]
-        
-        self.game_manager.save()
-        
-        await interaction.response.send_message(
-            "🎉 Tous tes votes ont été enregistrés avec succès !", 
+
+        # Save all votes permanently (the only storage write of the whole ballot)
+        game_manager.record(game, "vote_submitted", player_id=self.user_id, votes=dict(all_votes))
+        game_manager.save(game)
+
+        # Acknowledge by disabling the components, then confirm
+        await interaction.response.edit_message(
+            view=VoteView(self.game_id, self.user_id, self.page, all_votes, disabled=True)
+        )
+        await interaction.followup.send(
+            "🎉 Tous tes votes ont été enregistrés avec succès !",
             ephemeral=True
         )
-        
-        # Disable all components
-        for item in self.children:
-            item.disabled = True
-        await interaction.message.edit(view=self)
-        
-        # Check if all players have finished voting
-        await self.game_manager.check_voting_complete(interaction.client, self.game_id)
-
-
-class OptionSelect(discord.ui.Select):
-    """Select menu for a single voting category"""
-    
-    def __init__(self, category, options, game_manager, game_id, user_id, parent_view, row=0):
-        self.category = category
-        self.game_manager = game_manager
-        self.game_id = game_id
-        self.user_id = user_id
-        self.parent_view = parent_view
 
-        select_options = [
-            discord.SelectOption(label=option, value=option) for option in options[:25]
-        ]
+        # Check if all players have finished voting (in the background)
+        game_manager.queue_check(interaction.client, self.game_id, "votes")
+
 
+class VoteSelect(
+    discord.ui.DynamicItem[discord.ui.Select],
+    template=r"vote:select:(?P<game_id>\w+):(?P<user_id>\d+):(?P<category>\d+):(?P<ballot>[0-9a-z-]+)"
+):
+    """Select menu for a single voting category, routed by its custom_id"""
+
+    def __init__(self, game_id, user_id, category_index, ballot_code, row=0, disabled=False):
+        category = VOTE_CATEGORIES[category_index]
+        selected = decode_ballot(ballot_code).get(category)
         super().__init__(
-            placeholder=f"Choisir: {category}",
-            options=select_options,
-            custom_id=f"vote_{game_id}_{category}_{user_id}",
-            row=row
+            discord.ui.Select(
+                placeholder=f"Choisir: {category}",
+                options=list(_select_options(category, selected)),
+                custom_id=f"vote:select:{game_id}:{user_id}:{category_index}:{ballot_code}",
+                row=row,
+                disabled=disabled
+            )
         )
+        self.game_id = game_id
+        self.user_id = user_id
+        self.category = category
+        self.ballot_code = ballot_code
 
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Select, match):
+        return cls(match["game_id"], int(match["user_id"]), int(match["category"]), match["ballot"])
+
+    @timed("component_seconds", component="vote_select")
     async def callback(self, interaction: discord.Interaction):
-        # Store vote in parent view temporarily (silently)
-        self.parent_view.user_votes[self.category] = self.values[0]
-        
-        # Just acknowledge the interaction without sending a message
-        await interaction.response.defer()
+        ballot = decode_ballot(self.ballot_code)
+        ballot[self.category] = self.item.values[0]
+
+        # Re-render the page so every component carries the updated ballot
+        await interaction.response.edit_message(
+            view=VoteView(self.game_id, self.user_id, CATEGORY_PAGE[self.category], ballot)
+        )